@@ -0,0 +1,83 @@
+"""
+Горячая/холодная части реестра.
+
+lots растёт бесконечно, а спискам нужны только лоты, по которым ещё идёт
+приём заявок. active_lots — узкая копия живых лотов (тысячи строк вместо
+миллионов): save_batch обновляет её для новых и изменившихся лотов, лот с
+финальным статусом (FINAL_STATUSES) или пропавший из реестра
+(disappeared_at) из неё удаляется и остаётся только в lots — холодном
+хранилище.
+
+Обновление — два запроса на пачку: DELETE по lot_id и INSERT … SELECT из
+lots для тех, чей статус не финальный. Python-код строки не перекладывает,
+поэтому горячая копия всегда совпадает с lots.
+"""
+from typing import Collection
+
+from sqlalchemy import and_, delete, func, insert, or_, select
+from sqlalchemy.orm import Session
+
+from app.config import FINAL_STATUSES
+from app.logger import get_logger
+from app.models import ActiveLot, Lot
+
+logger = get_logger("goszakup.active_lots")
+
+NAME_LEN = 500
+
+# Колонки active_lots ← выражения по lots
+_COLUMNS = {
+    "lot_id": Lot.id,
+    "lot_number": Lot.lot_number,
+    "lot_name": func.substr(Lot.lot_name, 1, NAME_LEN),
+    "status": Lot.status,
+    "purchase_method": Lot.purchase_method,
+    "customer_bin": Lot.customer_bin,
+    "purchase_amount": Lot.purchase_amount,
+    "deadline_date": Lot.deadline_date,
+    "publication_date": Lot.publication_date,
+    "created_at": Lot.created_at,
+}
+
+
+def _live():
+    # NULL-статус (не распознан) считаем живым: NOT IN на NULL дал бы «ложь»
+    return and_(
+        or_(Lot.status.is_(None), Lot.status.notin_(FINAL_STATUSES)),
+        Lot.disappeared_at.is_(None),
+    )
+
+
+def _copy_live(db: Session, *where) -> int:
+    stmt = insert(ActiveLot).from_select(
+        list(_COLUMNS),
+        select(*_COLUMNS.values()).where(_live(), *where),
+    )
+    return db.execute(stmt).rowcount
+
+
+def refresh(db: Session, lot_ids: Collection[int]) -> None:
+    """
+    Привести строки active_lots этих лотов к текущему состоянию lots
+    (без commit — в транзакции пачки).
+    """
+    if not lot_ids:
+        return
+    db.execute(delete(ActiveLot).where(ActiveLot.lot_id.in_(lot_ids)))
+    _copy_live(db, Lot.id.in_(lot_ids))
+
+
+def rebuild(db: Session, chunk_size: int = 50_000) -> int:
+    """Пересобрать active_lots целиком (после смены FINAL_STATUSES, для backfill)."""
+    db.execute(delete(ActiveLot))
+    db.commit()
+
+    max_id = db.execute(select(func.max(Lot.id))).scalar() or 0
+    total = 0
+    for start in range(0, max_id, chunk_size):
+        copied = _copy_live(db, Lot.id > start, Lot.id <= start + chunk_size)
+        db.commit()
+        total += max(copied, 0)
+        logger.info(f"  active_lots: id ≤ {min(start + chunk_size, max_id)}, скопировано {total}")
+    logger.info(f"active_lots пересобрана: {total} живых лотов")
+    return total
@@ -0,0 +1,129 @@
+"""
+Адаптивное расписание обхода.
+
+Перед полным обходом делаем дешёвую пробу 1-й страницы (probe_head):
+если счётчик записей и хеши верхних лотов совпадают с последним
+успешным запуском — реестр не менялся, обход пропускаем.
+
+Интервал до следующей проверки подстраивается под темп появления новых
+лотов (EWMA lots/час по последним запускам): днём чаще, ночью реже.
+Проба без изменений — тоже наблюдение: ноль новых лотов с последнего
+обхода. Без него в тихие часы темп застывал бы на последнем обходе, и
+интервал не рос бы, пока обход не случится сам (по MAX_INTERVAL).
+
+  интервал = TARGET_NEW_LOTS_PER_RUN / темп, в пределах [MIN, MAX]
+"""
+import json
+from datetime import datetime, timedelta
+from typing import Optional, Sequence
+
+from app.config import (
+    MAX_INTERVAL_MINUTES, MIN_INTERVAL_MINUTES, PROBE_HEAD_SIZE, TARGET_NEW_LOTS_PER_RUN,
+)
+from app.logger import get_logger
+
+logger = get_logger("goszakup.adaptive")
+
+# Вес запуска падает вдвое каждые RATE_HALF_LIFE_HOURS
+RATE_HALF_LIFE_HOURS = 6.0
+RATE_WINDOW_RUNS = 12
+
+
+def head_changed(last_total: Optional[int], last_hashes: Sequence[str], probe: dict) -> bool:
+    """Изменился ли реестр с последнего обхода. Не смогли проверить → считаем, что да."""
+    if probe.get("total_records") is None or not probe.get("head_hashes"):
+        return True
+    if last_total != probe["total_records"]:
+        return True
+    return list(last_hashes) != list(probe["head_hashes"])
+
+
+def arrival_rate(
+    runs: Sequence[tuple[datetime, int]], now: datetime, quiet_until: Optional[datetime] = None,
+) -> float:
+    """
+    Темп новых лотов (шт/час) по успешным запускам [(finished_at, lots_new)].
+    Новые лоты запуска делятся на время с предыдущего запуска; свежие
+    запуски весят больше (экспоненциальное затухание). quiet_until —
+    время пробы, не нашедшей изменений: от последнего запуска до неё
+    новых лотов ноль.
+    """
+    runs = sorted(runs)
+    if quiet_until is not None and runs and quiet_until > runs[-1][0]:
+        runs.append((quiet_until, 0))
+    weighted = 0.0
+    weights = 0.0
+    for (prev_at, _), (cur_at, lots_new) in zip(runs, runs[1:]):
+        gap_hours = (cur_at - prev_at).total_seconds() / 3600
+        if gap_hours <= 0:
+            continue
+        age_hours = max((now - cur_at).total_seconds() / 3600, 0.0)
+        w = 0.5 ** (age_hours / RATE_HALF_LIFE_HOURS)
+        weighted += w * (lots_new or 0) / gap_hours
+        weights += w
+    return weighted / weights if weights else 0.0
+
+
+def next_interval_minutes(rate_per_hour: float) -> int:
+    if rate_per_hour <= 0:
+        return MAX_INTERVAL_MINUTES
+    minutes = TARGET_NEW_LOTS_PER_RUN / rate_per_hour * 60
+    return int(min(max(minutes, MIN_INTERVAL_MINUTES), MAX_INTERVAL_MINUTES))
+
+
+def run_adaptive_cycle(pool=None) -> int:
+    """
+    Одна итерация планировщика: проба → (возможно) полный обход →
+    расчёт следующего интервала. Возвращает интервал в минутах.
+    pool — общий пул браузеров источников (app/sources/pool.py).
+    """
+    from app.database import SessionLocal
+    from app.models import ParseRun
+    from app.parser import probe_head
+    from app.service import run_parse_job
+
+    db = SessionLocal()
+    try:
+        last = (
+            db.query(ParseRun)
+            .filter(ParseRun.source == "lots", ParseRun.status == "success")
+            .order_by(ParseRun.id.desc())
+            .first()
+        )
+        now = datetime.utcnow()
+        quiet_until = None
+        stale = last is None or now - last.finished_at >= timedelta(minutes=MAX_INTERVAL_MINUTES)
+
+        if stale:
+            crawl = True
+            logger.info("Проба пропущена: последнего обхода нет или он старше MAX_INTERVAL")
+        else:
+            probe = probe_head(PROBE_HEAD_SIZE, pool)
+            crawl = head_changed(last.total_records, json.loads(last.head_hashes or "[]"), probe)
+            quiet_until = None if crawl else now
+            logger.info(
+                f"Проба 1-й страницы: записей {last.total_records} → {probe['total_records']}, "
+                f"{'есть изменения — обходим' if crawl else 'без изменений — пропускаем обход'}"
+            )
+    finally:
+        db.close()
+
+    if crawl:
+        run_parse_job(pool)
+
+    db = SessionLocal()
+    try:
+        runs = (
+            db.query(ParseRun.finished_at, ParseRun.lots_new)
+            .filter(ParseRun.source == "lots", ParseRun.status == "success")
+            .order_by(ParseRun.id.desc())
+            .limit(RATE_WINDOW_RUNS)
+            .all()
+        )
+    finally:
+        db.close()
+
+    rate = arrival_rate([(r.finished_at, r.lots_new) for r in runs], datetime.utcnow(), quiet_until)
+    interval = next_interval_minutes(rate)
+    logger.info(f"Темп новых лотов: {rate:.1f}/ч → следующая проверка через {interval} мин")
+    return interval
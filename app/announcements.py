@@ -0,0 +1,117 @@
+"""
+Измерение «объявление».
+
+Номер, наименование и URL объявления повторяются в каждом лоте
+многолотового объявления. announcements хранит их один раз (ключ —
+announce_number), lots ссылается на строку через announcement_id.
+
+save_batch разрешает объявления пачкой: один executemany upsert
+(новое объявление вставляется, у известного пустые name/url/заказчик
+дозаполняются) и один SELECT id по announce_number. lot_count растёт
+отдельным UPDATE уже после INSERT лотов (add_lots) — только на лоты,
+которые эта транзакция действительно вставила. rebuild() пересобирает
+таблицу по lots чанками по id.
+"""
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import bindparam, delete, func, select, update
+from sqlalchemy.orm import Session
+
+from app.database import upsert_increment
+from app.logger import get_logger
+from app.models import Announcement, Lot
+
+logger = get_logger("goszakup.announcements")
+
+# Колонки, которые берутся из первого (с наименьшим id) лота объявления
+FILL = ("announce_name", "announce_url", "customer_name", "customer_bin")
+
+
+def _upsert(db: Session, rows: list[dict]) -> None:
+    stmt = upsert_increment(
+        Announcement.__table__, db.get_bind().dialect.name, ("announce_number",), ("lot_count",), FILL,
+    )
+    db.execute(stmt, rows)
+
+
+def resolve(db: Session, lots: list[dict]) -> dict[str, int]:
+    """
+    Завести/дозаполнить объявления новых лотов пачки (без commit, lot_count
+    не трогается). Возвращает {announce_number: announcement_id}.
+    """
+    first = {}
+    for lot in lots:
+        if lot.get("announce_number"):
+            first.setdefault(lot["announce_number"], lot)
+    if not first:
+        return {}
+
+    now = datetime.utcnow()
+    _upsert(db, [
+        {"announce_number": number, "lot_count": 0, "created_at": now, **{c: lot.get(c) for c in FILL}}
+        for number, lot in first.items()
+    ])
+    return dict(db.execute(
+        select(Announcement.announce_number, Announcement.id)
+        .where(Announcement.announce_number.in_(first))
+    ).all())
+
+
+def add_lots(db: Session, lots: list[dict]) -> None:
+    """lot_count += число вставленных лотов объявления (без commit)."""
+    counts = Counter(lot["announce_number"] for lot in lots if lot.get("announce_number"))
+    if not counts:
+        return
+    table = Announcement.__table__
+    db.execute(
+        table.update()
+        .where(table.c.announce_number == bindparam("number"))
+        .values(lot_count=table.c.lot_count + bindparam("added")),
+        [{"number": number, "added": count} for number, count in counts.items()],
+    )
+
+
+def rebuild(db: Session, chunk_size: int = 200_000) -> int:
+    """
+    Пересобрать announcements и lots.announcement_id по всей lots (backfill).
+    URL объявления в lots не хранится: он дозаполнится при следующей
+    встрече объявления в реестре.
+    """
+    db.execute(delete(Announcement))
+    db.commit()
+
+    max_id = db.execute(select(func.max(Lot.id))).scalar() or 0
+    for start in range(0, max_id, chunk_size):
+        in_chunk = (Lot.id > start, Lot.id <= start + chunk_size)
+        first = (
+            select(func.min(Lot.id).label("id"), func.count().label("lot_count"))
+            .where(Lot.announce_number.isnot(None), *in_chunk)
+            .group_by(Lot.announce_number)
+            .subquery()
+        )
+        rows = db.execute(
+            select(Lot.announce_number, first.c.lot_count, Lot.announce_name,
+                   Lot.customer_name, Lot.customer_bin, Lot.created_at)
+            .join(first, Lot.id == first.c.id)
+        ).all()
+        if rows:
+            _upsert(db, [
+                {"announce_number": number, "lot_count": count, "announce_name": name, "announce_url": None,
+                 "customer_name": customer, "customer_bin": bin_, "created_at": created}
+                for number, count, name, customer, bin_, created in rows
+            ])
+        db.execute(
+            update(Lot).where(*in_chunk).values(
+                announcement_id=select(Announcement.id)
+                .where(Announcement.announce_number == Lot.announce_number)
+                .scalar_subquery(),
+                updated_at=Lot.updated_at,
+            )
+        )
+        db.commit()
+        logger.info(f"  Объявления: id ≤ {min(start + chunk_size, max_id)}")
+
+    total = db.execute(select(func.count()).select_from(Announcement)).scalar()
+    logger.info(f"announcements пересобрана: {total} объявлений")
+    return total
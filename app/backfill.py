@@ -0,0 +1,164 @@
+"""
+Backfill истории рядом со свежими обходами.
+
+Раньше догрузка истории шла тем же заданием parse_lots (max_instances=1),
+и долгий backfill откладывал трёхчасовой свежий обход. Теперь это два
+класса задач:
+
+  HIGH — свежие обходы реестров (parse_lots, crawl_<source>): на время
+         работы открывают окно RateBudget.fresh();
+  LOW  — окна backfill_tasks (страницы page_from..page_to выдачи реестра,
+         с query — доп. фильтром, например по датам), фоновая задача
+         backfill раз в BACKFILL_INTERVAL_MINUTES.
+
+Оба класса делят один DriverPool и один RateBudget. Backfill проверяет
+fresh_due перед каждой страницей, а запрос LOW во время свежего обхода
+получает FreshCrawlDue: окно сохраняет next_page, отдаёт браузер и
+продолжится со следующего запуска. Свежий обход ждёт не дольше одной
+страницы backfill; когда свежих обходов нет, весь бюджет — у backfill.
+"""
+import time
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import BACKFILL_MAX_ATTEMPTS, BACKFILL_WINDOW_PAGES, PAGE_PAUSE_SECONDS
+from app.database import SessionLocal
+from app.logger import get_logger
+from app.models import BackfillTask, ParseRun
+from app.sources import get_source
+from app.sources.budget import LOW, FreshCrawlDue
+from app.sources.engine import page_rows
+from app.sources.pool import DriverPool
+from app.watchlist import load_matcher
+
+logger = get_logger("goszakup.backfill")
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+
+def plan(
+    db: Session,
+    source: str,
+    page_from: int,
+    page_to: int,
+    window: int = BACKFILL_WINDOW_PAGES,
+    query: str = "",
+) -> list[BackfillTask]:
+    """Нарезать страницы page_from..page_to на окна по window страниц."""
+    get_source(source)  # неизвестный реестр — ValueError сразу, а не в планировщике
+    window = max(window, 1)
+    tasks = [
+        BackfillTask(
+            source=source, query=query, page_from=start, page_to=min(start + window - 1, page_to),
+            next_page=start, status=PENDING, attempts=0, rows_found=0, rows_new=0,
+        )
+        for start in range(page_from, page_to + 1, window)
+    ]
+    db.add_all(tasks)
+    db.commit()
+    return tasks
+
+
+def next_task(db: Session) -> Optional[BackfillTask]:
+    return (
+        db.query(BackfillTask)
+        .filter(BackfillTask.status == PENDING)
+        .order_by(BackfillTask.id)
+        .first()
+    )
+
+
+def run_task(db: Session, task: BackfillTask, pool: DriverPool) -> bool:
+    """
+    Пройти окно с task.next_page. True — окно закончено; False — уступили
+    свежему обходу, прогресс сохранён в next_page.
+
+    Каждый проход окна — свой запуск в parse_runs (source «backfill:<реестр>»):
+    лоты пишутся с его run_id, так что first/last_seen у них настоящие, а
+    следующий полный обход сравнивает их с собой, как и любые другие.
+    Матчер watchlist грузится один раз на окно.
+    """
+    source = get_source(task.source)
+    matcher = load_matcher(db)
+    run = ParseRun(source=f"backfill:{task.source}", started_at=datetime.utcnow(), status="running")
+    db.add(run)
+    db.commit()
+    db.refresh(run)
+
+    pages = 0
+    try:
+        with pool.lease(LOW) as driver:
+            try:
+                while task.next_page <= task.page_to:
+                    if pool.budget is not None and pool.budget.fresh_due:
+                        raise FreshCrawlDue()
+                    driver.get(source.page_url(task.next_page, task.query))
+                    source.wait_ready(driver)
+                    rows = page_rows(source, driver.page_source)
+                    new = source.save(db, rows, run.id, watchlist=matcher)[0] if rows else 0
+                    pages += 1
+                    run.lots_found += len(rows)
+                    run.lots_new += new
+                    task.rows_found += len(rows)
+                    task.rows_new += new
+                    # Пустая страница — выдача кончилась раньше окна
+                    task.next_page = task.next_page + 1 if rows else task.page_to + 1
+                    db.commit()
+                    time.sleep(PAGE_PAUSE_SECONDS)
+            except FreshCrawlDue:
+                logger.info(f"Backfill #{task.id}: свежий обход — уступаем на странице {task.next_page}")
+                run.status = "success"
+                return False
+    except Exception as e:
+        db.rollback()
+        run.status = "failed"
+        run.error_message = str(e)[:2000]
+        raise
+    finally:
+        run.finished_at = datetime.utcnow()
+        run.pages_parsed = pages
+        db.commit()
+
+    run.status = "success"
+    task.status = DONE
+    db.commit()
+    logger.info(
+        f"Backfill #{task.id} {task.source} стр. {task.page_from}–{task.page_to}: "
+        f"строк {task.rows_found}, новых {task.rows_new} (run_id={run.id})"
+    )
+    return True
+
+
+def run_pending(pool: DriverPool, limit: Optional[int] = None) -> int:
+    """
+    Проходить окна по порядку, пока они есть, свежий обход не начался и
+    окно не упало. Возвращает число законченных окон.
+    """
+    db = SessionLocal()
+    done = 0
+    try:
+        while limit is None or done < limit:
+            if pool.budget is not None and pool.budget.fresh_due:
+                break
+            task = next_task(db)
+            if task is None:
+                break
+            try:
+                if not run_task(db, task, pool):
+                    break
+                done += 1
+            except Exception as e:
+                db.rollback()
+                task.attempts += 1
+                task.status = FAILED if task.attempts >= BACKFILL_MAX_ATTEMPTS else PENDING
+                task.error_message = str(e)[:2000]
+                db.commit()
+                logger.exception(f"Backfill #{task.id}: ошибка на странице {task.next_page}: {e}")
+                break  # повтор — со следующего запуска, а не подряд по сбоящему сайту
+    finally:
+        db.close()
+    return done
@@ -0,0 +1,270 @@
+"""
+Классификация лотов по категориям → таблица classified_tenders (SQLite).
+
+Схема:
+  - текст лота (lot_name + announce_name) → стеммированные токены
+  - hashing trick: токен → crc32 % N_FEATURES (стабилен между процессами,
+    в отличие от встроенного hash())
+  - центроиды категорий строятся из ключевых слов той же хеш-функцией
+  - оценка = косинус документа с центроидом; X @ W считается без scipy:
+    np.add.at по COO-представлению разреженной матрицы документов
+
+Обработка инкрементальная: tender_id = unique_hash лота, уже
+классифицированные id пропускаются. Чанки считаются в пуле процессов,
+запись — пачками executemany в главном процессе.
+"""
+import os
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Iterable, Optional
+
+import numpy as np
+
+from app.logger import get_logger
+from app.text import tokenize
+
+logger = get_logger("goszakup.classifier")
+
+N_FEATURES = 1 << 18
+FALLBACK_CATEGORY = "Прочее"
+
+CATEGORIES: dict[str, tuple[str, ...]] = {
+    "Строительство": (
+        "строительство", "строительных", "реконструкция", "цемент", "кирпич",
+        "бетон", "арматура", "асфальт", "кровля", "капитальный", "монтаж",
+    ),
+    "Ремонт и обслуживание": (
+        "ремонт", "текущий", "техническое обслуживание", "запасные части",
+        "запчасти", "обслуживание", "сервисное",
+    ),
+    "Медицина": (
+        "лекарственные", "медицинские", "медицинского", "изделия медицинского",
+        "препарат", "реагенты", "шприц", "вакцина", "стоматологические", "лабораторные",
+    ),
+    "Продукты питания": (
+        "продукты питания", "мясо", "молоко", "хлеб", "овощи", "фрукты",
+        "крупа", "сахар", "масло", "питание", "говядина", "курица",
+    ),
+    "ГСМ и топливо": (
+        "бензин", "дизельное топливо", "топливо", "гсм", "горюче смазочные",
+        "уголь", "мазут", "газ", "масло моторное",
+    ),
+    "ИТ и связь": (
+        "компьютер", "ноутбук", "программное обеспечение", "сервер", "принтер",
+        "картридж", "интернет", "связь", "лицензия", "монитор", "сетевое",
+    ),
+    "Транспорт": (
+        "автомобиль", "транспортные услуги", "перевозка", "автобус", "шины",
+        "аренда транспорта", "грузоперевозки",
+    ),
+    "Канцелярия и офис": (
+        "канцелярские", "бумага", "ручка", "папка", "офисная", "бланки",
+        "печатная продукция",
+    ),
+    "Мебель": ("мебель", "стол", "стул", "шкаф", "кресло", "кровать"),
+    "Коммунальные услуги": (
+        "электроэнергия", "теплоснабжение", "водоснабжение", "вывоз мусора",
+        "коммунальные", "канализация", "отопление",
+    ),
+    "Охрана и безопасность": (
+        "охрана", "охранные", "видеонаблюдение", "пожарная", "сигнализация",
+        "безопасности",
+    ),
+    "Обучение и консалтинг": (
+        "обучение", "курсы", "повышение квалификации", "консультационные",
+        "аудит", "семинар", "тренинг",
+    ),
+    "Одежда и текстиль": (
+        "одежда", "форменная", "спецодежда", "обувь", "ткань", "постельное",
+        "белье",
+    ),
+}
+
+CATEGORY_NAMES = tuple(CATEGORIES)
+
+
+def _feature_index(token: str) -> int:
+    return zlib.crc32(token.encode("utf-8")) & (N_FEATURES - 1)
+
+
+def build_centroids() -> np.ndarray:
+    """
+    Матрица W (N_FEATURES × n_categories), столбцы нормированы по L2.
+    Плотная float32 — ~13 МБ, строится один раз на процесс.
+    """
+    weights = np.zeros((N_FEATURES, len(CATEGORY_NAMES)), dtype=np.float32)
+    for col, keywords in enumerate(CATEGORIES.values()):
+        for keyword in keywords:
+            for token in tokenize(keyword):
+                weights[_feature_index(token), col] += 1.0
+    norms = np.linalg.norm(weights, axis=0)
+    norms[norms == 0] = 1.0
+    return weights / norms
+
+
+def _vectorize(texts: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """COO-представление бинарного bag-of-words: (индексы строк, индексы признаков)."""
+    rows: list[int] = []
+    cols: list[int] = []
+    for i, text in enumerate(texts):
+        features = {_feature_index(tok) for tok in tokenize(text)}
+        rows.extend([i] * len(features))
+        cols.extend(features)
+    return np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64)
+
+
+def classify_texts(texts: list[str], weights: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Векторная классификация пачки текстов.
+    Возвращает (индекс категории или -1, уверенность 0..1).
+    """
+    n = len(texts)
+    rows, cols = _vectorize(texts)
+
+    scores = np.zeros((n, weights.shape[1]), dtype=np.float32)
+    if len(rows):
+        np.add.at(scores, rows, weights[cols])
+        # Косинус: длина бинарного вектора документа = sqrt(числа признаков)
+        lengths = np.sqrt(np.bincount(rows, minlength=n)).astype(np.float32)
+        lengths[lengths == 0] = 1.0
+        scores /= lengths[:, None]
+
+    best = scores.argmax(axis=1)
+    best_score = scores[np.arange(n), best]
+    total = scores.sum(axis=1)
+    confidence = np.divide(best_score, total, out=np.zeros(n, dtype=np.float32), where=total > 0)
+
+    best[best_score <= 0] = -1
+    return best, confidence
+
+
+# ---------------------------------------------------------------------------
+# Пул процессов
+# ---------------------------------------------------------------------------
+
+_worker_weights: Optional[np.ndarray] = None
+
+
+def _init_worker():
+    global _worker_weights
+    _worker_weights = build_centroids()
+
+
+def _classify_chunk(chunk: list[tuple[str, str]]) -> list[tuple[str, str, float]]:
+    """Выполняется в воркере: [(tender_id, text)] → [(tender_id, category, confidence)]."""
+    if _worker_weights is None:
+        _init_worker()
+    ids = [tender_id for tender_id, _ in chunk]
+    best, confidence = classify_texts([text for _, text in chunk], _worker_weights)
+    return [
+        (tender_id, CATEGORY_NAMES[idx] if idx >= 0 else FALLBACK_CATEGORY, round(float(conf), 4))
+        for tender_id, idx, conf in zip(ids, best.tolist(), confidence.tolist())
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Чтение / запись
+# ---------------------------------------------------------------------------
+
+def _iter_unclassified(conn, chunk_size: int, limit: int = 0) -> Iterable[list[tuple[str, str]]]:
+    """
+    Keyset-обход lots чанками; из каждого чанка отбрасываем tender_id,
+    которые уже есть в classified_tenders (одним IN-запросом по индексу).
+    """
+    from app.database import SessionLocal
+    from app.models import Lot
+
+    db = SessionLocal()
+    last_id = 0
+    yielded = 0
+    try:
+        while True:
+            rows = (
+                db.query(Lot.id, Lot.unique_hash, Lot.lot_name, Lot.announce_name)
+                .filter(Lot.id > last_id)
+                .order_by(Lot.id)
+                .limit(chunk_size)
+                .all()
+            )
+            if not rows:
+                return
+            last_id = rows[-1].id
+
+            # tender_id — hex-представление unique_hash (TEXT в classified_tenders)
+            ids = [r.unique_hash.hex() for r in rows]
+            placeholders = ",".join("?" * len(ids))
+            done = {
+                r[0] for r in conn.execute(
+                    f"SELECT tender_id FROM classified_tenders WHERE tender_id IN ({placeholders})",
+                    ids,
+                )
+            }
+            chunk = [
+                (tender_id, f"{r.lot_name or ''} {r.announce_name or ''}")
+                for tender_id, r in zip(ids, rows)
+                if tender_id not in done
+            ]
+            if limit:
+                chunk = chunk[: limit - yielded]
+            if chunk:
+                yielded += len(chunk)
+                yield chunk
+            if limit and yielded >= limit:
+                return
+    finally:
+        db.close()
+
+
+def _write_results(conn, results: list[tuple[str, str, float]]) -> None:
+    conn.executemany(
+        "INSERT INTO classified_tenders (tender_id, category, confidence) VALUES (?, ?, ?) "
+        "ON CONFLICT(tender_id) DO UPDATE SET "
+        "category = excluded.category, confidence = excluded.confidence, "
+        "classified_at = CURRENT_TIMESTAMP",
+        results,
+    )
+    conn.commit()
+
+
+def run_classification(chunk_size: int = 5000, workers: int = 0, limit: int = 0) -> int:
+    """
+    Классифицировать все ещё не размеченные лоты. Возвращает число записанных.
+    workers=0 → по числу CPU; workers=1 → без пула (удобно для отладки).
+    """
+    from db.database import get_connection, init_db
+
+    init_db()
+    conn = get_connection()
+    workers = workers or os.cpu_count() or 1
+    written = 0
+
+    logger.info(f"Классификация: chunk_size={chunk_size}, workers={workers}")
+    try:
+        chunks = _iter_unclassified(conn, chunk_size, limit)
+
+        if workers == 1:
+            for chunk in chunks:
+                results = _classify_chunk(chunk)
+                _write_results(conn, results)
+                written += len(results)
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                pending = set()
+                for chunk in chunks:
+                    pending.add(pool.submit(_classify_chunk, chunk))
+                    # Не держим в памяти больше 2 чанков на воркер
+                    if len(pending) >= workers * 2:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for fut in done:
+                            results = fut.result()
+                            _write_results(conn, results)
+                            written += len(results)
+                for fut in pending:
+                    results = fut.result()
+                    _write_results(conn, results)
+                    written += len(results)
+
+        logger.info(f"Классификация завершена: размечено {written} лотов")
+    finally:
+        conn.close()
+    return written
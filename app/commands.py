@@ -0,0 +1,326 @@
+"""
+Короткие сервисные команды CLI (reparse / export / stats).
+
+Работают только с БД — браузер и парсер страниц им не нужны, поэтому
+модуль не импортирует Selenium. Тяжёлые зависимости (SQLAlchemy, модели)
+подгружаются внутри функций, чтобы `python -m app.main --help` стартовал
+мгновенно.
+"""
+import csv
+import json
+import sys
+from datetime import datetime
+
+from app.logger import get_logger
+
+logger = get_logger("goszakup.commands")
+
+EXPORT_COLUMNS = (
+    "id", "unique_hash", "lot_number", "announce_number", "announce_name",
+    "lot_name", "quantity", "status", "purchase_method", "customer_name",
+    "customer_bin", "purchase_amount", "lot_url", "created_at",
+)
+
+
+def _iter_lots(db, query, batch_size: int):
+    """Keyset-пагинация по Lot.id — без OFFSET и без загрузки всей таблицы."""
+    from app.models import Lot
+
+    last_id = 0
+    while True:
+        chunk = (
+            query.filter(Lot.id > last_id)
+            .order_by(Lot.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1].id
+
+
+def _reparse_fields(raw: dict) -> dict:
+    """Заново выводим нормализованные поля из сохранённого raw_data."""
+    from app.parser import _extract_bin, _parse_amount
+
+    customer_name = raw.get("customer_name") or None
+    return {
+        "announce_name": raw.get("announce_name") or None,
+        "customer_name": customer_name,
+        "customer_bin": _extract_bin(customer_name or ""),
+        "quantity": raw.get("quantity") or None,
+        "purchase_amount": _parse_amount(raw.get("amount") or ""),
+        "purchase_method": raw.get("method") or None,
+        "status": raw.get("status") or None,
+    }
+
+
+def cmd_reparse(args) -> int:
+    """
+    Пересчитываем нормализованные колонки из raw_data без обращения к сайту.
+    Нужно после исправлений в _parse_amount / _extract_bin и т.п.
+    """
+    from sqlalchemy import update
+
+    from app import active_lots
+    from app.database import SessionLocal
+    from app.models import Lot
+    from app.rollups import RollupDeltas, state
+
+    db = SessionLocal()
+    checked = 0
+    changed = 0
+    try:
+        query = db.query(
+            Lot.id, Lot.raw_data, Lot.announce_name, Lot.customer_name,
+            Lot.customer_bin, Lot.quantity, Lot.purchase_amount,
+            Lot.purchase_method, Lot.status, Lot.created_at,
+        ).filter(Lot.raw_data.isnot(None))
+
+        for chunk in _iter_lots(db, query, args.batch_size):
+            updates = []
+            deltas = RollupDeltas()
+            for row in chunk:
+                checked += 1
+                try:
+                    raw = json.loads(row.raw_data)
+                except ValueError:
+                    continue
+                fields = _reparse_fields(raw)
+                current = {k: getattr(row, k) for k in fields}
+                if current["purchase_amount"] is not None:
+                    current["purchase_amount"] = float(current["purchase_amount"])
+                if fields != current:
+                    updates.append({"id": row.id, **fields})
+                    before = state(row)
+                    deltas.move(before, {**before, **{k: v for k, v in fields.items() if k in before}})
+
+            if updates and not args.dry_run:
+                db.execute(update(Lot), updates)
+                active_lots.refresh(db, [u["id"] for u in updates])
+                deltas.apply(db)
+                db.commit()
+            changed += len(updates)
+
+        logger.info(
+            f"Reparse завершён: проверено={checked} | изменено={changed}"
+            + (" (dry-run)" if args.dry_run else "")
+        )
+    finally:
+        db.close()
+    return 0
+
+
+def cmd_export(args) -> int:
+    """Выгрузка лотов в JSONL или CSV (stdout или файл)."""
+    from app.database import SessionLocal
+    from app.models import ActiveLot, Lot
+
+    out = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    db = SessionLocal()
+    exported = 0
+    try:
+        query = db.query(*(getattr(Lot, c) for c in EXPORT_COLUMNS))
+        if args.active:
+            # Только живые лоты: проход идёт по узкой active_lots
+            query = query.join(ActiveLot, ActiveLot.lot_id == Lot.id)
+        if args.since:
+            query = query.filter(Lot.created_at >= datetime.fromisoformat(args.since))
+        if args.status:
+            query = query.filter(Lot.status == args.status)
+
+        writer = None
+        if args.format == "csv":
+            writer = csv.writer(out)
+            writer.writerow(EXPORT_COLUMNS)
+
+        for chunk in _iter_lots(db, query, args.batch_size):
+            for row in chunk:
+                values = [
+                    v.isoformat() if isinstance(v, datetime)
+                    else v.hex() if isinstance(v, bytes)
+                    else float(v) if c == "purchase_amount" and v is not None
+                    else v
+                    for c, v in zip(EXPORT_COLUMNS, row)
+                ]
+                if writer is not None:
+                    writer.writerow(values)
+                else:
+                    out.write(json.dumps(dict(zip(EXPORT_COLUMNS, values)), ensure_ascii=False))
+                    out.write("\n")
+                exported += 1
+    finally:
+        db.close()
+        if out is not sys.stdout:
+            out.close()
+
+    logger.info(f"Экспортировано лотов: {exported}")
+    return 0
+
+
+def cmd_stats(args) -> int:
+    """Короткая сводка: объём таблицы, статусы, последние запуски."""
+    from sqlalchemy import func
+
+    from app.database import SessionLocal
+    from app.models import ActiveLot, Announcement, Lot, LotDailyRollup, ParseRun
+
+    db = SessionLocal()
+    try:
+        total = db.query(func.count(Lot.id)).scalar()
+        active = db.query(func.count(ActiveLot.lot_id)).scalar()
+        announcements = db.query(func.count(Announcement.id)).scalar()
+        print(f"Всего лотов: {total} (приём заявок: {active}), объявлений: {announcements}")
+
+        # По суточным агрегатам, а не GROUP BY по всей lots
+        print("\nПо статусам:")
+        lot_count = func.sum(LotDailyRollup.lot_count)
+        by_status = (
+            db.query(LotDailyRollup.status, lot_count)
+            .group_by(LotDailyRollup.status)
+            .having(lot_count > 0)
+            .order_by(lot_count.desc())
+            .limit(20)
+            .all()
+        )
+        for status, count in by_status:
+            print(f"  {count:>10}  {status or '—'}")
+
+        print(f"\nПоследние запуски ({args.runs}):")
+        runs = db.query(ParseRun).order_by(ParseRun.id.desc()).limit(args.runs).all()
+        for run in runs:
+            print(
+                f"  #{run.id} {run.started_at:%Y-%m-%d %H:%M} {run.source:<13} {run.status:<8} "
+                f"найдено={run.lots_found or 0} новых={run.lots_new or 0}"
+            )
+    finally:
+        db.close()
+    return 0
+
+
+def cmd_watchlist(args) -> int:
+    """Сохранённые поиски: add / list / rematch."""
+    from app.database import SessionLocal
+    from app.models import SavedSearch, WatchlistMatch
+
+    if args.action == "add" and not args.name:
+        logger.error("watchlist add: нужно --name")
+        return 2
+
+    db = SessionLocal()
+    try:
+        if args.action == "add":
+            search = SavedSearch(
+                name=args.name,
+                owner=args.owner,
+                keywords="\n".join(args.keyword) or None,
+                customer_bins=" ".join(args.bin) or None,
+                amount_min=args.min_amount,
+                amount_max=args.max_amount,
+            )
+            db.add(search)
+            db.commit()
+            logger.info(f"Сохранённый поиск #{search.id} «{search.name}» добавлен")
+
+        elif args.action == "list":
+            from sqlalchemy import func
+
+            counts = dict(
+                db.query(WatchlistMatch.search_id, func.count()).group_by(WatchlistMatch.search_id).all()
+            )
+            for s in db.query(SavedSearch).order_by(SavedSearch.id):
+                keywords = ", ".join((s.keywords or "").splitlines())
+                print(
+                    f"  #{s.id} {'+' if s.active else '-'} {s.name} | слова: {keywords or '—'} | "
+                    f"БИН: {s.customer_bins or '—'} | сумма: {s.amount_min or '—'}..{s.amount_max or '—'} | "
+                    f"совпадений: {counts.get(s.id, 0)}"
+                )
+
+        else:
+            from app.watchlist import rematch
+
+            rematch(db, datetime.fromisoformat(args.since) if args.since else None, args.batch_size)
+    finally:
+        db.close()
+    return 0
+
+
+def cmd_partitions(args) -> int:
+    """Помесячные партиции lots: list / ensure / archive / drop / explain (MySQL)."""
+    from datetime import date, timedelta
+
+    from app import partitions
+    from app.database import engine
+
+    if engine.dialect.name != "mysql":
+        logger.info(f"Партиционирование поддерживается только в MySQL (сейчас {engine.dialect.name})")
+        return 0
+
+    today = date.today()
+    with engine.begin() as conn:
+        if args.action == "list":
+            for p in partitions.list_partitions(conn):
+                upper = f"< {p.upper}" if p.upper else "MAXVALUE"
+                print(f"  {p.name:<10} {upper:<14} ~{p.rows} строк")
+        elif args.action == "ensure":
+            partitions.ensure(conn, today, args.ahead)
+        elif args.action in ("archive", "drop"):
+            if args.retention_months <= 0:
+                logger.error("Нужно --retention-months > 0 (или LOTS_RETENTION_MONTHS)")
+                return 2
+            done = partitions.archive(conn, today, args.retention_months, keep_archive=args.action == "archive")
+            logger.info(f"Вынесено партиций: {len(done)} {done}")
+        else:
+            since = date.fromisoformat(args.since) if args.since else today - timedelta(days=1)
+            for label, used in partitions.explain(conn, since, partitions.add_months(since, 1)).items():
+                print(f"  {label:<20} партиций: {len(used)}  {','.join(used)}")
+    return 0
+
+
+def cmd_backfill(args) -> int:
+    """Backfill истории: plan / list / run (app/backfill.py)."""
+    from app import backfill
+    from app.database import SessionLocal
+    from app.models import BackfillTask
+
+    if args.action == "run":
+        from app.config import REQUESTS_PER_MINUTE
+        from app.sources.budget import RateBudget
+        from app.sources.pool import DriverPool
+
+        pool = DriverPool(1, RateBudget(REQUESTS_PER_MINUTE))
+        try:
+            done = backfill.run_pending(pool, limit=args.limit or None)
+        finally:
+            pool.close()
+        logger.info(f"Backfill: окон пройдено: {done}")
+        return 0
+
+    db = SessionLocal()
+    try:
+        if args.action == "plan":
+            if not args.pages:
+                logger.error("backfill plan: нужно --pages, например 1-200")
+                return 2
+            first, _, last = args.pages.partition("-")
+            try:
+                tasks = backfill.plan(
+                    db, args.source, int(first), int(last or first), args.window, args.query,
+                )
+            except ValueError as e:
+                logger.error(f"backfill plan: {e}")
+                return 2
+            logger.info(f"Backfill {args.source}: запланировано окон: {len(tasks)}")
+
+        else:
+            for t in db.query(BackfillTask).order_by(BackfillTask.id):
+                print(
+                    f"  #{t.id} {t.source:<13} {t.status:<8} стр. {t.page_from}–{t.page_to} "
+                    f"(дальше {t.next_page}) строк={t.rows_found} новых={t.rows_new}"
+                    + (f" | {t.query}" if t.query else "")
+                    + (f" | попыток {t.attempts}: {t.error_message}" if t.error_message else "")
+                )
+    finally:
+        db.close()
+    return 0
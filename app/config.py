@@ -9,7 +9,9 @@ DB_USER = os.getenv("DB_USER", "root")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "")
 DB_NAME = os.getenv("DB_NAME", "goszakup")
 
-DATABASE_URL = (
+# DATABASE_URL целиком переопределяет DB_* — например, sqlite:///goszakup.db
+# для однопроцессных/edge-развёртываний и локальных тестов
+DATABASE_URL = os.getenv("DATABASE_URL") or (
     f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
     "?charset=utf8mb4"
 )
@@ -17,7 +19,78 @@ DATABASE_URL = (
 PARSE_INTERVAL_HOURS = int(os.getenv("PARSE_INTERVAL_HOURS", "3"))
 HEADLESS = os.getenv("HEADLESS", "true").lower() == "true"
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()  # файл logs/parser.log: json / text
+LOG_CONSOLE_FORMAT = os.getenv("LOG_CONSOLE_FORMAT", "text").lower()
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(20 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "10"))  # архивов parser.log.N.gz
 PAGE_LOAD_TIMEOUT = int(os.getenv("PAGE_LOAD_TIMEOUT", "30"))
 MAX_PAGES = int(os.getenv("MAX_PAGES", "0"))  # 0 = все страницы
+BATCH_SIZE = int(os.getenv("BATCH_SIZE", "500"))  # лотов на один bulk-insert
+PAGE_CACHE = os.getenv("PAGE_CACHE", "true").lower() == "true"  # пропуск неизменных страниц
+# Раз в столько часов обход идёт без кеша страниц — для поиска пропавших лотов
+FULL_SWEEP_HOURS = int(os.getenv("FULL_SWEEP_HOURS", "24"))
 
-BASE_URL = "https://www.goszakup.gov.kz/ru/search/lots"
+# Статусы, после которых лот уходит из active_lots (через запятую)
+FINAL_STATUSES = tuple(
+    s.strip() for s in os.getenv(
+        "FINAL_STATUSES",
+        "Завершено,Отменено,Отменен,Не состоялось,Закупка не состоялась,Итоги опубликованы",
+    ).split(",") if s.strip()
+)
+
+# Помесячные партиции lots (MySQL, app/partitions.py)
+PARTITIONS_AHEAD = int(os.getenv("PARTITIONS_AHEAD", "3"))  # месяцев вперёд
+LOTS_RETENTION_MONTHS = int(os.getenv("LOTS_RETENTION_MONTHS", "0"))  # 0 = хранить всё
+
+# Адаптивное расписание: проба 1-й страницы + интервал по темпу новых лотов
+ADAPTIVE_SCHEDULING = os.getenv("ADAPTIVE_SCHEDULING", "true").lower() == "true"
+PROBE_HEAD_SIZE = int(os.getenv("PROBE_HEAD_SIZE", "10"))
+MIN_INTERVAL_MINUTES = int(os.getenv("MIN_INTERVAL_MINUTES", "20"))
+MAX_INTERVAL_MINUTES = int(os.getenv("MAX_INTERVAL_MINUTES", str(PARSE_INTERVAL_HOURS * 60)))
+TARGET_NEW_LOTS_PER_RUN = int(os.getenv("TARGET_NEW_LOTS_PER_RUN", "300"))
+
+# BASE_URL переопределяется для нагрузочных прогонов против mock-сервера
+# (scripts/mock_registry.py, scripts/load_test.py)
+BASE_URL = os.getenv("BASE_URL", "https://www.goszakup.gov.kz/ru/search/lots")
+RENDER_WAIT_SECONDS = float(os.getenv("RENDER_WAIT_SECONDS", "2"))  # после появления таблицы
+PAGE_PAUSE_SECONDS = float(os.getenv("PAGE_PAUSE_SECONDS", "1.5"))  # между страницами
+# Раз в столько страниц обход перечитывает предыдущую — ловит сдвиг реестра
+# вверх (app/drift.py); 0 — только при замеченном сдвиге или падении счётчика
+DRIFT_VERIFY_PAGES = int(os.getenv("DRIFT_VERIFY_PAGES", "10"))
+
+# Реестры-источники (app/sources): какие обходит планировщик, общий
+# пул браузеров и общий бюджет загрузок страниц на все источники
+SOURCES = tuple(s.strip() for s in os.getenv("SOURCES", "lots").split(",") if s.strip())
+SOURCE_INTERVAL_HOURS = int(os.getenv("SOURCE_INTERVAL_HOURS", "24"))  # для всех, кроме lots
+DRIVER_POOL_SIZE = int(os.getenv("DRIVER_POOL_SIZE", "1"))  # процессов Chrome на все источники
+REQUESTS_PER_MINUTE = float(os.getenv("REQUESTS_PER_MINUTE", "30"))  # 0 = без ограничения
+# Backfill истории (app/backfill.py): окна по BACKFILL_WINDOW_PAGES страниц,
+# фоновая задача раз в BACKFILL_INTERVAL_MINUTES; уступает свежим обходам
+BACKFILL_WINDOW_PAGES = int(os.getenv("BACKFILL_WINDOW_PAGES", "10"))
+BACKFILL_INTERVAL_MINUTES = int(os.getenv("BACKFILL_INTERVAL_MINUTES", "15"))
+BACKFILL_MAX_ATTEMPTS = int(os.getenv("BACKFILL_MAX_ATTEMPTS", "3"))
+ANNOUNCEMENTS_URL = os.getenv("ANNOUNCEMENTS_URL", "https://www.goszakup.gov.kz/ru/search/announce")
+CONTRACTS_URL = os.getenv("CONTRACTS_URL", "https://www.goszakup.gov.kz/ru/egzcontract/cpublic")
+
+# Перехват JSON-ответа с лотами через DevTools вместо разбора DOM
+CAPTURE_NETWORK = os.getenv("CAPTURE_NETWORK", "false").lower() == "true"
+CAPTURE_URL_PATTERN = os.getenv("CAPTURE_URL_PATTERN", r"/search/lots/data|/api/.*lots")
+
+# Профилирование запусков (app/profiling.py): "" — выключено, cprofile / sampling
+PROFILE = os.getenv("PROFILE", "").lower()
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_SAMPLE_MS = float(os.getenv("PROFILE_SAMPLE_MS", "5"))
+PROFILE_TOP_ALLOCATORS = int(os.getenv("PROFILE_TOP_ALLOCATORS", "25"))
+PROFILE_SNAPSHOT_PAGES = int(os.getenv("PROFILE_SNAPSHOT_PAGES", "10"))  # снимок tracemalloc раз в N страниц
+
+# Outbox / change feed
+OUTBOX_SINK = os.getenv("OUTBOX_SINK", "")  # "" = диспетчер не запускается; webhook / jsonl / queue
+OUTBOX_WEBHOOK_URL = os.getenv("OUTBOX_WEBHOOK_URL", "")
+OUTBOX_FILE = os.getenv("OUTBOX_FILE", "outbox.jsonl")
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "500"))
+OUTBOX_DISPATCH_SECONDS = int(os.getenv("OUTBOX_DISPATCH_SECONDS", "30"))
+OUTBOX_RETENTION_DAYS = int(os.getenv("OUTBOX_RETENTION_DAYS", "7"))
+# Сколько ждать событие из дырки в id (транзакция ещё не зафиксирована), с
+OUTBOX_GAP_SECONDS = int(os.getenv("OUTBOX_GAP_SECONDS", "3600"))
+# Сколько дырок в id помнит потребитель (ограничивает outbox_offsets.gaps и IN-запрос)
+OUTBOX_MAX_GAPS = int(os.getenv("OUTBOX_MAX_GAPS", "1000"))
@@ -1,13 +1,37 @@
-from sqlalchemy import create_engine
+from sqlalchemy import BINARY, BigInteger, Integer, LargeBinary, create_engine, event, func
+from sqlalchemy.dialects import mysql, sqlite
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from app.config import DATABASE_URL
+from db.database import apply_sqlite_pragmas
 
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=3600,
-    echo=False,
-)
+# В SQLite автоинкремент работает только у INTEGER PRIMARY KEY (rowid)
+BigIntPK = BigInteger().with_variant(Integer, "sqlite")
+
+# SHA256-дайджест: BINARY(32) в MySQL (ключ индекса 32 байта против 256
+# у VARCHAR(64) utf8mb4), BLOB в SQLite
+HashKey = BINARY(32).with_variant(LargeBinary(32), "sqlite")
+
+
+def make_engine(url: str):
+    """Движок под MySQL или SQLite (WAL + pragmas на каждом соединении)."""
+    if url.startswith("sqlite"):
+        eng = create_engine(
+            url,
+            connect_args={"check_same_thread": False, "timeout": 30},
+            echo=False,
+        )
+        event.listen(eng, "connect", lambda dbapi_conn, _: apply_sqlite_pragmas(dbapi_conn))
+        return eng
+
+    return create_engine(
+        url,
+        pool_pre_ping=True,
+        pool_recycle=3600,
+        echo=False,
+    )
+
+
+engine = make_engine(DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -22,3 +46,33 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def insert_ignore(table, dialect_name: str):
+    """INSERT, молча пропускающий конфликты уникальных ключей (для executemany)."""
+    if dialect_name == "sqlite":
+        return sqlite.insert(table).on_conflict_do_nothing()
+    if dialect_name == "mysql":
+        return mysql.insert(table).prefix_with("IGNORE")
+    return table.insert()
+
+
+def upsert_increment(
+    table, dialect_name: str, keys: tuple[str, ...], counters: tuple[str, ...], fill: tuple[str, ...] = (),
+):
+    """
+    INSERT, который при конфликте ключа прибавляет counters к существующей
+    строке (для executemany дельт агрегатов). Колонки fill при конфликте
+    заполняются, только если в строке они ещё NULL.
+    """
+    if dialect_name == "sqlite":
+        stmt = sqlite.insert(table)
+        set_ = {c: table.c[c] + stmt.excluded[c] for c in counters}
+        set_.update({c: func.coalesce(table.c[c], stmt.excluded[c]) for c in fill})
+        return stmt.on_conflict_do_update(index_elements=list(keys), set_=set_)
+    if dialect_name == "mysql":
+        stmt = mysql.insert(table)
+        set_ = {c: table.c[c] + stmt.inserted[c] for c in counters}
+        set_.update({c: func.coalesce(table.c[c], stmt.inserted[c]) for c in fill})
+        return stmt.on_duplicate_key_update(set_)
+    raise NotImplementedError(f"upsert_increment: диалект {dialect_name} не поддерживается")
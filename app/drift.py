@@ -0,0 +1,127 @@
+"""
+Дрейф пагинации во время обхода.
+
+Реестр отдаётся от новых к старым, а обход страниц ?page=N занимает
+минуты. Если за это время появились новые лоты, строки сдвигаются вниз:
+начало страницы N+1 повторяет хвост страницы N (дубли). Если лоты
+исчезли, строки сдвигаются вверх: начало старой страницы N+1 уезжает в
+хвост уже пройденной N и не попадает в обход (пропуски).
+
+DriftTracker:
+  - отбрасывает уже отданные в этом запуске лоты (по unique_hash) ещё до
+    БД и считает дубли; совпадение начала страницы с хвостом предыдущей —
+    признак сдвига вниз;
+  - сдвиг вверх виден только при повторном чтении: парсер перечитывает
+    предыдущую страницу, и по пересечению хешей с её первым чтением
+    трекер находит, на сколько строк она уехала вверх, а её новые строки
+    засчитывает как восстановленные. Перечитывание — когда на странице
+    замечен сдвиг вниз (реестр меняется прямо сейчас), раз в
+    DRIFT_VERIFY_PAGES страниц и когда уменьшился счётчик «из Z записей».
+    Счётчик — только дополнительный сигнал: на выдаче больше окна сайта он
+    застывает на пределе; что по нему восстановить не удалось, учитывается
+    как оценка пропусков.
+
+Счётчики попадают в run_info и parse_runs: drift_duplicates,
+drift_recovered, drift_skipped.
+"""
+from typing import Optional
+
+
+class DriftTracker:
+    def __init__(self, total: Optional[int] = None):
+        self.seen: set[bytes] = set()
+        self.total = total                  # последний известный счётчик записей
+        self.prev_tail: list[bytes] = []    # хеши предыдущей разобранной страницы
+        self.refetch_base: list[bytes] = [] # хеши страницы перед ней — для перечитывания
+        self.overlap = 0                    # сдвиг вниз на последней странице
+        self.duplicates = 0                 # дубли, отброшенные до БД
+        self.recovered = 0                  # строки, найденные перечитыванием
+        self.skipped = 0                    # оценка невосстановленных пропусков
+        self.shifted_pages = 0              # страниц, на которых заметили сдвиг
+        self._pending_skip = 0              # сдвиг вверх, ждущий перечитывания
+
+    @property
+    def drifted(self) -> bool:
+        return self.shifted_pages > 0
+
+    def accept(self, rows: list[dict]) -> list[dict]:
+        """
+        Строки очередной страницы → только ещё не виденные в этом запуске.
+        Сдвиг вниз = сколько первых строк страницы повторяют предыдущую.
+        """
+        hashes = [row["unique_hash"] for row in rows]
+        prev = set(self.prev_tail)
+        overlap = 0
+        for h in hashes:
+            if h not in prev:
+                break
+            overlap += 1
+        if overlap:
+            self.shifted_pages += 1
+        self.overlap = overlap
+
+        fresh = []
+        for row, h in zip(rows, hashes):
+            if h in self.seen:
+                self.duplicates += 1
+                continue
+            self.seen.add(h)
+            fresh.append(row)
+        self.refetch_base, self.prev_tail = self.prev_tail, hashes
+        return fresh
+
+    def skip_page(self) -> None:
+        """Страница пропущена (кеш, ошибка) — сравнивать границу не с чем."""
+        self.refetch_base, self.prev_tail = self.prev_tail, []
+        self.overlap = 0
+
+    def check_total(self, total: Optional[int]) -> int:
+        """
+        Новый счётчик записей. Возвращает, на сколько строк реестр сдвинулся
+        вверх (столько строк могло уехать на уже пройденную страницу) — 0,
+        если перечитывать нечего.
+        """
+        if total is None:
+            return 0
+        previous, self.total = self.total, total
+        if previous is None or total >= previous:
+            return 0
+        shift = previous - total
+        self.shifted_pages += 1
+        self._pending_skip += shift
+        return shift
+
+    def accept_refetch(self, rows: list[dict]) -> list[dict]:
+        """
+        Перечитанная предыдущая страница: новые строки в её хвосте —
+        восстановленные пропуски (новые лоты сверху достанутся следующему
+        запуску). Если она начинается с i-й строки своего первого чтения,
+        реестр сдвинулся вверх на i строк.
+        """
+        hashes = [row["unique_hash"] for row in rows]
+        if not self._pending_skip and hashes and hashes[0] in self.refetch_base[1:]:
+            self.shifted_pages += 1             # по счётчику страница уже засчитана
+        known = [i for i, h in enumerate(hashes) if h in self.seen]
+        tail = known[-1] + 1 if known else 0
+        fresh = []
+        for row, h in zip(rows[tail:], hashes[tail:]):
+            if h not in self.seen:
+                self.seen.add(h)
+                fresh.append(row)
+        self.recovered += len(fresh)
+        self.skipped += max(self._pending_skip - len(fresh), 0)
+        self._pending_skip = 0
+        return fresh
+
+    def finish(self) -> None:
+        """Сдвиги, которые не удалось перечитать, — пропуски."""
+        self.skipped += self._pending_skip
+        self._pending_skip = 0
+
+    def summary(self) -> dict:
+        return {
+            "drift_duplicates": self.duplicates,
+            "drift_recovered": self.recovered,
+            "drift_skipped": self.skipped,
+            "drift_pages": self.shifted_pages,
+        }
@@ -1,34 +1,197 @@
+"""
+Логирование без блокировок в потоке обхода.
+
+Все логгеры пишут в один QueueHandler (SimpleQueue.put — без I/O и без
+форматирования), а QueueListener в отдельном потоке форматирует записи
+и раздаёт их синкам:
+  - консоль — текст (LOG_CONSOLE_FORMAT=json для сборщиков логов);
+  - logs/parser.log — JSON-строки (LOG_FORMAT), ротация по размеру
+    (LOG_MAX_BYTES × LOG_BACKUP_COUNT) со сжатием архивов в .gz.
+
+Контекст запуска (run_id, page, …) задаётся log_context / set_log_context
+и попадает в каждую запись; произвольные поля — через extra=, например
+logger.info("...", extra={"timings": {"load_s": 1.2}}).
+"""
+import atexit
+import contextvars
+import gzip
+import json
 import logging
+import logging.handlers
 import os
-from datetime import datetime
-from app.config import LOG_LEVEL
+import queue
+import shutil
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.config import LOG_BACKUP_COUNT, LOG_CONSOLE_FORMAT, LOG_FORMAT, LOG_LEVEL, LOG_MAX_BYTES
 
 LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "logs")
-os.makedirs(LOG_DIR, exist_ok=True)
 
-LOG_FILE = os.path.join(LOG_DIR, f"parser_{datetime.now().strftime('%Y%m')}.log")
+LOG_FILE = os.path.join(LOG_DIR, "parser.log")
 
+_context: contextvars.ContextVar[dict] = contextvars.ContextVar("log_context", default={})
 
-def get_logger(name: str = "goszakup") -> logging.Logger:
-    logger = logging.getLogger(name)
-    if logger.handlers:
-        return logger
+# Атрибуты, которые есть у любой LogRecord — всё остальное пришло через extra=
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "ctx"}
 
-    logger.setLevel(getattr(logging, LOG_LEVEL.upper(), logging.INFO))
 
-    fmt = logging.Formatter(
-        "%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
+# ---------------------------------------------------------------------------
+# Контекст
+# ---------------------------------------------------------------------------
+
+def set_log_context(**fields) -> contextvars.Token:
+    """Добавить поля в контекст текущего потока/задачи (None — убрать поле)."""
+    ctx = {**_context.get(), **fields}
+    return _context.set({k: v for k, v in ctx.items() if v is not None})
+
+
+def reset_log_context(token: contextvars.Token) -> None:
+    _context.reset(token)
+
+
+@contextmanager
+def log_context(**fields):
+    token = set_log_context(**fields)
+    try:
+        yield
+    finally:
+        reset_log_context(token)
+
+
+# ---------------------------------------------------------------------------
+# Форматтеры и обработчики
+# ---------------------------------------------------------------------------
+
+def _extra(record: logging.LogRecord) -> dict:
+    return {k: v for k, v in vars(record).items() if k not in _RECORD_ATTRS}
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна запись — одна JSON-строка: время, уровень, логгер, сообщение, контекст, extra."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            **getattr(record, "ctx", {}),
+            **_extra(record),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Прежний человекочитаемый формат + контекст в квадратных скобках."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s [%(levelname)s] %(name)s: %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        ctx = getattr(record, "ctx", None)
+        if ctx:
+            line += " [" + " ".join(f"{k}={v}" for k, v in ctx.items()) + "]"
+        return line
+
+
+class ContextQueueHandler(logging.handlers.QueueHandler):
+    """
+    Кладёт запись в очередь как есть, добавив только снимок контекста.
+    Форматирование (getMessage, traceback, JSON) — в потоке слушателя.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.ctx = _context.get()
+        return record
+
+
+def _gzip_namer(name: str) -> str:
+    return name + ".gz"
+
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+
+def make_file_handler(path: str, max_bytes: int = LOG_MAX_BYTES,
+                      backup_count: int = LOG_BACKUP_COUNT) -> logging.Handler:
+    """Ротация по размеру; архивы parser.log.N.gz (сжатие — в потоке слушателя)."""
+    handler = logging.handlers.RotatingFileHandler(
+        path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8",
     )
+    handler.namer = _gzip_namer
+    handler.rotator = _gzip_rotator
+    return handler
+
+
+def _formatter(kind: str) -> logging.Formatter:
+    return JsonFormatter() if kind == "json" else TextFormatter()
+
+
+# ---------------------------------------------------------------------------
+# Общая очередь и слушатель
+# ---------------------------------------------------------------------------
+
+_queue: queue.SimpleQueue = queue.SimpleQueue()
+_queue_handler = ContextQueueHandler(_queue)
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _start_listener() -> None:
+    global _listener
+    if _listener is not None:
+        return
+
+    console = logging.StreamHandler()
+    console.setFormatter(_formatter(LOG_CONSOLE_FORMAT))
 
-    # Консоль
-    ch = logging.StreamHandler()
-    ch.setFormatter(fmt)
-    logger.addHandler(ch)
+    # Каталог создаём только при первом логгере, а не на импорте
+    os.makedirs(LOG_DIR, exist_ok=True)
+    file_handler = make_file_handler(LOG_FILE)
+    file_handler.setFormatter(_formatter(LOG_FORMAT))
 
-    # Файл
-    fh = logging.FileHandler(LOG_FILE, encoding="utf-8")
-    fh.setFormatter(fmt)
-    logger.addHandler(fh)
+    _listener = logging.handlers.QueueListener(_queue, console, file_handler)
+    _listener.start()
 
+
+def stop_logging() -> None:
+    """Дописать очередь и остановить поток слушателя (вызывается и в atexit)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def _after_fork_in_child() -> None:
+    # Поток слушателя в дочерний процесс не переходит — своя очередь и свой поток
+    global _queue, _listener
+    _queue = queue.SimpleQueue()
+    _queue_handler.queue = _queue
+    if _listener is not None:
+        _listener = None
+        _start_listener()
+
+
+atexit.register(stop_logging)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def get_logger(name: str = "goszakup") -> logging.Logger:
+    logger = logging.getLogger(name)
+    if logger.handlers:
+        return logger
+
+    logger.setLevel(getattr(logging, LOG_LEVEL.upper(), logging.INFO))
+    _start_listener()
+    logger.addHandler(_queue_handler)
     return logger
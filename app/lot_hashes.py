@@ -0,0 +1,44 @@
+"""
+Глобальная уникальность unique_hash.
+
+На MySQL lots партиционирована по created_at, и её уникальные ключи
+обязаны содержать created_at: uq_lot_hash = (unique_hash, created_at) уже
+не мешает двум писателям вставить один и тот же лот. Арбитр — узкая
+непартиционированная lot_hashes (unique_hash PK → lot_id).
+
+save_batch в своей транзакции:
+  claim() — INSERT IGNORE хешей новых лотов с lot_id = NULL. Конкурирующую
+            незафиксированную вставку того же хеша InnoDB заставляет ждать,
+            после её commit-а строка уже занята. Свои — ровно те строки,
+            что видны этой транзакции с lot_id IS NULL: чужие всегда
+            фиксируются с проставленным lot_id;
+  bind()  — после INSERT в lots проставить lot_id занятым хешам.
+
+Лот вставляется в lots, только если его хеш занят этой транзакцией.
+"""
+from typing import Collection
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.database import insert_ignore
+from app.models import LotHash
+
+
+def claim(db: Session, hashes: Collection[bytes]) -> set[bytes]:
+    """Занять хеши (без commit). Возвращает те, что заняла эта транзакция."""
+    if not hashes:
+        return set()
+    db.execute(
+        insert_ignore(LotHash.__table__, db.get_bind().dialect.name),
+        [{"unique_hash": h, "lot_id": None} for h in hashes],
+    )
+    return set(db.execute(
+        select(LotHash.unique_hash).where(LotHash.unique_hash.in_(hashes), LotHash.lot_id.is_(None))
+    ).scalars())
+
+
+def bind(db: Session, ids: dict[bytes, int]) -> None:
+    """Проставить lot_id занятым хешам (без commit)."""
+    if ids:
+        db.execute(update(LotHash), [{"unique_hash": h, "lot_id": lot_id} for h, lot_id in ids.items()])
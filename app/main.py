@@ -2,18 +2,41 @@
 Точка входа микросервиса.
 
 Запуск:
-  python -m app.main            # планировщик (каждые 3 часа)
-  python -m app.main --run-once # однократный запуск
+  python -m app.main                  # планировщик (каждые 3 часа)
+  python -m app.main --run-once       # однократный запуск (= crawl --once)
+  python -m app.main crawl [--once]   # обход реестра
+  python -m app.main crawl --once --source contracts  # другой реестр (app/sources)
+  python -m app.main reparse          # пересчёт полей из raw_data, без браузера
+  python -m app.main export           # выгрузка лотов в JSONL/CSV
+  python -m app.main stats            # сводка по БД
+  python -m app.main classify         # разметка категорий → classified_tenders
+  python -m app.main near-dups        # MinHash-индекс почти-дублей по всей таблице
+  python -m app.main price-scores     # полный пересчёт ценовых аномалий
+  python -m app.main dispatch         # доставка outbox-событий (change feed)
+  python -m app.main watchlist add|list|rematch  # сохранённые поиски покупателей
+  python -m app.main active-lots      # пересобрать горячую таблицу active_lots
+  python -m app.main rollups          # пересчитать суточные агрегаты для дашбордов
+  python -m app.main announcements    # пересобрать таблицу объявлений
+  python -m app.main partitions list|ensure|archive|drop|explain  # партиции lots (MySQL)
+  python -m app.main backfill plan --source contracts --pages 1-200  # окна истории
+  python -m app.main backfill list|run  # состояние окон / пройти их без планировщика
+
+Каждая подкоманда импортирует только то, что ей нужно: Selenium
+подгружается лишь при обходе, APScheduler — лишь в режиме планировщика.
 """
 
+import argparse
+import atexit
 import sys
 import signal
-from apscheduler.schedulers.blocking import BlockingScheduler
-from apscheduler.events import EVENT_JOB_ERROR, EVENT_JOB_EXECUTED
+from datetime import datetime, timezone
 
-from app.config import PARSE_INTERVAL_HOURS
+from app.config import (
+    ADAPTIVE_SCHEDULING, BACKFILL_INTERVAL_MINUTES, BACKFILL_WINDOW_PAGES, DRIVER_POOL_SIZE,
+    LOTS_RETENTION_MONTHS, OUTBOX_DISPATCH_SECONDS, OUTBOX_SINK, PARSE_INTERVAL_HOURS, PARTITIONS_AHEAD,
+    REQUESTS_PER_MINUTE, SOURCE_INTERVAL_HOURS, SOURCES,
+)
 from app.logger import get_logger
-from app.service import run_parse_job
 
 logger = get_logger("goszakup.main")
 
@@ -30,39 +53,403 @@ def handle_shutdown(sig, frame):
     sys.exit(0)
 
 
+def dispatch_outbox_job():
+    """Доставка change feed потребителю по умолчанию + очистка старых событий."""
+    from app.database import SessionLocal
+    from app.outbox import dispatch_pending, make_sink, prune
+
+    db = SessionLocal()
+    try:
+        sent = dispatch_pending(db, "default", make_sink())
+        if sent:
+            logger.info(f"Outbox: доставлено событий: {sent}")
+        prune(db)
+    finally:
+        db.close()
+
+
+def maintain_partitions_job():
+    """Будущие партиции lots заранее + архивирование вышедших из окна хранения."""
+    from datetime import date
+
+    from app import partitions
+    from app.database import engine
+
+    with engine.begin() as conn:
+        partitions.ensure(conn, date.today(), PARTITIONS_AHEAD)
+        if LOTS_RETENTION_MONTHS > 0:
+            partitions.archive(conn, date.today(), LOTS_RETENTION_MONTHS)
+
+
+def adaptive_crawl_job(scheduler, pool=None):
+    """Проба → обход при изменениях → перепланирование под темп новых лотов."""
+    from app.adaptive import run_adaptive_cycle
+
+    interval = run_adaptive_cycle(pool)
+    scheduler.reschedule_job("parse_lots", trigger="interval", minutes=interval)
+
+
+def crawl_source_job(name: str, pool=None):
+    """Обход реестра-источника (кроме lots) через общий пул браузеров."""
+    from app.sources import get_source
+
+    get_source(name).run(pool)
+
+
+def fresh_job(pool, job, *args):
+    """Свежий обход (HIGH): пока он идёт, backfill уступает браузер и бюджет."""
+    with pool.budget.fresh():
+        return job(*args)
+
+
+def backfill_job(pool):
+    """Окна backfill_tasks (LOW) — пока нет свежих обходов."""
+    from app.backfill import run_pending
+
+    run_pending(pool)
+
+
 def start_scheduler():
+    from apscheduler.schedulers.blocking import BlockingScheduler
+    from apscheduler.events import EVENT_JOB_ERROR, EVENT_JOB_EXECUTED
+
+    from app.service import run_parse_job
+    from app.sources import get_source
+    from app.sources.budget import RateBudget
+    from app.sources.pool import DriverPool
+
+    sources = [get_source(name) for name in SOURCES]
+    # Один пул браузеров и один бюджет запросов на все реестры
+    pool = DriverPool(DRIVER_POOL_SIZE, RateBudget(REQUESTS_PER_MINUTE))
+    atexit.register(pool.close)
+
     signal.signal(signal.SIGTERM, handle_shutdown)
     signal.signal(signal.SIGINT, handle_shutdown)
 
     scheduler = BlockingScheduler(timezone="Asia/Almaty")
     scheduler.add_listener(job_listener, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR)
 
+    crawl_lots = "lots" in SOURCES
+    if crawl_lots and ADAPTIVE_SCHEDULING:
+        scheduler.add_job(
+            fresh_job,
+            args=[pool, adaptive_crawl_job, scheduler, pool],
+            trigger="interval",
+            hours=PARSE_INTERVAL_HOURS,
+            id="parse_lots",
+            name="GosZakup Lot Parser (adaptive)",
+            max_instances=1,
+            coalesce=True,
+        )
+    elif crawl_lots:
+        scheduler.add_job(
+            fresh_job,
+            args=[pool, run_parse_job, pool],
+            trigger="interval",
+            hours=PARSE_INTERVAL_HOURS,
+            id="parse_lots",
+            name="GosZakup Lot Parser",
+            max_instances=1,
+            coalesce=True,
+        )
+
+    for source in sources:
+        if source.name == "lots":
+            continue
+        scheduler.add_job(
+            fresh_job,
+            args=[pool, crawl_source_job, source.name, pool],
+            trigger="interval",
+            hours=SOURCE_INTERVAL_HOURS,
+            next_run_time=datetime.now(timezone.utc),
+            id=f"crawl_{source.name}",
+            name=f"GosZakup {source.name} registry",
+            max_instances=1,
+            coalesce=True,
+        )
+    # Backfill истории — в промежутках между свежими обходами
     scheduler.add_job(
-        run_parse_job,
+        backfill_job,
+        args=[pool],
         trigger="interval",
-        hours=PARSE_INTERVAL_HOURS,
-        id="parse_lots",
-        name="GosZakup Lot Parser",
+        minutes=BACKFILL_INTERVAL_MINUTES,
+        id="backfill",
+        name="GosZakup history backfill",
         max_instances=1,
         coalesce=True,
     )
+    logger.info(
+        f"Реестры: {', '.join(SOURCES)} | браузеров в пуле: {DRIVER_POOL_SIZE} | "
+        f"бюджет: {REQUESTS_PER_MINUTE or '∞'} страниц/мин"
+    )
+
+    if OUTBOX_SINK:
+        scheduler.add_job(
+            dispatch_outbox_job,
+            trigger="interval",
+            seconds=OUTBOX_DISPATCH_SECONDS,
+            id="dispatch_outbox",
+            name="Outbox dispatcher",
+            max_instances=1,
+            coalesce=True,
+        )
+        logger.info(f"Outbox-диспетчер: sink={OUTBOX_SINK}, каждые {OUTBOX_DISPATCH_SECONDS} с")
+
+    from app.database import engine
+
+    if engine.dialect.name == "mysql":
+        scheduler.add_job(
+            maintain_partitions_job,
+            trigger="interval",
+            hours=24,
+            id="maintain_partitions",
+            name="Lots partitions maintenance",
+            max_instances=1,
+            coalesce=True,
+        )
 
     logger.info(
-        f"Планировщик запущен. Интервал: {PARSE_INTERVAL_HOURS} ч. "
-        f"Следующий запуск — через {PARSE_INTERVAL_HOURS} ч."
+        f"Планировщик запущен. Интервал: {PARSE_INTERVAL_HOURS} ч"
+        + (" (адаптивный)." if ADAPTIVE_SCHEDULING else ".")
     )
     logger.info("Первый запуск выполняем сразу...")
 
     # Первый запуск немедленно
-    run_parse_job()
+    if crawl_lots and ADAPTIVE_SCHEDULING:
+        fresh_job(pool, adaptive_crawl_job, scheduler, pool)
+    elif crawl_lots:
+        fresh_job(pool, run_parse_job, pool)
 
     logger.info("Ожидаем следующего запуска по расписанию...")
     scheduler.start()
 
 
-if __name__ == "__main__":
-    if "--run-once" in sys.argv:
-        logger.info("Режим: однократный запуск")
-        run_parse_job()
+# ---------------------------------------------------------------------------
+# Подкоманды
+# ---------------------------------------------------------------------------
+
+def cmd_crawl(args) -> int:
+    if args.once:
+        from app.sources import get_source
+
+        source = getattr(args, "source", "lots")
+        logger.info(f"Режим: однократный запуск ({source})")
+        get_source(source).run()
     else:
         start_scheduler()
+    return 0
+
+
+def cmd_reparse(args) -> int:
+    from app.commands import cmd_reparse as run
+    return run(args)
+
+
+def cmd_export(args) -> int:
+    from app.commands import cmd_export as run
+    return run(args)
+
+
+def cmd_stats(args) -> int:
+    from app.commands import cmd_stats as run
+    return run(args)
+
+
+def cmd_active_lots(args) -> int:
+    from app.active_lots import rebuild
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        rebuild(db, chunk_size=args.chunk_size)
+    finally:
+        db.close()
+    return 0
+
+
+def cmd_partitions(args) -> int:
+    from app.commands import cmd_partitions as run
+    return run(args)
+
+
+def cmd_rollups(args) -> int:
+    from app.database import SessionLocal
+    from app.rollups import rebuild
+
+    db = SessionLocal()
+    try:
+        rebuild(db, chunk_size=args.chunk_size)
+    finally:
+        db.close()
+    return 0
+
+
+def cmd_announcements(args) -> int:
+    from app.announcements import rebuild
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        rebuild(db, chunk_size=args.chunk_size)
+    finally:
+        db.close()
+    return 0
+
+
+def cmd_backfill(args) -> int:
+    from app.commands import cmd_backfill as run
+    return run(args)
+
+
+def cmd_watchlist(args) -> int:
+    from app.commands import cmd_watchlist as run
+    return run(args)
+
+
+def cmd_classify(args) -> int:
+    from app.classifier import run_classification
+    run_classification(chunk_size=args.chunk_size, workers=args.workers, limit=args.limit)
+    return 0
+
+
+def cmd_near_dups(args) -> int:
+    from app.database import SessionLocal
+    from app.near_dup import backfill
+
+    db = SessionLocal()
+    try:
+        backfill(db, chunk_size=args.chunk_size, workers=args.workers)
+    finally:
+        db.close()
+    return 0
+
+
+def cmd_price_scores(args) -> int:
+    from app.database import SessionLocal
+    from app.price_anomaly import rebuild
+
+    db = SessionLocal()
+    try:
+        rebuild(db, chunk_size=args.chunk_size)
+    finally:
+        db.close()
+    return 0
+
+
+def cmd_dispatch(args) -> int:
+    from app.outbox import make_sink, run_dispatcher
+
+    run_dispatcher(args.consumer, make_sink(args.sink), args.poll_seconds, once=args.once)
+    return 0
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.main", description="GosZakup Lot Parser")
+    parser.add_argument(
+        "--run-once", action="store_true",
+        help="однократный обход (совместимость, то же что `crawl --once`)",
+    )
+    sub = parser.add_subparsers(dest="command")
+
+    p = sub.add_parser("crawl", help="обход реестра лотов")
+    p.add_argument("--once", action="store_true", help="один запуск без планировщика")
+    p.add_argument("--source", default="lots", help="реестр для --once: lots / announcements / contracts")
+    p.set_defaults(func=cmd_crawl)
+
+    p = sub.add_parser("reparse", help="пересчитать поля лотов из raw_data")
+    p.add_argument("--batch-size", type=int, default=1000)
+    p.add_argument("--dry-run", action="store_true", help="только посчитать изменения")
+    p.set_defaults(func=cmd_reparse)
+
+    p = sub.add_parser("export", help="выгрузка лотов")
+    p.add_argument("--format", choices=("jsonl", "csv"), default="jsonl")
+    p.add_argument("--output", "-o", help="файл (по умолчанию stdout)")
+    p.add_argument("--since", help="created_at >= ISO-дата")
+    p.add_argument("--status", help="фильтр по статусу")
+    p.add_argument("--active", action="store_true", help="только живые лоты (active_lots)")
+    p.add_argument("--batch-size", type=int, default=1000)
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("stats", help="сводка по БД")
+    p.add_argument("--runs", type=int, default=10, help="сколько последних запусков показать")
+    p.set_defaults(func=cmd_stats)
+
+    p = sub.add_parser("classify", help="классификация новых лотов по категориям")
+    p.add_argument("--chunk-size", type=int, default=5000)
+    p.add_argument("--workers", type=int, default=0, help="0 = по числу CPU")
+    p.add_argument("--limit", type=int, default=0, help="0 = без ограничения")
+    p.set_defaults(func=cmd_classify)
+
+    p = sub.add_parser("near-dups", help="backfill MinHash/LSH-индекса почти-дублей")
+    p.add_argument("--chunk-size", type=int, default=2000)
+    p.add_argument("--workers", type=int, default=0, help="0 = по числу CPU")
+    p.set_defaults(func=cmd_near_dups)
+
+    p = sub.add_parser("price-scores", help="пересчитать ценовые группы и скоры всех лотов")
+    p.add_argument("--chunk-size", type=int, default=50_000)
+    p.set_defaults(func=cmd_price_scores)
+
+    p = sub.add_parser("dispatch", help="доставка outbox-событий потребителю")
+    p.add_argument("--consumer", default="default", help="имя потребителя (свой offset)")
+    p.add_argument("--sink", default=OUTBOX_SINK or "jsonl", choices=("webhook", "jsonl", "queue"))
+    p.add_argument("--poll-seconds", type=float, default=OUTBOX_DISPATCH_SECONDS)
+    p.add_argument("--once", action="store_true", help="доставить накопленное и выйти")
+    p.set_defaults(func=cmd_dispatch)
+
+    p = sub.add_parser("active-lots", help="пересобрать active_lots (после смены FINAL_STATUSES)")
+    p.add_argument("--chunk-size", type=int, default=50_000)
+    p.set_defaults(func=cmd_active_lots)
+
+    p = sub.add_parser("rollups", help="пересчитать lot_daily_rollups / customer_daily_rollups")
+    p.add_argument("--chunk-size", type=int, default=200_000)
+    p.set_defaults(func=cmd_rollups)
+
+    p = sub.add_parser("announcements", help="пересобрать announcements и lots.announcement_id")
+    p.add_argument("--chunk-size", type=int, default=200_000)
+    p.set_defaults(func=cmd_announcements)
+
+    p = sub.add_parser("partitions", help="помесячные партиции lots (MySQL)")
+    p.add_argument("action", choices=("list", "ensure", "archive", "drop", "explain"))
+    p.add_argument("--ahead", type=int, default=PARTITIONS_AHEAD, help="ensure: месяцев вперёд")
+    p.add_argument("--retention-months", type=int, default=LOTS_RETENTION_MONTHS,
+                   help="archive/drop: сколько месяцев оставить в lots")
+    p.add_argument("--since", help="explain: начало диапазона дат (ISO), по умолчанию вчера")
+    p.set_defaults(func=cmd_partitions)
+
+    p = sub.add_parser("backfill", help="история реестров окнами страниц в фоне свежих обходов")
+    p.add_argument("action", choices=("plan", "list", "run"))
+    p.add_argument("--source", default="lots", help="plan: lots / announcements / contracts")
+    p.add_argument("--pages", help="plan: диапазон страниц выдачи, например 1-200")
+    p.add_argument("--window", type=int, default=BACKFILL_WINDOW_PAGES, help="plan: страниц в окне")
+    p.add_argument("--query", default="", help="plan: доп. параметры выдачи (фильтр по датам и т.п.)")
+    p.add_argument("--limit", type=int, default=0, help="run: сколько окон пройти, 0 = все")
+    p.set_defaults(func=cmd_backfill)
+
+    p = sub.add_parser("watchlist", help="сохранённые поиски (ключевые слова, БИН, суммы)")
+    p.add_argument("action", choices=("add", "list", "rematch"))
+    p.add_argument("--name", help="название поиска (для add)")
+    p.add_argument("--owner")
+    p.add_argument("--keyword", "-k", action="append", default=[], help="ключевое слово (можно несколько)")
+    p.add_argument("--bin", action="append", default=[], help="БИН заказчика (можно несколько)")
+    p.add_argument("--min-amount", type=float)
+    p.add_argument("--max-amount", type=float)
+    p.add_argument("--since", help="rematch: лоты с created_at >= ISO-дата")
+    p.add_argument("--batch-size", type=int, default=5000)
+    p.set_defaults(func=cmd_watchlist)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_arg_parser().parse_args(argv)
+
+    if args.command is None:
+        # Старое поведение: без подкоманды — планировщик или --run-once
+        args.once = args.run_once
+        return cmd_crawl(args)
+
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,17 @@
 from datetime import datetime
 from sqlalchemy import (
-    Column, String, Text, DateTime, Integer,
-    Numeric, BigInteger, Index, UniqueConstraint
+    DDL, Boolean, Column, Date, String, Text, DateTime, Integer, Float,
+    Numeric, BigInteger, Index, UniqueConstraint,
+    LargeBinary, PrimaryKeyConstraint, event,
 )
-from app.database import Base
+from app.database import Base, BigIntPK, HashKey
+
+
+def _default_hash_prefix(context) -> int:
+    """hash_prefix для строк, созданных в обход _build_lot (ORM, скрипты)."""
+    from app.parser import hash_prefix
+
+    return hash_prefix(context.get_current_parameters()["unique_hash"])
 
 
 class Lot(Base):
@@ -18,17 +26,26 @@ class Lot(Base):
       4: Способ закупки
       5: Статус
 
-    unique_hash = SHA256(lot_number + announce_number + lot_name)
+    unique_hash = SHA256(lot_number + announce_number + lot_name), 32 байта;
+    hash_prefix — его первые 8 байт (BIGINT) для проб по узкому индексу.
+
+    На MySQL таблица партиционирована по created_at (app/partitions.py), и
+    её уникальные ключи включают created_at — глобальную уникальность хеша
+    там держит lot_hashes (app/lot_hashes.py). На остальных СУБД
+    uq_lot_hash — по одному unique_hash.
     """
     __tablename__ = "lots"
 
-    id = Column(BigInteger, primary_key=True, autoincrement=True)
-    unique_hash = Column(String(64), nullable=False, comment="SHA256 хеш для дедупликации")
+    id = Column(BigIntPK, primary_key=True, autoincrement=True)
+    unique_hash = Column(HashKey, nullable=False, comment="SHA256 хеш для дедупликации")
+    hash_prefix = Column(BigInteger, nullable=True, default=_default_hash_prefix,
+                         comment="Первые 8 байт unique_hash")
 
     # Идентификаторы
     lot_number = Column(String(100), nullable=True, comment="№ лота (напр. 82073905-ЗЦП1)")
     announce_number = Column(String(100), nullable=True, comment="Номер объявления (напр. 16413510-1)")
     announce_name = Column(Text, nullable=True, comment="Наименование объявления")
+    announcement_id = Column(BigInteger, nullable=True, comment="id в announcements")
 
     # Лот
     lot_name = Column(Text, nullable=True, comment="Наименование и описание лота")
@@ -60,40 +77,385 @@ class Lot(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     raw_data = Column(Text, nullable=True, comment="JSON со всеми сырыми данными строки")
 
+    # Почти-дубль: тот же лот, переопубликованный под другим номером объявления
+    duplicate_of = Column(BigInteger, nullable=True, comment="id исходного лота (MinHash/LSH)")
+
+    # Жизненный цикл в реестре: когда лот видели и когда он пропал из выдачи
+    first_seen_run_id = Column(BigInteger, nullable=True, comment="Запуск, впервые увидевший лот")
+    last_seen_run_id = Column(BigInteger, nullable=True, comment="Последний запуск, видевший лот")
+    last_seen_at = Column(DateTime, nullable=True)
+    disappeared_at = Column(DateTime, nullable=True, comment="Не найден полным обходом (снят/отменён)")
+
     __table_args__ = (
         UniqueConstraint("unique_hash", name="uq_lot_hash"),
         Index("ix_lot_number", "lot_number"),
         Index("ix_announce_number", "announce_number"),
+        Index("ix_announcement_id", "announcement_id"),
         Index("ix_status", "status"),
         Index("ix_publication_date", "publication_date"),
         Index("ix_customer_bin", "customer_bin"),
         Index("ix_created_at", "created_at"),
         Index("ix_purchase_method", "purchase_method"),
+        Index("ix_duplicate_of", "duplicate_of"),
+        Index("ix_hash_prefix", "hash_prefix"),
     )
 
     def __repr__(self):
         return f"<Lot(id={self.id}, lot_number={self.lot_number!r}, status={self.status!r})>"
 
 
+# Как после миграции f2c6e8a4b9d1: уникальные ключи партиционированной
+# таблицы содержат created_at (только MySQL)
+event.listen(
+    Lot.__table__,
+    "after_create",
+    DDL(
+        "ALTER TABLE lots DROP PRIMARY KEY, ADD PRIMARY KEY (id, created_at), "
+        "DROP INDEX uq_lot_hash, ADD UNIQUE INDEX uq_lot_hash (unique_hash, created_at)"
+    ).execute_if(dialect="mysql"),
+)
+
+
+class LotHash(Base):
+    """
+    Глобальный уникальный ключ лота: unique_hash → lot_id. Не
+    партиционирована; lot_id = NULL — хеш занят, но строка lots ещё не
+    вставлена (только внутри транзакции save_batch).
+    """
+    __tablename__ = "lot_hashes"
+
+    unique_hash = Column(HashKey, primary_key=True)
+    lot_id = Column(BigInteger, nullable=True)
+
+    __table_args__ = (
+        Index("ix_lot_hashes_lot_id", "lot_id"),
+    )
+
+
 class ParseRun(Base):
-    """Журнал каждого запуска парсера."""
+    """
+    Журнал каждого запуска парсера. Для реестров, кроме lots, lots_found /
+    lots_new / lots_changed считают строки своего реестра.
+    """
     __tablename__ = "parse_runs"
 
-    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    id = Column(BigIntPK, primary_key=True, autoincrement=True)
+    source = Column(String(50), nullable=False, default="lots", server_default="lots",
+                    comment="Реестр-источник (app/sources): lots / announcements / contracts")
     started_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     finished_at = Column(DateTime, nullable=True)
     status = Column(String(50), default="running", comment="running / success / failed")
     pages_parsed = Column(Integer, default=0)
     lots_found = Column(Integer, default=0)
     lots_new = Column(Integer, default=0)
+    lots_changed = Column(Integer, default=0)
+    total_records = Column(Integer, nullable=True, comment="Счётчик «из Z записей» на 1-й странице")
+    head_hashes = Column(Text, nullable=True, comment="JSON: хеши верхних лотов 1-й страницы")
+    page_cache_hits = Column(Integer, default=0, comment="Страниц пропущено по отпечатку")
+    page_cache_misses = Column(Integer, default=0, comment="Страниц разобрано заново")
+    profile_path = Column(String(500), nullable=True, comment="Каталог артефактов профилирования (PROFILE)")
+    full_sweep = Column(Boolean, nullable=True, comment="Обход видел весь реестр, без кеша страниц")
+    lots_disappeared = Column(Integer, default=0, comment="Живых лотов, не найденных полным обходом")
+    drift_duplicates = Column(Integer, default=0, comment="Дублей из-за сдвига страниц, отброшено до БД")
+    drift_recovered = Column(Integer, default=0, comment="Лотов, найденных перечитыванием после сдвига")
+    drift_skipped = Column(Integer, default=0, comment="Оценка пропущенных из-за сдвига лотов")
     error_message = Column(Text, nullable=True)
 
     __table_args__ = (
         Index("ix_parse_runs_started_at", "started_at"),
+        Index("ix_parse_runs_source", "source", "status"),
     )
 
     def __repr__(self):
         return (
             f"<ParseRun(id={self.id}, status={self.status!r}, "
             f"lots_new={self.lots_new})>"
-        )
\ No newline at end of file
+        )
+
+
+class LotSignature(Base):
+    """MinHash-сигнатура нормализованного lot_name (NUM_PERM × uint32)."""
+    __tablename__ = "lot_signatures"
+
+    lot_id = Column(BigInteger, primary_key=True, autoincrement=False)
+    signature = Column(LargeBinary, nullable=False)
+
+
+class LotLshBucket(Base):
+    """
+    LSH-индекс: одна строка на (полосу сигнатуры, лот).
+    band_key = 64-битный хеш (номер полосы + значения полосы).
+    """
+    __tablename__ = "lot_lsh_buckets"
+
+    band_key = Column(BigInteger, nullable=False)
+    lot_id = Column(BigInteger, nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("band_key", "lot_id", name="pk_lot_lsh_buckets"),
+    )
+
+
+class PriceGroupStats(Base):
+    """
+    Робастная статистика цен по группе (нормализованное название + способ
+    закупки). Гистограмма log10(суммы) хранится целиком, поэтому группы
+    обновляются инкрементально без пересчёта истории.
+    """
+    __tablename__ = "price_group_stats"
+
+    group_key = Column(BigInteger, primary_key=True, autoincrement=False)
+    name_key = Column(String(200), nullable=False, comment="Стеммированный ключ названия")
+    purchase_method = Column(String(200), nullable=True)
+    lot_count = Column(Integer, nullable=False, default=0)
+    histogram = Column(LargeBinary, nullable=False, comment="uint32[HIST_BINS] по log10(суммы)")
+    median = Column(Float, nullable=True, comment="Медиана log10(суммы)")
+    mad = Column(Float, nullable=True, comment="MAD log10(суммы)")
+    q25 = Column(Float, nullable=True)
+    q75 = Column(Float, nullable=True)
+    q90 = Column(Float, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class LotPriceScore(Base):
+    """Робастный z-score суммы лота внутри его ценовой группы."""
+    __tablename__ = "lot_price_scores"
+
+    lot_id = Column(BigInteger, primary_key=True, autoincrement=False)
+    group_key = Column(BigInteger, nullable=False)
+    score = Column(Float, nullable=True, comment="NULL — группа слишком мала")
+    scored_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_lot_price_scores_group", "group_key"),
+        Index("ix_lot_price_scores_score", "score"),
+    )
+
+
+class OutboxEvent(Base):
+    """
+    Transactional outbox: событие пишется в той же транзакции, что и лот.
+    Диспетчер (app/outbox.py) доставляет события потребителям по порядку id.
+    """
+    __tablename__ = "outbox_events"
+
+    id = Column(BigIntPK, primary_key=True, autoincrement=True)
+    event_type = Column(String(50), nullable=False, comment="lot.created / lot.changed")
+    lot_id = Column(BigInteger, nullable=False)
+    payload = Column(Text, nullable=False, comment="JSON события")
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_outbox_events_created_at", "created_at"),
+    )
+
+
+class ConsumerOffset(Base):
+    """Последний подтверждённый id события для каждого потребителя."""
+    __tablename__ = "outbox_offsets"
+
+    consumer = Column(String(100), primary_key=True)
+    last_event_id = Column(BigInteger, nullable=False, default=0)
+    gaps = Column(Text, nullable=True, comment="JSON: недоставленные id до offset-а {id: когда замечен}")
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class PageFingerprint(Base):
+    """
+    Отпечаток страницы реестра с прошлого запуска. Ключ — срез выдачи
+    (URL с фильтрами) и номер страницы.
+    """
+    __tablename__ = "page_fingerprints"
+
+    slice_key = Column(String(255), nullable=False)
+    page_num = Column(Integer, nullable=False)
+    digest = Column(String(64), nullable=False, comment="SHA256 нормализованных строк")
+    row_count = Column(Integer, nullable=False, default=0)
+    run_id = Column(BigInteger, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("slice_key", "page_num", name="pk_page_fingerprints"),
+    )
+
+
+class SavedSearch(Base):
+    """
+    Сохранённый поиск покупателя. Условия разных видов объединяются по И,
+    значения внутри вида — по ИЛИ: (любое ключевое слово) И (любой БИН)
+    И (сумма в диапазоне). Пустой вид условия не ограничивает.
+    """
+    __tablename__ = "saved_searches"
+
+    id = Column(BigIntPK, primary_key=True, autoincrement=True)
+    name = Column(String(200), nullable=False)
+    owner = Column(String(100), nullable=True, comment="Кому принадлежит поиск")
+    keywords = Column(Text, nullable=True, comment="Ключевые слова, по одному в строке")
+    customer_bins = Column(Text, nullable=True, comment="БИН заказчиков через пробел/запятую")
+    amount_min = Column(Numeric(20, 2), nullable=True)
+    amount_max = Column(Numeric(20, 2), nullable=True)
+    active = Column(Boolean, nullable=False, default=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<SavedSearch(id={self.id}, name={self.name!r})>"
+
+
+class WatchlistMatch(Base):
+    """Срабатывание сохранённого поиска на лоте (одна строка на пару)."""
+    __tablename__ = "watchlist_matches"
+
+    search_id = Column(BigInteger, nullable=False)
+    lot_id = Column(BigInteger, nullable=False)
+    matched_keywords = Column(Text, nullable=True, comment="Сработавшие ключевые слова")
+    matched_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("search_id", "lot_id", name="pk_watchlist_matches"),
+        Index("ix_watchlist_matches_lot", "lot_id"),
+        Index("ix_watchlist_matches_matched_at", "matched_at"),
+    )
+
+
+class Announcement(Base):
+    """
+    Объявление — общее для всех его лотов: наименование, URL и заказчик
+    хранятся один раз, а не в каждой строке lots. Строки заводит save_batch
+    (app/announcements.py), lot_count — число лотов объявления в lots.
+    Статус, способ и сумму заполняет обход реестра объявлений
+    (app/sources/announcements.py).
+    """
+    __tablename__ = "announcements"
+
+    id = Column(BigIntPK, primary_key=True, autoincrement=True)
+    announce_number = Column(String(100), nullable=False, comment="Номер объявления (напр. 16413510-1)")
+    announce_name = Column(Text, nullable=True)
+    announce_url = Column(Text, nullable=True)
+    customer_name = Column(Text, nullable=True)
+    customer_bin = Column(String(20), nullable=True)
+    lot_count = Column(Integer, nullable=False, default=0)
+    status = Column(String(200), nullable=True, comment="Статус из реестра объявлений")
+    purchase_method = Column(String(200), nullable=True)
+    total_amount = Column(Numeric(20, 2), nullable=True, comment="Сумма закупки (KZT)")
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("announce_number", name="uq_announce_number"),
+        Index("ix_announcements_customer_bin", "customer_bin"),
+    )
+
+
+class Contract(Base):
+    """Реестр договоров (app/sources/contracts.py)."""
+    __tablename__ = "contracts"
+
+    id = Column(BigIntPK, primary_key=True, autoincrement=True)
+    unique_hash = Column(HashKey, nullable=False, comment="SHA256(contract_number + customer_bin)")
+    contract_number = Column(String(100), nullable=True)
+    customer_name = Column(Text, nullable=True)
+    customer_bin = Column(String(20), nullable=True)
+    supplier_name = Column(Text, nullable=True)
+    supplier_bin = Column(String(20), nullable=True)
+    contract_amount = Column(Numeric(20, 2), nullable=True, comment="Сумма договора (KZT)")
+    contract_date = Column(Date, nullable=True, comment="Дата заключения")
+    status = Column(String(200), nullable=True)
+    contract_url = Column(Text, nullable=True)
+    raw_data = Column(Text, nullable=True, comment="JSON с сырыми полями строки")
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("unique_hash", name="uq_contract_hash"),
+        Index("ix_contracts_number", "contract_number"),
+        Index("ix_contracts_customer_bin", "customer_bin"),
+        Index("ix_contracts_supplier_bin", "supplier_bin"),
+    )
+
+
+class BackfillTask(Base):
+    """
+    Окно backfill истории: страницы page_from..page_to выдачи реестра
+    source (с доп. фильтром query, например по датам). next_page — с какой
+    страницы продолжить после уступки свежему обходу (app/backfill.py).
+    """
+    __tablename__ = "backfill_tasks"
+
+    id = Column(BigIntPK, primary_key=True, autoincrement=True)
+    source = Column(String(50), nullable=False)
+    query = Column(String(500), nullable=False, default="", comment="Доп. параметры выдачи (фильтры)")
+    page_from = Column(Integer, nullable=False)
+    page_to = Column(Integer, nullable=False)
+    next_page = Column(Integer, nullable=False)
+    status = Column(String(20), nullable=False, default="pending", comment="pending / done / failed")
+    attempts = Column(Integer, nullable=False, default=0)
+    rows_found = Column(Integer, nullable=False, default=0)
+    rows_new = Column(Integer, nullable=False, default=0)
+    error_message = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_backfill_tasks_status", "status", "id"),
+    )
+
+
+class ActiveLot(Base):
+    """
+    Горячая часть реестра: только лоты в нефинальном статусе и только
+    колонки для списков. Ведётся save_batch (app/active_lots.py); лот
+    уходит отсюда, как только его статус становится финальным
+    (FINAL_STATUSES), и дальше живёт только в lots.
+    """
+    __tablename__ = "active_lots"
+
+    lot_id = Column(BigInteger, primary_key=True, autoincrement=False)
+    lot_number = Column(String(100), nullable=True)
+    lot_name = Column(String(500), nullable=True, comment="Обрезано до 500 символов")
+    status = Column(String(200), nullable=True)
+    purchase_method = Column(String(200), nullable=True)
+    customer_bin = Column(String(20), nullable=True)
+    purchase_amount = Column(Numeric(20, 2), nullable=True)
+    deadline_date = Column(DateTime, nullable=True)
+    publication_date = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_active_lots_status", "status"),
+        Index("ix_active_lots_customer_bin", "customer_bin"),
+        Index("ix_active_lots_deadline", "deadline_date"),
+        Index("ix_active_lots_created_at", "created_at"),
+    )
+
+
+class LotDailyRollup(Base):
+    """
+    Суточные агрегаты лотов по статусу и способу закупки (день —
+    DATE(created_at)). Ведутся дельтами из save_batch (app/rollups.py);
+    NULL в измерениях хранится как '' — иначе не работает первичный ключ.
+    """
+    __tablename__ = "lot_daily_rollups"
+
+    day = Column(Date, nullable=False)
+    status = Column(String(200), nullable=False, default="")
+    purchase_method = Column(String(200), nullable=False, default="")
+    lot_count = Column(Integer, nullable=False, default=0)
+    amount_sum = Column(Numeric(24, 2), nullable=False, default=0)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("day", "status", "purchase_method", name="pk_lot_daily_rollups"),
+    )
+
+
+class CustomerDailyRollup(Base):
+    """Суточные агрегаты лотов по БИН заказчика."""
+    __tablename__ = "customer_daily_rollups"
+
+    day = Column(Date, nullable=False)
+    customer_bin = Column(String(20), nullable=False, default="")
+    lot_count = Column(Integer, nullable=False, default=0)
+    amount_sum = Column(Numeric(24, 2), nullable=False, default=0)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("day", "customer_bin", name="pk_customer_daily_rollups"),
+        Index("ix_customer_daily_rollups_bin", "customer_bin"),
+    )
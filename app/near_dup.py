@@ -0,0 +1,243 @@
+"""
+Поиск почти-дублей лотов: MinHash по шинглам lot_name + LSH-корзины.
+
+Один и тот же лот часто переопубликуют под новым announce_number с
+чуть изменённым названием — unique_hash у него другой. Для каждого
+нового лота ищем кандидатов только в тех же LSH-корзинах (сублинейно,
+без попарных сравнений), затем проверяем оценку Жаккара по сигнатурам.
+
+  NUM_PERM = BANDS × ROWS = 16 × 8 → порог срабатывания LSH ≈ (1/16)^(1/8) ≈ 0.71
+
+Корзины ограничены: в них попадают только корни (лоты без duplicate_of) —
+тысяча переопубликаций «Бензин АИ-92» занимает в корзине одну строку, — и
+из каждой корзины берутся не больше BUCKET_CANDIDATES самых новых лотов.
+Стоимость поиска для нового лота не растёт с размером таблицы.
+"""
+import hashlib
+import os
+import zlib
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Sequence
+
+import numpy as np
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.database import insert_ignore
+from app.logger import get_logger
+from app.models import Lot, LotLshBucket, LotSignature
+from app.text import normalize_text
+
+logger = get_logger("goszakup.near_dup")
+
+SHINGLE_SIZE = 5
+BANDS = 16
+ROWS = 8
+NUM_PERM = BANDS * ROWS
+SIMILARITY_THRESHOLD = 0.7
+BUCKET_CANDIDATES = 50  # кандидатов из одной корзины (самые новые корни)
+
+# Хеш-функции вида ((a·x + b) mod 2^64) >> 32 (multiply-shift), a — нечётные
+_rng = np.random.default_rng(20240101)
+_A = _rng.integers(1, 2**63, size=NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_B = _rng.integers(0, 2**63, size=NUM_PERM, dtype=np.uint64)
+_SHIFT = np.uint64(32)
+
+
+def shingles(text: str) -> np.ndarray:
+    """crc32 символьных k-грамм нормализованного текста."""
+    norm = normalize_text(text)
+    if not norm:
+        return np.empty(0, dtype=np.uint64)
+    if len(norm) <= SHINGLE_SIZE:
+        grams = {norm}
+    else:
+        grams = {norm[i:i + SHINGLE_SIZE] for i in range(len(norm) - SHINGLE_SIZE + 1)}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+def minhash(text: str) -> Optional[np.ndarray]:
+    """Сигнатура uint32[NUM_PERM] или None для пустого текста."""
+    x = shingles(text)
+    if not len(x):
+        return None
+    hashed = (_A[:, None] * x[None, :] + _B[:, None]) >> _SHIFT
+    return hashed.min(axis=1).astype(np.uint32)
+
+
+def band_keys(signature: np.ndarray) -> list[int]:
+    """64-битные ключи LSH-корзин (знаковые — под BIGINT)."""
+    keys = []
+    for band in range(BANDS):
+        chunk = signature[band * ROWS:(band + 1) * ROWS].tobytes()
+        digest = hashlib.blake2b(bytes([band]) + chunk, digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "big", signed=True))
+    return keys
+
+
+def similarity(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+    """Оценка коэффициента Жаккара по доле совпавших минимумов."""
+    return float(np.count_nonzero(sig_a == sig_b)) / NUM_PERM
+
+
+def _signatures_chunk(names: list[str]) -> list[Optional[bytes]]:
+    """Выполняется в воркере пула: сигнатуры пачки названий."""
+    out = []
+    for name in names:
+        sig = minhash(name or "")
+        out.append(sig.tobytes() if sig is not None else None)
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Индекс в БД
+# ---------------------------------------------------------------------------
+
+def _resolve_and_store(db: Session, lots: Sequence, signatures: Sequence[Optional[bytes]]) -> int:
+    """
+    lots — строки (id, announce_number) в порядке возрастания id,
+    signatures — соответствующие сигнатуры. Ищем кандидатов в корзинах,
+    записываем duplicate_of, сигнатуры и корзины. Без commit — вызывающий
+    код фиксирует транзакцию вместе с основной записью. Возвращает число
+    найденных дублей.
+    """
+    items = []
+    for lot, raw in zip(lots, signatures):
+        if raw is None:
+            continue
+        sig = np.frombuffer(raw, dtype=np.uint32)
+        items.append((lot, raw, sig, band_keys(sig)))
+    if not items:
+        return 0
+
+    # 1) все корзины пачки — одним запросом, не больше BUCKET_CANDIDATES на корзину
+    all_keys = {k for *_, keys in items for k in keys}
+    buckets: dict[int, list[int]] = defaultdict(list)
+    ranked = (
+        select(
+            LotLshBucket.band_key, LotLshBucket.lot_id,
+            func.row_number().over(partition_by=LotLshBucket.band_key, order_by=LotLshBucket.lot_id.desc())
+            .label("rank"),
+        )
+        .where(LotLshBucket.band_key.in_(all_keys))
+        .subquery()
+    )
+    for band_key, lot_id in db.execute(
+        select(ranked.c.band_key, ranked.c.lot_id).where(ranked.c.rank <= BUCKET_CANDIDATES)
+    ):
+        buckets[band_key].append(lot_id)
+
+    # 2) сигнатуры и announce_number всех кандидатов из БД — одним запросом
+    candidate_ids = {lot_id for ids in buckets.values() for lot_id in ids}
+    known: dict[int, tuple[np.ndarray, Optional[str], Optional[int]]] = {}
+    if candidate_ids:
+        rows = db.execute(
+            select(LotSignature.lot_id, LotSignature.signature, Lot.announce_number, Lot.duplicate_of)
+            .join(Lot, Lot.id == LotSignature.lot_id)
+            .where(LotSignature.lot_id.in_(candidate_ids))
+        )
+        for lot_id, raw, announce_number, duplicate_of in rows:
+            known[lot_id] = (np.frombuffer(raw, dtype=np.uint32), announce_number, duplicate_of)
+
+    # 3) по порядку id: кандидаты из корзин (БД + уже обработанные лоты пачки)
+    duplicates = []
+    for lot, raw, sig, keys in items:
+        best_id, best_sim = None, SIMILARITY_THRESHOLD
+        seen = set()
+        for key in keys:
+            for cand_id in buckets[key]:
+                if cand_id in seen or cand_id not in known:
+                    continue
+                seen.add(cand_id)
+                cand_sig, cand_announce, _ = known[cand_id]
+                # Лоты одного объявления — разные позиции, а не переопубликация
+                if cand_announce is not None and cand_announce == lot.announce_number:
+                    continue
+                sim = similarity(sig, cand_sig)
+                if sim >= best_sim and (best_id is None or sim > best_sim or cand_id < best_id):
+                    best_id, best_sim = cand_id, sim
+
+        duplicate_of = None
+        if best_id is not None:
+            # Указываем на корень цепочки, а не на промежуточную копию
+            duplicate_of = known[best_id][2] or best_id
+            duplicates.append({"id": lot.id, "duplicate_of": duplicate_of})
+
+        known[lot.id] = (sig, lot.announce_number, duplicate_of)
+        if duplicate_of is None:
+            for key in keys:
+                buckets[key].append(lot.id)
+
+    dialect = db.get_bind().dialect.name
+    db.execute(
+        insert_ignore(LotSignature.__table__, dialect),
+        [{"lot_id": lot.id, "signature": raw} for lot, raw, _, _ in items],
+    )
+    # Копии в корзины не пишем: их находят через корень
+    roots = [(lot, keys) for lot, _, _, keys in items if known[lot.id][2] is None]
+    if roots:
+        db.execute(
+            insert_ignore(LotLshBucket.__table__, dialect),
+            [{"band_key": k, "lot_id": lot.id} for lot, keys in roots for k in keys],
+        )
+    if duplicates:
+        db.execute(update(Lot), duplicates)
+    return len(duplicates)
+
+
+def index_lots(db: Session, lots: Sequence) -> int:
+    """
+    Индексирует только что вставленные лоты (строки с id, lot_name,
+    announce_number) и проставляет им duplicate_of. Возвращает число дублей.
+    """
+    lots = sorted(lots, key=lambda r: r.id)
+    return _resolve_and_store(db, lots, _signatures_chunk([r.lot_name for r in lots]))
+
+
+def backfill(db: Session, chunk_size: int = 2000, workers: int = 0) -> int:
+    """
+    Индексирует все ещё не проиндексированные лоты. Сигнатуры считаются в
+    пуле процессов, разрешение дублей — в главном процессе по порядку id
+    (чтобы duplicate_of всегда указывал на более ранний лот).
+    """
+    workers = workers or os.cpu_count() or 1
+    total = 0
+    found = 0
+
+    def chunks():
+        last_id = 0
+        while True:
+            rows = (
+                db.query(Lot.id, Lot.lot_name, Lot.announce_number)
+                .outerjoin(LotSignature, LotSignature.lot_id == Lot.id)
+                .filter(Lot.id > last_id, LotSignature.lot_id.is_(None))
+                .order_by(Lot.id)
+                .limit(chunk_size)
+                .all()
+            )
+            if not rows:
+                return
+            last_id = rows[-1].id
+            yield rows
+
+    logger.info(f"Backfill MinHash: chunk_size={chunk_size}, workers={workers}")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Упорядоченное окно: считаем вперёд, разрешаем строго по порядку
+        window: deque = deque()
+        source = chunks()
+        while True:
+            while len(window) < workers * 2:
+                rows = next(source, None)
+                if rows is None:
+                    break
+                window.append((rows, pool.submit(_signatures_chunk, [r.lot_name for r in rows])))
+            if not window:
+                break
+            rows, fut = window.popleft()
+            found += _resolve_and_store(db, rows, fut.result())
+            db.commit()
+            total += len(rows)
+            logger.info(f"  Проиндексировано: {total} | почти-дублей: {found}")
+
+    return found
@@ -0,0 +1,283 @@
+"""
+Transactional outbox и доставка change feed потребителям.
+
+run_parse_job пишет событие на каждый новый/изменённый лот в той же
+транзакции, что и сам лот (record_events). Диспетчер читает события
+после сохранённого offset-а потребителя, отдаёт пачку в sink и только
+после успешной доставки сдвигает offset — доставка at-least-once,
+потребители должны быть идемпотентны по id события.
+
+Порядок id не совпадает с порядком commit-ов: пишут несколько задач
+(обход, реестры-источники, backfill, mark_disappeared), и транзакция,
+взявшая id N, может зафиксироваться после уже доставленного N+k. Поэтому
+дырки в id за offset-ом запоминаются (outbox_offsets.gaps) и проверяются
+при каждой пачке: появившееся позже событие доставляется вне очереди.
+Дырка, не заполнившаяся за OUTBOX_GAP_SECONDS, считается откатом
+транзакции и забывается. Дырки ниже самого старого события в таблице —
+это история, удалённая prune(), а не незафиксированные транзакции; их не
+запоминаем, а всего дырок держим не больше OUTBOX_MAX_GAPS (самые новые),
+чтобы outbox_offsets.gaps и запрос по ним оставались ограниченными.
+Новый потребитель начинает с самого старого сохранившегося события.
+"""
+import json
+import os
+import queue
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Iterable, Optional, Protocol
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.config import (
+    OUTBOX_BATCH_SIZE, OUTBOX_FILE, OUTBOX_GAP_SECONDS, OUTBOX_MAX_GAPS, OUTBOX_RETENTION_DAYS,
+    OUTBOX_SINK, OUTBOX_WEBHOOK_URL,
+)
+from app.logger import get_logger
+from app.models import ConsumerOffset, OutboxEvent
+
+logger = get_logger("goszakup.outbox")
+
+EVENT_CREATED = "lot.created"
+EVENT_CHANGED = "lot.changed"
+EVENT_DISAPPEARED = "lot.disappeared"
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, bytes):
+        return value.hex()
+    raise TypeError(f"Не сериализуется в JSON: {type(value).__name__}")
+
+
+def record_events(db: Session, event_type: str, payloads: Iterable[dict]) -> int:
+    """
+    Добавить события в outbox (без commit — фиксируются вместе с лотами).
+    Каждый payload обязан содержать "id" лота.
+    """
+    now = datetime.utcnow()
+    rows = [
+        {
+            "event_type": event_type,
+            "lot_id": payload["id"],
+            "payload": json.dumps(payload, ensure_ascii=False, default=_json_default),
+            "created_at": now,
+        }
+        for payload in payloads
+    ]
+    if rows:
+        db.execute(OutboxEvent.__table__.insert(), rows)
+    return len(rows)
+
+
+# ---------------------------------------------------------------------------
+# Sinks
+# ---------------------------------------------------------------------------
+
+class Sink(Protocol):
+    def send(self, events: list[dict]) -> None:
+        """Доставить пачку; исключение = пачка будет отправлена повторно."""
+
+
+class JsonlFileSink:
+    """Поток событий в JSONL-файл (append + fsync перед подтверждением)."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def send(self, events: list[dict]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            for event in events:
+                f.write(json.dumps(event, ensure_ascii=False))
+                f.write("\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class WebhookSink:
+    """POST {"events": [...]} на URL; любой не-2xx ответ — повторная доставка."""
+
+    def __init__(self, url: str, timeout: float = 10.0):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, events: list[dict]) -> None:
+        import requests
+
+        resp = requests.post(self.url, json={"events": events}, timeout=self.timeout)
+        resp.raise_for_status()
+
+
+class LocalQueueSink:
+    """Заглушка брокера: события складываются в in-process очередь."""
+
+    def __init__(self, q: Optional[queue.Queue] = None):
+        self.queue = q if q is not None else queue.Queue()
+
+    def send(self, events: list[dict]) -> None:
+        for event in events:
+            self.queue.put(event)
+
+
+def make_sink(name: str = OUTBOX_SINK) -> Sink:
+    if name == "webhook":
+        if not OUTBOX_WEBHOOK_URL:
+            raise ValueError("OUTBOX_SINK=webhook требует OUTBOX_WEBHOOK_URL")
+        return WebhookSink(OUTBOX_WEBHOOK_URL)
+    if name == "jsonl":
+        return JsonlFileSink(OUTBOX_FILE)
+    if name == "queue":
+        return LocalQueueSink()
+    raise ValueError(f"Неизвестный OUTBOX_SINK: {name!r}")
+
+
+# ---------------------------------------------------------------------------
+# Диспетчер
+# ---------------------------------------------------------------------------
+
+def _get_offset(db: Session, consumer: str) -> ConsumerOffset:
+    offset = db.get(ConsumerOffset, consumer)
+    if offset is None:
+        # Всё, что ниже самого старого события, уже удалено prune()
+        oldest = db.query(func.min(OutboxEvent.id)).scalar()
+        offset = ConsumerOffset(consumer=consumer, last_event_id=oldest - 1 if oldest else 0)
+        db.add(offset)
+        db.commit()
+    return offset
+
+
+def _track_gaps(
+    gaps: dict[str, float],
+    last_id: int,
+    events: list,
+    now: float,
+    gap_seconds: float,
+    oldest: Optional[int],
+    max_gaps: int,
+) -> dict:
+    """
+    Дырки в id между last_id и пачкой → gaps {id: когда замечена}: только
+    выше oldest (самого старого события в таблице) и не больше max_gaps
+    самых новых; старые дырки забываются.
+    """
+    expected = last_id + 1
+    if oldest is not None:
+        expected = max(expected, oldest)
+    for e in events:
+        start = max(expected, e.id - max_gaps)  # более ранние всё равно вытеснит отсечка ниже
+        for missing in range(start, e.id):
+            gaps.setdefault(str(missing), now)
+        expected = e.id + 1
+    gaps = {i: seen for i, seen in gaps.items() if now - seen < gap_seconds}
+    if len(gaps) > max_gaps:
+        logger.warning(f"Outbox: дырок в id {len(gaps)} — помним только {max_gaps} последних")
+        gaps = {i: gaps[i] for i in sorted(gaps, key=int)[-max_gaps:]}
+    return gaps
+
+
+def dispatch_once(
+    db: Session,
+    consumer: str,
+    sink: Sink,
+    batch_size: int = OUTBOX_BATCH_SIZE,
+    gap_seconds: float = OUTBOX_GAP_SECONDS,
+) -> int:
+    """Доставить одну пачку событий потребителю. Возвращает число доставленных."""
+    offset = _get_offset(db, consumer)
+    gaps: dict[str, float] = json.loads(offset.gaps) if offset.gaps else {}
+
+    # События, зафиксированные позже уже доставленных соседей
+    late = []
+    gap_ids = sorted(int(i) for i in gaps)
+    for start in range(0, len(gap_ids), batch_size):  # кусками: gaps мог накопиться до отсечки
+        late += db.execute(
+            select(OutboxEvent).where(OutboxEvent.id.in_(gap_ids[start:start + batch_size])).order_by(OutboxEvent.id)
+        ).scalars().all()
+    events = db.execute(
+        select(OutboxEvent)
+        .where(OutboxEvent.id > offset.last_event_id)
+        .order_by(OutboxEvent.id)
+        .limit(batch_size)
+    ).scalars().all()
+    for e in late:
+        gaps.pop(str(e.id), None)
+    oldest = db.query(func.min(OutboxEvent.id)).scalar() if events else None
+    gaps = _track_gaps(gaps, offset.last_event_id, events, time.time(), gap_seconds, oldest, OUTBOX_MAX_GAPS)
+
+    batch = late + events
+    if not batch:
+        # Закрыть читающую транзакцию: иначе в REPEATABLE READ следующий опрос
+        # видел бы тот же снимок; заодно сохраняем забытые дырки
+        offset.gaps = json.dumps(gaps) if gaps else None
+        db.commit()
+        return 0
+
+    sink.send([
+        {
+            "id": e.id,
+            "type": e.event_type,
+            "lot_id": e.lot_id,
+            "created_at": e.created_at.isoformat(),
+            "data": json.loads(e.payload),
+        }
+        for e in batch
+    ])
+
+    # Offset сдвигаем только после успешной доставки
+    if events:
+        offset.last_event_id = events[-1].id
+    offset.gaps = json.dumps(gaps) if gaps else None
+    offset.updated_at = datetime.utcnow()
+    db.commit()
+    return len(batch)
+
+
+def dispatch_pending(db: Session, consumer: str, sink: Sink, batch_size: int = OUTBOX_BATCH_SIZE) -> int:
+    """Доставить всё накопившееся (пачками)."""
+    total = 0
+    while True:
+        sent = dispatch_once(db, consumer, sink, batch_size)
+        total += sent
+        if sent < batch_size:
+            return total
+
+
+def prune(db: Session, retention_days: int = OUTBOX_RETENTION_DAYS) -> int:
+    """
+    Удалить события, подтверждённые всеми потребителями и старше
+    retention_days. Без потребителей ничего не удаляем.
+    """
+    min_offset = db.query(func.min(ConsumerOffset.last_event_id)).scalar()
+    if not min_offset:
+        return 0
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    result = db.execute(
+        delete(OutboxEvent).where(OutboxEvent.id <= min_offset, OutboxEvent.created_at < cutoff)
+    )
+    db.commit()
+    return result.rowcount
+
+
+def run_dispatcher(consumer: str, sink: Sink, poll_seconds: float, once: bool = False) -> None:
+    """Цикл диспетчера для CLI. Ошибка доставки → пауза и повтор той же пачки."""
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        while True:
+            try:
+                sent = dispatch_pending(db, consumer, sink)
+                if sent:
+                    logger.info(f"Outbox[{consumer}]: доставлено событий: {sent}")
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Outbox[{consumer}]: ошибка доставки, повторим: {e}")
+            if once:
+                return
+            time.sleep(poll_seconds)
+    finally:
+        db.close()
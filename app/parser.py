@@ -11,26 +11,39 @@
 
 Пагинация: ?page=N, максимум 10 000 записей (200 страниц по 50).
 Парсер использует Selenium т.к. сайт рендерится через JavaScript.
+
+CAPTURE_NETWORK: вместо ожидания отрисовки и разбора DOM перехватываем
+через DevTools (performance-лог Chrome) сетевой ответ, из которого JS
+рисует таблицу, и переводим его JSON сразу в dict лота. Не нашли ответ —
+разбираем DOM, как раньше.
+
+Selenium и BeautifulSoup импортируются лениво внутри функций: утилиты
+(_make_hash, hash_prefix, _parse_amount, _extract_bin) нужны и командам без браузера
+(reparse), и они не должны платить за импорт тяжёлых пакетов.
 """
+from __future__ import annotations
 
+import base64
 import hashlib
 import json
+import math
 import re
 import time
-from datetime import datetime
-from typing import Generator, Optional
+from typing import TYPE_CHECKING, Callable, Generator, Optional
 
-from bs4 import BeautifulSoup, Tag
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.ui import WebDriverWait
-from webdriver_manager.chrome import ChromeDriverManager
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup, Tag
+    from selenium import webdriver
 
-from app.config import BASE_URL, HEADLESS, MAX_PAGES, PAGE_LOAD_TIMEOUT
-from app.logger import get_logger
+    from app.sources.pool import DriverPool
+
+from app.config import (
+    BASE_URL, CAPTURE_NETWORK, CAPTURE_URL_PATTERN, DRIFT_VERIFY_PAGES, HEADLESS, MAX_PAGES,
+    PAGE_LOAD_TIMEOUT, PAGE_PAUSE_SECONDS, RENDER_WAIT_SECONDS,
+)
+from app.drift import DriftTracker
+from app.text import announce_seq
+from app.logger import get_logger, reset_log_context, set_log_context
 
 logger = get_logger("goszakup.parser")
 
@@ -40,6 +53,9 @@ logger = get_logger("goszakup.parser")
 # ---------------------------------------------------------------------------
 
 def _build_driver() -> webdriver.Chrome:
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
     opts = Options()
 
     if HEADLESS:
@@ -57,35 +73,74 @@ def _build_driver() -> webdriver.Chrome:
         "Chrome/122.0.0.0 Safari/537.36"
     )
 
+    if CAPTURE_NETWORK:
+        # Network.* события попадают в driver.get_log("performance")
+        opts.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
     driver = webdriver.Chrome(options=opts)
     driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+    if CAPTURE_NETWORK:
+        driver.execute_cdp_cmd("Network.enable", {})
 
     return driver
 
 
+TABLE_SELECTOR = "table tbody tr td"
+
+
 def _wait_for_table(driver: webdriver.Chrome) -> bool:
     """Ждём пока таблица лотов отрендерится JS-ом."""
+    return _wait_for(driver, TABLE_SELECTOR)
+
+
+def _wait_for(driver: webdriver.Chrome, selector: str) -> bool:
+    """Ждём появления элемента по CSS-селектору (условие готовности страницы)."""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+
     try:
         WebDriverWait(driver, PAGE_LOAD_TIMEOUT).until(
-            EC.presence_of_element_located(
-                (By.CSS_SELECTOR, "table tbody tr td")
-            )
+            EC.presence_of_element_located((By.CSS_SELECTOR, selector))
         )
         # Дополнительно ждём исчезновения спиннера «Подождите, идет загрузка»
-        time.sleep(2)
+        time.sleep(RENDER_WAIT_SECONDS)
         return True
     except Exception:
         time.sleep(5)
         return False
 
 
+def _open_driver(pool: Optional[DriverPool]):
+    """Драйвер из общего пула источников или свой (однократный запуск)."""
+    if pool is not None:
+        return pool.acquire()
+    driver = _build_driver()
+    logger.info("WebDriver инициализирован")
+    return driver
+
+
+def _close_driver(driver, pool: Optional[DriverPool], broken: bool = False) -> None:
+    if pool is not None:
+        pool.release(driver, broken)
+        return
+    driver.quit()
+    logger.info("WebDriver закрыт")
+
+
 # ---------------------------------------------------------------------------
 # Хеш и вспомогательные утилиты
 # ---------------------------------------------------------------------------
 
-def _make_hash(lot_number: str, announce_number: str, lot_name: str) -> str:
+def _make_hash(lot_number: str, announce_number: str, lot_name: str) -> bytes:
+    """SHA256-дайджест (32 байта) — ключ дедупликации, хранится как BINARY(32)."""
     raw = f"{lot_number}|{announce_number}|{lot_name}".lower().strip()
-    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+    return hashlib.sha256(raw.encode("utf-8")).digest()
+
+
+def hash_prefix(digest: bytes) -> int:
+    """Первые 8 байт хеша как знаковый BIGINT — компактный ключ для проб по индексу."""
+    return int.from_bytes(digest[:8], "big", signed=True)
 
 
 def _parse_amount(text: str) -> Optional[float]:
@@ -187,7 +242,6 @@ def _parse_row(tr: Tag) -> Optional[dict]:
 
     # --- Ячейка 3: Сумма, тг. ---
     amount_raw = _clean_text(cells[3])
-    purchase_amount = _parse_amount(amount_raw)
 
     # --- Ячейка 4: Способ закупки ---
     purchase_method = _clean_text(cells[4])
@@ -195,7 +249,38 @@ def _parse_row(tr: Tag) -> Optional[dict]:
     # --- Ячейка 5: Статус ---
     status = _clean_text(cells[5])
 
-    # --- Уникальный хеш ---
+    return _build_lot(
+        lot_number=lot_number,
+        announce_number=announce_number,
+        announce_name=announce_name,
+        announce_url=announce_url,
+        lot_name=lot_name,
+        lot_url=lot_url,
+        customer_name=customer_name,
+        quantity=quantity_str,
+        amount_raw=amount_raw,
+        purchase_method=purchase_method,
+        status=status,
+    )
+
+
+def _build_lot(
+    lot_number: str,
+    announce_number: str,
+    announce_name: str,
+    announce_url: str,
+    lot_name: str,
+    lot_url: str,
+    customer_name: str,
+    quantity: str,
+    amount_raw: str,
+    purchase_method: str,
+    status: str,
+) -> dict:
+    """
+    Нормализованный dict лота из «сырых» строковых полей строки реестра.
+    Единая точка для всех источников строк (DOM, синтетические данные).
+    """
     unique_hash = _make_hash(lot_number, announce_number, lot_name)
 
     raw_data = json.dumps(
@@ -205,7 +290,7 @@ def _parse_row(tr: Tag) -> Optional[dict]:
             "announce_name": announce_name,
             "lot_name": lot_name,
             "customer_name": customer_name,
-            "quantity": quantity_str,
+            "quantity": quantity,
             "amount": amount_raw,
             "method": purchase_method,
             "status": status,
@@ -215,15 +300,19 @@ def _parse_row(tr: Tag) -> Optional[dict]:
 
     return {
         "unique_hash": unique_hash,
+        "hash_prefix": hash_prefix(unique_hash),
         "lot_number": lot_number or None,
         "announce_number": announce_number or None,
+        "announce_name": announce_name or None,
+        "announce_url": announce_url or None,
         "lot_name": lot_name or None,
         "subject_type": None,
+        "quantity": quantity or None,
         "status": status or None,
         "purchase_method": purchase_method or None,
         "customer_name": customer_name or None,
         "customer_bin": _extract_bin(customer_name),
-        "purchase_amount": purchase_amount,
+        "purchase_amount": _parse_amount(amount_raw),
         "deadline_date": None,
         "publication_date": None,
         "financial_year": None,
@@ -233,6 +322,13 @@ def _parse_row(tr: Tag) -> Optional[dict]:
     }
 
 
+def _older(oldest: Optional[int], row: dict) -> Optional[int]:
+    seq = announce_seq(row.get("announce_number"))
+    if seq is None:
+        return oldest
+    return seq if oldest is None else min(oldest, seq)
+
+
 def _extract_bin(customer_name: str) -> Optional[str]:
     """Извлекаем 12-значный БИН из названия заказчика если есть."""
     if not customer_name:
@@ -245,6 +341,29 @@ def _extract_bin(customer_name: str) -> Optional[str]:
 # Пагинация
 # ---------------------------------------------------------------------------
 
+# Сайт отдаёт не больше 10 000 записей: счётчик «из 10000» значит, что
+# хвост реестра за пределами выдачи
+REGISTRY_WINDOW = 10_000
+
+_COUNTER_RE = re.compile(r"Показано\s+c\s+\d+\s+по\s+(\d+)\s+из\s+([\d\s]+)\s+записей")
+
+def _get_total_records(soup: BeautifulSoup) -> Optional[tuple[int, int]]:
+    """
+    (всего записей, записей на странице) из счётчика
+    "Показано c 1 по 50 из 10000 записей"; None если счётчика нет.
+    """
+    m = _COUNTER_RE.search(soup.get_text())
+    if not m:
+        return None
+    return int(re.sub(r"\s", "", m.group(2))), int(m.group(1))
+
+
+def _source_total(html: str) -> Optional[int]:
+    """Всего записей из счётчика прямо по HTML — без BeautifulSoup."""
+    m = _COUNTER_RE.search(html)
+    return int(re.sub(r"\s", "", m.group(2))) if m else None
+
+
 def _get_total_pages(soup: BeautifulSoup) -> int:
     """
     Определяем количество страниц.
@@ -253,12 +372,9 @@ def _get_total_pages(soup: BeautifulSoup) -> int:
     """
     try:
         # Ищем текст "Показано c X по Y из Z записей"
-        text = soup.get_text()
-        m = re.search(r"Показано\s+c\s+\d+\s+по\s+(\d+)\s+из\s+([\d\s]+)\s+записей", text)
-        if m:
-            per_page = int(m.group(1))
-            total = int(m.group(2).replace(" ", ""))
-            import math
+        counter = _get_total_records(soup)
+        if counter:
+            total, per_page = counter
             pages = math.ceil(total / per_page)
             logger.info(f"Всего записей: {total}, на странице: {per_page}, страниц: {pages}")
             return pages
@@ -278,46 +394,276 @@ def _get_total_pages(soup: BeautifulSoup) -> int:
     return 1
 
 
-def _extract_rows_from_page(driver: webdriver.Chrome) -> list[dict]:
-    """Извлечь все лоты с текущей страницы."""
-    soup = BeautifulSoup(driver.page_source, "lxml")
+LOT_TABLE_HEADERS = ("Способ закупки", "Статус")
 
-    # Ищем таблицу лотов (содержит нужные заголовки)
+
+def _find_row_tags(soup: BeautifulSoup, headers: tuple[str, ...] = LOT_TABLE_HEADERS) -> list[Tag]:
+    """Строки tbody таблицы с заголовками headers (пустой список, если таблицы нет)."""
+
+    # Ищем нужную таблицу (содержит все заголовки)
     target_table = None
     for table in soup.find_all("table"):
         headers_text = table.get_text()
-        if "Способ закупки" in headers_text and "Статус" in headers_text:
+        if all(h in headers_text for h in headers):
             target_table = table
             break
 
     if not target_table:
-        logger.warning("Таблица лотов не найдена на странице")
+        logger.warning("Таблица не найдена на странице")
         return []
 
     tbody = target_table.find("tbody")
     if not tbody:
         return []
 
+    return tbody.find_all("tr")
+
+
+def _page_fingerprint(trs: list[Tag]) -> str:
+    """
+    Отпечаток страницы: SHA256 нормализованного текста всех строк.
+    Считается без _parse_row — только get_text по строкам.
+    """
+    h = hashlib.sha256()
+    for tr in trs:
+        h.update(" ".join(tr.get_text(" ", strip=True).split()).encode("utf-8"))
+        h.update(b"\x1e")
+    return h.hexdigest()
+
+
+def _extract_page(driver: webdriver.Chrome, known_digest: Optional[str] = None) -> tuple[str, Optional[list[dict]]]:
+    """
+    (отпечаток, лоты) текущей страницы. Если отпечаток совпал с known_digest —
+    страница не изменилась с прошлого запуска, строки не разбираются (None).
+    """
+    from bs4 import BeautifulSoup
+
+    trs = _find_row_tags(BeautifulSoup(driver.page_source, "lxml"))
+    digest = _page_fingerprint(trs)
+    if trs and digest == known_digest:
+        return digest, None
+
     results = []
-    for tr in tbody.find_all("tr"):
+    for tr in trs:
         parsed = _parse_row(tr)
         if parsed:
             results.append(parsed)
+    return digest, results
 
-    return results
+
+def _refetch_page(driver: webdriver.Chrome, page_num: int) -> list[dict]:
+    """Перечитать уже пройденную страницу (сдвиг вверх) — всегда через DOM."""
+    driver.get(f"{BASE_URL}?page={page_num}" if page_num > 1 else BASE_URL)
+    _wait_for_table(driver)
+    return _extract_page(driver)[1]
+
+
+def _extract_rows_from_page(driver: webdriver.Chrome) -> list[dict]:
+    """Извлечь все лоты с текущей страницы."""
+    return _extract_page(driver)[1]
+
+
+# ---------------------------------------------------------------------------
+# Перехват сетевого ответа (CAPTURE_NETWORK)
+# ---------------------------------------------------------------------------
+
+# Ключ списка лотов в JSON-ответе и поля лота → аргументы _build_lot
+# (берётся первый найденный ключ)
+PAYLOAD_ITEM_KEYS = ("items", "data", "lots", "rows", "result")
+PAYLOAD_FIELDS = {
+    "lot_number": ("lot_number", "lotNumber", "number_lot"),
+    "announce_number": ("announce_number", "announceNumber", "number_anno"),
+    "announce_name": ("announce_name", "announceName", "name_anno"),
+    "announce_url": ("announce_url", "announceUrl"),
+    "lot_name": ("lot_name", "lotName", "name_ru"),
+    "lot_url": ("lot_url", "lotUrl"),
+    "customer_name": ("customer_name", "customerName", "customer_name_ru"),
+    "quantity": ("quantity", "count"),
+    "amount_raw": ("amount", "amount_raw", "sum"),
+    "purchase_method": ("method", "purchase_method", "trade_method"),
+    "status": ("status", "lot_status"),
+}
+
+# Столько страниц подряд без ответа — дальше в этом запуске только DOM
+CAPTURE_MISS_LIMIT = 3
+
+
+def _payload_text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, dict):  # справочники вида {"id": 1, "name_ru": "..."}
+        value = value.get("name_ru") or value.get("name") or ""
+    return " ".join(str(value).split())
+
+
+def _lots_from_payload(payload) -> Optional[list[dict]]:
+    """
+    JSON-ответ реестра → лоты в схеме _parse_row. None, если это не
+    список лотов (нет списка или у элементов нет ни номера, ни названия).
+    """
+    items = payload
+    if isinstance(payload, dict):
+        items = next((payload[k] for k in PAYLOAD_ITEM_KEYS if isinstance(payload.get(k), list)), None)
+    if not isinstance(items, list):
+        return None
+
+    lots = []
+    for item in items:
+        if not isinstance(item, dict):
+            return None
+        fields = {
+            arg: _payload_text(next((item[k] for k in keys if k in item), None))
+            for arg, keys in PAYLOAD_FIELDS.items()
+        }
+        if not fields["lot_number"] and not fields["lot_name"]:
+            return None
+        for url_field in ("announce_url", "lot_url"):
+            if fields[url_field].startswith("/"):
+                fields[url_field] = "https://www.goszakup.gov.kz" + fields[url_field]
+        if not fields["announce_number"] and fields["announce_name"]:
+            fields["announce_number"] = fields["announce_name"].split()[0]
+        lots.append(_build_lot(**fields))
+    return lots
+
+
+def _response_lots(driver: webdriver.Chrome, request_id: str) -> Optional[list[dict]]:
+    try:
+        body = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+        text = body["body"]
+        if body.get("base64Encoded"):
+            text = base64.b64decode(text).decode("utf-8")
+        return _lots_from_payload(json.loads(text))
+    except Exception as e:
+        logger.debug(f"Ответ {request_id} не разобран: {e}")
+        return None
+
+
+def _capture_lots(driver: webdriver.Chrome, timeout: float = PAGE_LOAD_TIMEOUT) -> Optional[list[dict]]:
+    """
+    Ждём в performance-логе ответ с URL по CAPTURE_URL_PATTERN, который
+    загрузился целиком (Network.loadingFinished), и разбираем его тело.
+    Перед driver.get лог нужно опустошить (driver.get_log).
+    """
+    pattern = re.compile(CAPTURE_URL_PATTERN)
+    pending: set[str] = set()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        for entry in driver.get_log("performance"):
+            message = json.loads(entry["message"])["message"]
+            method, params = message.get("method"), message.get("params", {})
+            if method == "Network.responseReceived" and pattern.search(params["response"]["url"]):
+                pending.add(params["requestId"])
+            elif method == "Network.loadingFinished" and params.get("requestId") in pending:
+                pending.discard(params["requestId"])
+                lots = _response_lots(driver, params["requestId"])
+                if lots is not None:
+                    return lots
+        time.sleep(0.05)
+    return None
+
+
+def _payload_page(lots: list[dict], known_digest: Optional[str] = None) -> tuple[str, Optional[list[dict]]]:
+    """То же, что _extract_page, для лотов из перехваченного ответа."""
+    h = hashlib.sha256()
+    for lot in lots:
+        h.update(lot["raw_data"].encode("utf-8"))
+        h.update(b"\x1e")
+    digest = h.hexdigest()
+    if lots and digest == known_digest:
+        return digest, None
+    return digest, lots
 
 
 # ---------------------------------------------------------------------------
 # Основной генератор
 # ---------------------------------------------------------------------------
 
-def parse_all_lots() -> Generator[dict, None, None]:
+def probe_head(size: int, pool: Optional[DriverPool] = None) -> dict:
+    """
+    Дешёвая проверка «изменился ли реестр»: только первая страница.
+    Возвращает {"total_records": int | None, "head_hashes": [первые size хешей]}.
+    """
+    from bs4 import BeautifulSoup
+
+    driver = _open_driver(pool)
+    broken = False
+    try:
+        driver.get(BASE_URL)
+        _wait_for_table(driver)
+        counter = _get_total_records(BeautifulSoup(driver.page_source, "lxml"))
+        rows = _extract_rows_from_page(driver)
+        return {
+            "total_records": counter[0] if counter else None,
+            "head_hashes": [row["unique_hash"].hex() for row in rows[:size]],
+        }
+    except Exception:
+        broken = True
+        raise
+    finally:
+        _close_driver(driver, pool, broken)
+
+
+def parse_all_lots(
+    run_info: Optional[dict] = None,
+    fingerprints: Optional[dict[int, str]] = None,
+    on_page: Optional[Callable[[int], None]] = None,
+    pool: Optional[DriverPool] = None,
+) -> Generator[dict, None, None]:
     """
     Генератор: обходит ВСЕ страницы реестра лотов и отдаёт нормализованные лоты.
     Сайт показывает максимум 10 000 записей (200 страниц × 50 записей).
+
+    fingerprints — {номер страницы: отпечаток} прошлого запуска. Страница
+    (кроме 1-й, куда попадают новые лоты) с тем же отпечатком пропускается
+    целиком: строки не разбираются и не отдаются.
+
+    on_page(номер) вызывается на границе каждой страницы (профилирование).
+
+    pool — общий пул браузеров источников (app/sources/pool.py): драйвер
+    берётся из него и расходует общий бюджет запросов. Без pool запускается
+    и закрывается свой Chrome.
+
+    При CAPTURE_NETWORK страницы со 2-й берутся из перехваченного
+    JSON-ответа; после CAPTURE_MISS_LIMIT промахов подряд — снова DOM.
+
+    run_info (если передан) заполняется сведениями об обходе:
+    total_records, pages_parsed, cache_hits, cache_misses,
+    capture_hits, capture_misses, page_digests — {страница: (отпечаток,
+    строк)} для промахов кеша, sweep_complete (пройдены все страницы
+    выдачи без ошибок и без MAX_PAGES), window_boundary и счётчики
+    дрейфа пагинации drift_* (app/drift.py).
+
+    Сайт отдаёт не больше REGISTRY_WINDOW записей, от новых к старым.
+    window_boundary — наименьший номер объявления (announce_seq), до
+    которого дошёл обход: всё новее него обход обязан был увидеть. None —
+    счётчик меньше окна, обход видел весь реестр.
+
+    Лоты, уже отданные в этом запуске, повторно не отдаются. После
+    замеченного дрейфа кеш страниц до конца запуска не используется:
+    границы страниц сдвинуты, а сравнивать соседние страницы можно
+    только по разобранным строкам.
     """
-    driver = _build_driver()
-    logger.info("WebDriver инициализирован")
+    from bs4 import BeautifulSoup
+
+    if run_info is None:
+        run_info = {}
+    run_info.setdefault("pages_parsed", 0)
+    run_info.setdefault("cache_hits", 0)
+    run_info.setdefault("cache_misses", 0)
+    run_info.setdefault("page_digests", {})
+    run_info.setdefault("capture_hits", 0)
+    run_info.setdefault("capture_misses", 0)
+    run_info["sweep_complete"] = False
+    page_errors = 0
+    tracker = DriftTracker()
+    oldest_seq: Optional[int] = None
+    fingerprints = fingerprints or {}
+    capture = CAPTURE_NETWORK
+    capture_misses_in_row = 0
+
+    driver = _open_driver(pool)
+    broken = False
+    context_token = set_log_context()
 
     try:
         logger.info(f"Загружаем первую страницу: {BASE_URL}")
@@ -329,8 +675,12 @@ def parse_all_lots() -> Generator[dict, None, None]:
             time.sleep(10)
 
         soup_first = BeautifulSoup(driver.page_source, "lxml")
+        counter = _get_total_records(soup_first)
+        run_info["total_records"] = counter[0] if counter else None
         total_pages = _get_total_pages(soup_first)
+        tracker.total = run_info["total_records"]
 
+        truncated = MAX_PAGES > 0 and total_pages > MAX_PAGES
         if MAX_PAGES > 0:
             total_pages = min(total_pages, MAX_PAGES)
             logger.info(f"MAX_PAGES={MAX_PAGES}, обработаем {total_pages} стр.")
@@ -338,35 +688,112 @@ def parse_all_lots() -> Generator[dict, None, None]:
         logger.info(f"Начинаем обход {total_pages} страниц...")
 
         for page_num in range(1, total_pages + 1):
+            set_log_context(page=page_num)
+            if on_page is not None:
+                on_page(page_num)
+            t_page = time.perf_counter()
+            captured = None
             if page_num > 1:
                 url = f"{BASE_URL}?page={page_num}"
                 logger.info(f"→ Страница {page_num}/{total_pages}: {url}")
                 try:
+                    if capture:
+                        driver.get_log("performance")  # записи прошлой страницы не нужны
                     driver.get(url)
-                    _wait_for_table(driver)
+                    if capture:
+                        captured = _capture_lots(driver)
+                        if captured is not None:
+                            run_info["capture_hits"] += 1
+                            capture_misses_in_row = 0
+                        else:
+                            run_info["capture_misses"] += 1
+                            capture_misses_in_row += 1
+                            logger.warning("  Ответ с данными не перехвачен — разбираем DOM")
+                            if capture_misses_in_row >= CAPTURE_MISS_LIMIT:
+                                capture = False
+                                logger.warning(f"  {CAPTURE_MISS_LIMIT} промаха подряд — перехват отключён до конца запуска")
+                    if captured is None:
+                        _wait_for_table(driver)
                 except Exception as e:
                     logger.error(f"Ошибка загрузки страницы {page_num}: {e}")
+                    page_errors += 1
+                    tracker.skip_page()
                     time.sleep(5)
                     continue
             else:
                 logger.info(f"→ Страница 1/{total_pages}")
 
-            rows = _extract_rows_from_page(driver)
-            logger.info(f"  Найдено лотов: {len(rows)}")
+            known = fingerprints.get(page_num) if page_num > 1 and not tracker.drifted else None
+            t_loaded = time.perf_counter()
+            if captured is not None:
+                digest, rows = _payload_page(captured, known)
+            else:
+                digest, rows = _extract_page(driver, known)
+            run_info["pages_parsed"] += 1
+            timings = {
+                "load_s": round(t_loaded - t_page, 3),
+                "parse_s": round(time.perf_counter() - t_loaded, 3),
+            }
+
+            if rows is None:
+                tracker.skip_page()
+                run_info["cache_hits"] += 1
+                logger.info("  Страница не изменилась (отпечаток совпал) — пропускаем",
+                            extra={"timings": timings, "cache_hit": True})
+                time.sleep(PAGE_PAUSE_SECONDS)
+                continue
+
+            run_info["cache_misses"] += 1
+            run_info["page_digests"][page_num] = (digest, len(rows))
+            logger.info(f"  Найдено лотов: {len(rows)}", extra={"timings": timings, "rows": len(rows)})
 
             if not rows:
                 logger.warning(f"  Страница {page_num} пуста — останавливаем обход")
+                truncated = truncated or page_num < total_pages
                 break
 
-            for row in rows:
+            fresh = tracker.accept(rows)
+            if len(fresh) < len(rows):
+                logger.info(f"  Дрейф: {len(rows) - len(fresh)} лотов уже были на прошлых страницах — отброшены")
+            shift = tracker.check_total(_source_total(driver.page_source)) if page_num > 1 else 0
+
+            for row in fresh:
+                oldest_seq = _older(oldest_seq, row)
                 yield row
 
+            if shift:
+                logger.warning(f"  Счётчик записей уменьшился на {shift} — перечитываем страницу {page_num - 1}")
+            verify = page_num > 1 and (
+                shift or tracker.overlap
+                or (DRIFT_VERIFY_PAGES and page_num % DRIFT_VERIFY_PAGES == 0)
+            )
+            if verify:
+                # Реестр мог сдвинуться вверх: начало этой страницы — уехать на прошлую
+                try:
+                    recovered = tracker.accept_refetch(_refetch_page(driver, page_num - 1))
+                except Exception as e:
+                    logger.error(f"  Не удалось перечитать страницу {page_num - 1}: {e}")
+                    recovered = []
+                if recovered:
+                    logger.info(f"  Восстановлено после сдвига: {len(recovered)}")
+                for row in recovered:
+                    oldest_seq = _older(oldest_seq, row)
+                    yield row
+
             # Пауза между страницами — не перегружаем сервер
-            time.sleep(1.5)
+            time.sleep(PAGE_PAUSE_SECONDS)
+
+        tracker.finish()
+        total = run_info["total_records"]
+        run_info["sweep_complete"] = not truncated and not page_errors and not tracker.skipped
+        # Выдача обрезана окном сайта: полный обход — только до самого старого увиденного объявления
+        run_info["window_boundary"] = None if total is not None and total < REGISTRY_WINDOW else oldest_seq
 
     except Exception as e:
+        broken = True
         logger.exception(f"Критическая ошибка парсера: {e}")
         raise
     finally:
-        driver.quit()
-        logger.info("WebDriver закрыт")
+        run_info.update(tracker.summary())
+        _close_driver(driver, pool, broken)
+        reset_log_context(context_token)
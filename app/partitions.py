@@ -0,0 +1,201 @@
+"""
+Помесячные RANGE-партиции таблицы lots (только MySQL).
+
+  PARTITION BY RANGE COLUMNS(created_at) (
+      PARTITION p202609 VALUES LESS THAN ('2026-10-01'),
+      PARTITION p202610 VALUES LESS THAN ('2026-11-01'),
+      ...
+      PARTITION pmax    VALUES LESS THAN (MAXVALUE)
+  )
+
+Вставка идёт в текущую партицию, её индексы остаются маленькими, и
+скорость INSERT не падает с ростом истории. Запросы с условием по
+created_at читают только нужные партиции (проверка — `partitions explain`).
+
+Обслуживание (`python -m app.main partitions …`, планировщик — раз в сутки):
+  ensure  — заранее нарезать PARTITIONS_AHEAD будущих месяцев из пустой pmax;
+  archive — старше LOTS_RETENTION_MONTHS: EXCHANGE PARTITION в отдельную
+            таблицу lots_archive_pYYYYMM (мгновенно) и DROP PARTITION;
+  drop    — то же без сохранения архива.
+
+Перед выносом партиции из lots удаляются зависимые строки её лотов
+(DEPENDENT_TABLES: active_lots, сигнатуры и корзины почти-дублей, ценовые
+скоры, совпадения watchlist, lot_hashes) и суточные агрегаты её дней —
+иначе они ссылались бы на лоты, которых в lots больше нет. Лот из
+архивного месяца, снова встреченный в реестре, вставится как новый.
+
+Ограничение MySQL: уникальные ключи партиционированной таблицы обязаны
+содержать created_at, поэтому PK — (id, created_at), а uq_lot_hash —
+(unique_hash, created_at). Глобальную уникальность хеша держит
+непартиционированная lot_hashes (app/lot_hashes.py) — писателей несколько
+(обход, реестры-источники, backfill).
+
+На SQLite все функции — no-op: партиций там нет.
+"""
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.logger import get_logger
+
+logger = get_logger("goszakup.partitions")
+
+TABLE = "lots"
+MAX_PARTITION = "pmax"
+
+# Таблицы со строками на лот (колонка lot_id) и суточные агрегаты (колонка day)
+DEPENDENT_TABLES = (
+    "active_lots", "lot_signatures", "lot_lsh_buckets", "lot_price_scores", "watchlist_matches", "lot_hashes",
+)
+ROLLUP_TABLES = ("lot_daily_rollups", "customer_daily_rollups")
+
+# Типовые запросы с фильтром по дате: их план должен читать 1–2 партиции
+EXPLAIN_QUERIES = {
+    "export --since": "SELECT id FROM lots WHERE created_at >= :since ORDER BY id LIMIT 1000",
+    "новые за сутки": "SELECT COUNT(*) FROM lots WHERE created_at >= :since",
+    "статусы за месяц": (
+        "SELECT status, COUNT(*) FROM lots WHERE created_at >= :since AND created_at < :until "
+        "GROUP BY status"
+    ),
+}
+
+
+@dataclass
+class Partition:
+    name: str
+    upper: Optional[date]   # VALUES LESS THAN; None — MAXVALUE
+    rows: int = 0
+
+
+def month_start(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+
+def add_months(d: date, months: int) -> date:
+    index = d.year * 12 + d.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"p{month:%Y%m}"
+
+
+def _definition(month: date) -> str:
+    return f"PARTITION {partition_name(month)} VALUES LESS THAN ('{add_months(month, 1):%Y-%m-%d}')"
+
+
+def partition_clause(first_month: date, last_month: date) -> str:
+    """PARTITION BY … для месяцев first_month..last_month включительно + pmax."""
+    months = []
+    month = month_start(first_month)
+    while month <= last_month:
+        months.append(_definition(month))
+        month = add_months(month, 1)
+    months.append(f"PARTITION {MAX_PARTITION} VALUES LESS THAN (MAXVALUE)")
+    return "PARTITION BY RANGE COLUMNS(created_at) (\n    " + ",\n    ".join(months) + "\n)"
+
+
+def is_supported(conn: Connection) -> bool:
+    return conn.dialect.name == "mysql"
+
+
+def list_partitions(conn: Connection) -> list[Partition]:
+    """Партиции lots по порядку; пустой список — таблица не партиционирована."""
+    if not is_supported(conn):
+        return []
+    rows = conn.execute(text(
+        "SELECT PARTITION_NAME, PARTITION_DESCRIPTION, TABLE_ROWS FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table AND PARTITION_NAME IS NOT NULL "
+        "ORDER BY PARTITION_ORDINAL_POSITION"
+    ), {"table": TABLE})
+    partitions = []
+    for name, description, table_rows in rows:
+        upper = None if description == "MAXVALUE" else date.fromisoformat(description.strip("'")[:10])
+        partitions.append(Partition(name, upper, int(table_rows or 0)))
+    return partitions
+
+
+def ensure_statement(partitions: list[Partition], today: date, ahead: int) -> Optional[str]:
+    """
+    REORGANIZE PARTITION pmax, добавляющий недостающие месяцы до
+    today + ahead; None, если всё уже нарезано.
+    """
+    bounded = [p.upper for p in partitions if p.upper is not None]
+    if not bounded:
+        return None
+    month = max(bounded)   # верхняя граница последней партиции = первый ненарезанный месяц
+    target = add_months(month_start(today), ahead)
+    months = []
+    while month <= target:
+        months.append(_definition(month))
+        month = add_months(month, 1)
+    if not months:
+        return None
+    months.append(f"PARTITION {MAX_PARTITION} VALUES LESS THAN (MAXVALUE)")
+    return (
+        f"ALTER TABLE {TABLE} REORGANIZE PARTITION {MAX_PARTITION} INTO (\n    "
+        + ",\n    ".join(months) + "\n)"
+    )
+
+
+def expired(partitions: list[Partition], today: date, retention_months: int) -> list[Partition]:
+    """Партиции, целиком лежащие раньше начала окна хранения."""
+    if retention_months <= 0:
+        return []
+    cutoff = add_months(month_start(today), -retention_months)
+    return [p for p in partitions if p.upper is not None and p.upper <= cutoff]
+
+
+def purge_statements(partition: Partition) -> list[str]:
+    """DELETE зависимых строк лотов партиции и агрегатов её дней (до выноса из lots)."""
+    ids = f"SELECT id FROM {TABLE} PARTITION ({partition.name})"
+    statements = [f"DELETE FROM {table} WHERE lot_id IN ({ids})" for table in DEPENDENT_TABLES]
+    # Партиции уходят по порядку, все более ранние дни уже вынесены
+    statements += [f"DELETE FROM {table} WHERE day < '{partition.upper:%Y-%m-%d}'" for table in ROLLUP_TABLES]
+    return statements
+
+
+def ensure(conn: Connection, today: date, ahead: int) -> int:
+    """Нарезать будущие партиции; возвращает число добавленных."""
+    partitions = list_partitions(conn)
+    stmt = ensure_statement(partitions, today, ahead)
+    if stmt is None:
+        return 0
+    conn.execute(text(stmt))
+    added = stmt.count("PARTITION p") - 1  # без pmax
+    logger.info(f"Партиции lots: добавлено {added} (до {add_months(month_start(today), ahead):%Y-%m})")
+    return added
+
+
+def archive(conn: Connection, today: date, retention_months: int, keep_archive: bool = True) -> list[str]:
+    """
+    Вынести старые партиции из lots: EXCHANGE в lots_archive_<имя> (только
+    обмен метаданными) и DROP PARTITION. keep_archive=False — просто DROP.
+    """
+    done = []
+    for p in expired(list_partitions(conn), today, retention_months):
+        for stmt in purge_statements(p):
+            conn.execute(text(stmt))
+        if keep_archive:
+            archive_table = f"{TABLE}_archive_{p.name}"
+            conn.execute(text(f"CREATE TABLE IF NOT EXISTS {archive_table} LIKE {TABLE}"))
+            conn.execute(text(f"ALTER TABLE {archive_table} REMOVE PARTITIONING"))
+            conn.execute(text(f"ALTER TABLE {TABLE} EXCHANGE PARTITION {p.name} WITH TABLE {archive_table}"))
+            logger.info(f"Партиция {p.name} ({p.rows} строк) → {archive_table}")
+        conn.execute(text(f"ALTER TABLE {TABLE} DROP PARTITION {p.name}"))
+        done.append(p.name)
+    return done
+
+
+def explain(conn: Connection, since: date, until: date) -> dict[str, list[str]]:
+    """{запрос: партиции из EXPLAIN} — проверка pruning по created_at."""
+    if not is_supported(conn):
+        return {}
+    result = {}
+    for label, sql in EXPLAIN_QUERIES.items():
+        row = conn.execute(text("EXPLAIN " + sql), {"since": since, "until": until}).mappings().first()
+        result[label] = (row.get("partitions") or "").split(",") if row else []
+    return result
@@ -0,0 +1,346 @@
+"""
+Скоринг аномальных цен лотов.
+
+Лоты группируются по (стеммированный ключ названия, способ закупки).
+Для каждой группы храним гистограмму log10(purchase_amount) с фиксированной
+сеткой — из неё векторно получаются медиана, MAD и квантили, а новые лоты
+просто добавляются в гистограмму (без пересканирования истории). Когда у
+известного лота меняется сумма или способ закупки, save_batch вычитает его
+старую сумму из гистограммы (forget_lots), и лот оценивается заново.
+
+  score = (log10(сумма) − медиана) / (1.4826 · MAD)
+
+score > 3 — сумма заметно выше типичной для таких лотов.
+"""
+import hashlib
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional, Sequence
+
+import numpy as np
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from app.database import insert_ignore
+from app.logger import get_logger
+from app.models import Lot, LotPriceScore, PriceGroupStats
+from app.text import tokenize
+
+logger = get_logger("goszakup.price_anomaly")
+
+# Сетка log10(суммы): 1 тг … 10^12 тг с шагом 0.02 (≈4.7 %)
+HIST_MIN = 0.0
+HIST_MAX = 12.0
+HIST_BINS = 600
+BIN_WIDTH = (HIST_MAX - HIST_MIN) / HIST_BINS
+BIN_CENTERS = HIST_MIN + (np.arange(HIST_BINS) + 0.5) * BIN_WIDTH
+
+NAME_KEY_TOKENS = 3
+MIN_GROUP_SIZE = 5
+MAD_SCALE = 1.4826  # MAD → σ для нормального распределения
+
+# Статистику считаем кусками, чтобы матрица групп × бинов не разрасталась
+_STATS_CHUNK = 4096
+
+
+@lru_cache(maxsize=262_144)
+def group_key(lot_name: Optional[str], purchase_method: Optional[str]) -> tuple[int, str]:
+    """
+    (64-битный ключ группы, читаемый ключ названия). Кешируется: названия
+    в реестре сильно повторяются, а токенизация — самая дорогая часть.
+    """
+    name_key = " ".join(tokenize(lot_name or "")[:NAME_KEY_TOKENS])
+    digest = hashlib.blake2b(f"{name_key}|{purchase_method or ''}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True), name_key
+
+
+def to_bins(log_amounts: np.ndarray) -> np.ndarray:
+    idx = ((log_amounts - HIST_MIN) / BIN_WIDTH).astype(np.int64)
+    return np.clip(idx, 0, HIST_BINS - 1)
+
+
+def _weighted_quantile_bins(hist: np.ndarray, q: float) -> np.ndarray:
+    """Индекс бина q-квантиля для каждой строки гистограммы."""
+    cdf = np.cumsum(hist, axis=1)
+    target = q * cdf[:, -1:]
+    return np.argmax(cdf >= np.maximum(target, 1), axis=1)
+
+
+def histogram_stats(hist: np.ndarray) -> dict[str, np.ndarray]:
+    """
+    Медиана, MAD и квантили по гистограммам (строка = группа).
+    Всё в единицах log10(суммы).
+    """
+    out = {k: np.empty(len(hist)) for k in ("count", "median", "mad", "q25", "q75", "q90")}
+    for start in range(0, len(hist), _STATS_CHUNK):
+        h = hist[start:start + _STATS_CHUNK].astype(np.int64)
+        sl = slice(start, start + len(h))
+        out["count"][sl] = h.sum(axis=1)
+        median = BIN_CENTERS[_weighted_quantile_bins(h, 0.5)]
+        out["median"][sl] = median
+        out["q25"][sl] = BIN_CENTERS[_weighted_quantile_bins(h, 0.25)]
+        out["q75"][sl] = BIN_CENTERS[_weighted_quantile_bins(h, 0.75)]
+        out["q90"][sl] = BIN_CENTERS[_weighted_quantile_bins(h, 0.90)]
+
+        # MAD: взвешенная медиана |центр бина − медиана|
+        dev = np.abs(BIN_CENTERS[None, :] - median[:, None])
+        order = np.argsort(dev, axis=1)
+        dev_sorted = np.take_along_axis(dev, order, axis=1)
+        cdf = np.cumsum(np.take_along_axis(h, order, axis=1), axis=1)
+        half = np.maximum(0.5 * cdf[:, -1:], 1)
+        out["mad"][sl] = dev_sorted[np.arange(len(h)), np.argmax(cdf >= half, axis=1)]
+    return out
+
+
+def robust_scores(log_amounts: np.ndarray, median: np.ndarray, mad: np.ndarray, count: np.ndarray) -> np.ndarray:
+    """Робастный z-score; NaN для групп меньше MIN_GROUP_SIZE."""
+    scale = MAD_SCALE * np.maximum(mad, BIN_WIDTH)
+    scores = (log_amounts - median) / scale
+    scores[count < MIN_GROUP_SIZE] = np.nan
+    return scores
+
+
+# ---------------------------------------------------------------------------
+# Загрузка колонками
+# ---------------------------------------------------------------------------
+
+def _load_columns(rows: Sequence) -> tuple[np.ndarray, np.ndarray, list[tuple[int, str, Optional[str]]]]:
+    """
+    (id, lot_name, purchase_method, purchase_amount) → массивы id и log10(суммы)
+    + ключи групп. Лоты без суммы отбрасываются.
+    """
+    ids, amounts, keys = [], [], []
+    for lot_id, lot_name, method, amount in rows:
+        if amount is None or amount <= 0:
+            continue
+        key, name_key = group_key(lot_name, method)
+        ids.append(lot_id)
+        amounts.append(float(amount))
+        keys.append((key, name_key, method))
+    return (
+        np.asarray(ids, dtype=np.int64),
+        np.log10(np.asarray(amounts, dtype=np.float64)) if amounts else np.empty(0),
+        keys,
+    )
+
+
+def _stats_rows(keys: list[int], meta: dict, hist: np.ndarray, stats: dict, now: datetime) -> list[dict]:
+    return [
+        {
+            "group_key": key,
+            "name_key": meta[key][0][:200],
+            "purchase_method": meta[key][1],
+            "lot_count": int(stats["count"][i]),
+            "histogram": hist[i].astype(np.uint32).tobytes(),
+            "median": float(stats["median"][i]),
+            "mad": float(stats["mad"][i]),
+            "q25": float(stats["q25"][i]),
+            "q75": float(stats["q75"][i]),
+            "q90": float(stats["q90"][i]),
+            "updated_at": now,
+        }
+        for i, key in enumerate(keys)
+    ]
+
+
+def _score_rows(ids, group_keys, scores, now) -> list[dict]:
+    return [
+        {
+            "lot_id": int(lot_id),
+            "group_key": int(key),
+            "score": None if np.isnan(score) else round(float(score), 4),
+            "scored_at": now,
+        }
+        for lot_id, key, score in zip(ids, group_keys, scores)
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Инкремент после запуска и полный пересчёт
+# ---------------------------------------------------------------------------
+
+def update_for_lots(db: Session, rows: Sequence) -> int:
+    """
+    Инкрементальное обновление: добавляем новые лоты в гистограммы их групп
+    (читаются только затронутые группы), пересчитываем статистику этих групп
+    и скорим новые лоты. rows — (id, lot_name, purchase_method, purchase_amount).
+    Без commit. Возвращает число оценённых лотов.
+    """
+    ids, logs, keys = _load_columns(rows)
+    if not len(ids):
+        return 0
+
+    meta = {k: (name_key, method) for k, name_key, method in keys}
+    touched = list(meta)
+    index = {k: i for i, k in enumerate(touched)}
+
+    hist = np.zeros((len(touched), HIST_BINS), dtype=np.int64)
+    existing = set()
+    for key, raw in db.execute(
+        select(PriceGroupStats.group_key, PriceGroupStats.histogram)
+        .where(PriceGroupStats.group_key.in_(touched))
+    ):
+        hist[index[key]] = np.frombuffer(raw, dtype=np.uint32)
+        existing.add(key)
+
+    group_idx = np.fromiter((index[k] for k, _, _ in keys), dtype=np.int64, count=len(keys))
+    np.add.at(hist, (group_idx, to_bins(logs)), 1)
+
+    stats = histogram_stats(hist)
+    now = datetime.utcnow()
+    stat_rows = _stats_rows(touched, meta, hist, stats, now)
+
+    updates = [r for r in stat_rows if r["group_key"] in existing]
+    inserts = [r for r in stat_rows if r["group_key"] not in existing]
+    if updates:
+        db.execute(update(PriceGroupStats), updates)
+    if inserts:
+        db.execute(insert_ignore(PriceGroupStats.__table__, db.get_bind().dialect.name), inserts)
+
+    scores = robust_scores(logs, stats["median"][group_idx], stats["mad"][group_idx], stats["count"][group_idx])
+    group_keys = [k for k, _, _ in keys]
+    db.execute(
+        insert_ignore(LotPriceScore.__table__, db.get_bind().dialect.name),
+        _score_rows(ids, group_keys, scores, now),
+    )
+    return len(ids)
+
+
+def forget_lots(db: Session, rows: Sequence) -> int:
+    """
+    Сумма или способ закупки уже оценённого лота изменились: его старая
+    сумма вычитается из гистограммы группы (статистика группы
+    пересчитывается), а скор удаляется — следующий update_after_run оценит
+    лот заново уже в новой группе и с новой суммой. rows — (id, старая
+    сумма). Без commit. Возвращает число забытых лотов.
+    """
+    amounts = {lot_id: amount for lot_id, amount in rows}
+    if not amounts:
+        return 0
+    scored = dict(db.execute(
+        select(LotPriceScore.lot_id, LotPriceScore.group_key).where(LotPriceScore.lot_id.in_(list(amounts)))
+    ).all())
+    if not scored:
+        return 0
+
+    meta, hist_rows = {}, {}
+    for key, name_key, method, raw in db.execute(
+        select(PriceGroupStats.group_key, PriceGroupStats.name_key, PriceGroupStats.purchase_method,
+               PriceGroupStats.histogram)
+        .where(PriceGroupStats.group_key.in_(set(scored.values())))
+    ):
+        meta[key] = (name_key, method)
+        hist_rows[key] = np.frombuffer(raw, dtype=np.uint32).astype(np.int64)
+    touched = list(hist_rows)
+    if touched:
+        index = {k: i for i, k in enumerate(touched)}
+        hist = np.stack([hist_rows[k] for k in touched])
+        removed = [(index[key], float(amounts[lot_id])) for lot_id, key in scored.items()
+                   if key in index and amounts[lot_id] is not None and amounts[lot_id] > 0]
+        if removed:
+            group_idx = np.asarray([g for g, _ in removed], dtype=np.int64)
+            np.subtract.at(hist, (group_idx, to_bins(np.log10([a for _, a in removed]))), 1)
+            np.maximum(hist, 0, out=hist)
+            stats = histogram_stats(hist)
+            db.execute(update(PriceGroupStats), _stats_rows(touched, meta, hist, stats, datetime.utcnow()))
+
+    db.execute(delete(LotPriceScore).where(LotPriceScore.lot_id.in_(list(scored))))
+    return len(scored)
+
+
+def update_after_run(db: Session, chunk_size: int = 5000) -> int:
+    """
+    Скоринг всех ещё не оценённых лотов с суммой (LEFT JOIN lot_price_scores
+    … IS NULL, keyset по id): и новых лотов запуска, и записанных в обход
+    run_parse_job (backfill, run_source), и оставшихся от запуска, где
+    скоринг упал, и забытых forget_lots после смены суммы.
+    """
+    scored = 0
+    last_id = 0
+    while True:
+        rows = (
+            db.query(Lot.id, Lot.lot_name, Lot.purchase_method, Lot.purchase_amount)
+            .outerjoin(LotPriceScore, LotPriceScore.lot_id == Lot.id)
+            .filter(Lot.id > last_id, LotPriceScore.lot_id.is_(None), Lot.purchase_amount > 0)
+            .order_by(Lot.id)
+            .limit(chunk_size)
+            .all()
+        )
+        if not rows:
+            break
+        last_id = rows[-1].id
+        scored += update_for_lots(db, rows)
+        db.commit()
+    return scored
+
+
+def rebuild(db: Session, chunk_size: int = 50_000) -> int:
+    """
+    Полный пересчёт: колонки читаются чанками (keyset по id), гистограммы
+    собираются np.add.at, затем статистика и скоры считаются векторно.
+    """
+    all_ids, all_logs, all_groups = [], [], []
+    index: dict[int, int] = {}
+    meta: dict[int, tuple[str, Optional[str]]] = {}
+    hist = np.zeros((1024, HIST_BINS), dtype=np.int64)
+
+    last_id = 0
+    while True:
+        rows = (
+            db.query(Lot.id, Lot.lot_name, Lot.purchase_method, Lot.purchase_amount)
+            .filter(Lot.id > last_id)
+            .order_by(Lot.id)
+            .limit(chunk_size)
+            .all()
+        )
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        ids, logs, keys = _load_columns(rows)
+        for key, name_key, method in keys:
+            if key not in index:
+                index[key] = len(index)
+                meta[key] = (name_key, method)
+        if len(index) > len(hist):
+            grown = np.zeros((max(len(index), 2 * len(hist)), HIST_BINS), dtype=np.int64)
+            grown[:len(hist)] = hist
+            hist = grown
+
+        group_idx = np.fromiter((index[k] for k, _, _ in keys), dtype=np.int64, count=len(keys))
+        np.add.at(hist, (group_idx, to_bins(logs)), 1)
+        all_ids.append(ids)
+        all_logs.append(logs)
+        all_groups.append(group_idx)
+
+    if not index:
+        return 0
+
+    hist = hist[:len(index)]
+    ids = np.concatenate(all_ids)
+    logs = np.concatenate(all_logs)
+    group_idx = np.concatenate(all_groups)
+
+    stats = histogram_stats(hist)
+    scores = robust_scores(logs, stats["median"][group_idx], stats["mad"][group_idx], stats["count"][group_idx])
+
+    keys = list(index)
+    key_arr = np.asarray(keys, dtype=np.int64)
+    now = datetime.utcnow()
+    dialect = db.get_bind().dialect.name
+
+    db.execute(delete(LotPriceScore))
+    db.execute(delete(PriceGroupStats))
+    stat_rows = _stats_rows(keys, meta, hist, stats, now)
+    for start in range(0, len(stat_rows), 5000):
+        db.execute(insert_ignore(PriceGroupStats.__table__, dialect), stat_rows[start:start + 5000])
+    for start in range(0, len(ids), 5000):
+        sl = slice(start, start + 5000)
+        db.execute(
+            insert_ignore(LotPriceScore.__table__, dialect),
+            _score_rows(ids[sl], key_arr[group_idx[sl]], scores[sl], now),
+        )
+    db.commit()
+
+    logger.info(f"Ценовые группы: {len(keys)} | оценено лотов: {len(ids)}")
+    return len(ids)
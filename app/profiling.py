@@ -0,0 +1,159 @@
+"""
+Профилирование запусков парсинга (включается PROFILE, по умолчанию выключено).
+
+  PROFILE=cprofile  — детерминированный cProfile → run_<id>.pstats
+                      (snakeviz / flameprof / python -m pstats)
+  PROFILE=sampling  — сэмплирующий профайлер по стеку потока обхода →
+                      run_<id>.folded (flamegraph.pl, speedscope)
+
+В обоих режимах tracemalloc работает на границах страниц (page_boundary
+из parse_all_lots): на каждой — текущая и пиковая память, раз в
+PROFILE_SNAPSHOT_PAGES страниц — снимок, который сравнивается с
+предыдущим (top аллокаторов за интервал; хранятся только строки сравнения,
+не снимки). Всё это → run_<id>.alloc.txt вместе с приростом за весь
+запуск. Путь к каталогу артефактов пишется в parse_runs.profile_path.
+
+Когда PROFILE пуст, профайлер не создаётся, а parse_all_lots получает
+on_page=None — цена выключенного режима: одна проверка на страницу.
+"""
+import cProfile
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Optional
+
+from app.config import PROFILE_DIR, PROFILE_SAMPLE_MS, PROFILE_SNAPSHOT_PAGES, PROFILE_TOP_ALLOCATORS
+from app.logger import get_logger
+
+logger = get_logger("goszakup.profiling")
+
+MODES = ("cprofile", "sampling")
+TRACEMALLOC_FRAMES = 10
+
+
+class _Sampler(threading.Thread):
+    """Раз в interval секунд снимает стек целевого потока в folded-формате."""
+
+    def __init__(self, target_ident: int, interval: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.target_ident = target_ident
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.target_ident)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+class RunProfiler:
+    """Профайлер одного запуска; start() в потоке обхода, stop() → каталог артефактов."""
+
+    def __init__(
+        self, mode: str, run_id: int, out_dir: str = PROFILE_DIR, snapshot_pages: int = PROFILE_SNAPSHOT_PAGES,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Неизвестный PROFILE: {mode!r} (ожидается {' / '.join(MODES)})")
+        self.mode = mode
+        self.run_id = run_id
+        self.out_dir = out_dir
+        self.snapshot_pages = max(snapshot_pages, 1)
+        self._profile: Optional[cProfile.Profile] = None
+        self._sampler: Optional[_Sampler] = None
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._pages: list[tuple[int, float, int, int]] = []
+        self._last_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._last_page = 0
+        self._intervals: list[tuple[int, int, list[str]]] = []  # (со страницы, по страницу, top)
+        self._started = 0.0
+
+    def start(self) -> "RunProfiler":
+        self._started = time.perf_counter()
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        self._baseline = self._last_snapshot = self._snapshot()
+        if self.mode == "cprofile":
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            self._sampler = _Sampler(threading.get_ident(), PROFILE_SAMPLE_MS / 1000)
+            self._sampler.start()
+        logger.info(f"Профилирование запуска {self.run_id}: {self.mode} + tracemalloc")
+        return self
+
+    def page_boundary(self, page_num: int) -> None:
+        """Вызывается parse_all_lots перед разбором каждой страницы."""
+        current, peak = tracemalloc.get_traced_memory()
+        self._pages.append((page_num, time.perf_counter() - self._started, current, peak))
+        if page_num > 1 and (page_num - 1) % self.snapshot_pages == 0:
+            self._diff_interval(page_num - 1, self._snapshot())
+
+    @staticmethod
+    def _snapshot() -> tracemalloc.Snapshot:
+        # Память самого tracemalloc в отчёт не пускаем
+        return tracemalloc.take_snapshot().filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),))
+
+    def _diff_interval(self, last_page: int, snapshot: tracemalloc.Snapshot) -> None:
+        """Top аллокаторов между предыдущим снимком и этим; предыдущий больше не нужен."""
+        top = snapshot.compare_to(self._last_snapshot, "lineno")[:PROFILE_TOP_ALLOCATORS]
+        self._intervals.append((self._last_page + 1, last_page, [str(stat) for stat in top]))
+        self._last_snapshot, self._last_page = snapshot, last_page
+
+    def stop(self) -> str:
+        if self._profile is not None:
+            self._profile.disable()
+        if self._sampler is not None:
+            self._sampler.stop()
+        snapshot = self._snapshot()
+        if self._pages and self._pages[-1][0] > self._last_page:
+            self._diff_interval(self._pages[-1][0], snapshot)
+        tracemalloc.stop()
+
+        out = os.path.join(self.out_dir, f"run_{self.run_id}")
+        os.makedirs(out, exist_ok=True)
+        if self._profile is not None:
+            self._profile.dump_stats(os.path.join(out, f"run_{self.run_id}.pstats"))
+        if self._sampler is not None:
+            with open(os.path.join(out, f"run_{self.run_id}.folded"), "w", encoding="utf-8") as f:
+                for stack, count in self._sampler.stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+        self._write_alloc_report(os.path.join(out, f"run_{self.run_id}.alloc.txt"), snapshot)
+
+        logger.info(f"Профиль запуска {self.run_id} сохранён: {out}")
+        return out
+
+    def _write_alloc_report(self, path: str, snapshot: tracemalloc.Snapshot) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"# run_id={self.run_id} mode={self.mode}\n")
+            f.write("# page  seconds  current_kb  peak_kb\n")
+            for page_num, seconds, current, peak in self._pages:
+                f.write(f"{page_num:6d} {seconds:8.2f} {current / 1024:11.0f} {peak / 1024:8.0f}\n")
+
+            for first, last, top in self._intervals:
+                f.write(f"\n# top {PROFILE_TOP_ALLOCATORS} аллокаторов: прирост за страницы {first}–{last}\n")
+                for line in top:
+                    f.write(f"{line}\n")
+
+            f.write(f"\n# top {PROFILE_TOP_ALLOCATORS} аллокаторов: прирост с начала запуска\n")
+            for stat in snapshot.compare_to(self._baseline, "lineno")[:PROFILE_TOP_ALLOCATORS]:
+                f.write(f"{stat}\n")
+
+            f.write(f"\n# top {PROFILE_TOP_ALLOCATORS} аллокаторов: живые объекты в конце запуска\n")
+            for stat in snapshot.statistics("traceback")[:PROFILE_TOP_ALLOCATORS]:
+                f.write(f"{stat}\n")
+                for line in stat.traceback.format(limit=3):
+                    f.write(f"    {line}\n")
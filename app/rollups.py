@@ -0,0 +1,131 @@
+"""
+Инкрементальные агрегаты для дашбордов.
+
+Вместо GROUP BY status, purchase_method, DATE(created_at) по всей lots
+дашборды читают суточные агрегаты:
+  lot_daily_rollups      — (день, статус, способ закупки) → число, сумма;
+  customer_daily_rollups — (день, БИН заказчика) → число, сумма.
+
+save_batch копит дельты пачки в RollupDeltas (новый лот: +1 к своей
+ячейке; смена статуса/способа/суммы: −1 из старой ячейки, +1 в новую) и
+пишет их одним executemany upsert-increment на таблицу в транзакции
+пачки. rebuild() пересчитывает агрегаты по lots чанками по id.
+"""
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.database import upsert_increment
+from app.logger import get_logger
+from app.models import CustomerDailyRollup, Lot, LotDailyRollup
+
+logger = get_logger("goszakup.rollups")
+
+# Таблица агрегатов → её измерения (кроме дня)
+ROLLUPS = {
+    LotDailyRollup: ("status", "purchase_method"),
+    CustomerDailyRollup: ("customer_bin",),
+}
+COUNTERS = ("lot_count", "amount_sum")
+
+# Поля лота, от которых зависят агрегаты
+FIELDS = ("created_at", "status", "purchase_method", "customer_bin", "purchase_amount")
+
+_CENT = Decimal("0.01")
+
+
+def _day(value) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _money(value) -> Decimal:
+    if value is None:
+        return Decimal(0)
+    return Decimal(str(value)).quantize(_CENT)
+
+
+class RollupDeltas:
+    """Накопленные дельты агрегатов: {таблица: {ключ: [число, сумма]}}."""
+
+    def __init__(self):
+        self._cells: dict = {model: defaultdict(lambda: [0, Decimal(0)]) for model in ROLLUPS}
+
+    def add(self, lot, sign: int = 1) -> None:
+        """Учесть лот (dict или строку с полями FIELDS) со знаком ±1."""
+        get = lot.get if isinstance(lot, dict) else lambda f: getattr(lot, f)
+        day = _day(get("created_at"))
+        amount = _money(get("purchase_amount"))
+        for model, dims in ROLLUPS.items():
+            cell = self._cells[model][(day, *(get(d) or "" for d in dims))]
+            cell[0] += sign
+            cell[1] += sign * amount
+
+    def add_cell(self, model, key: tuple, count: int, amount) -> None:
+        cell = self._cells[model][key]
+        cell[0] += count
+        cell[1] += _money(amount)
+
+    def move(self, before, after) -> None:
+        """Лот изменился: убрать старое состояние, добавить новое."""
+        self.add(before, -1)
+        self.add(after, +1)
+
+    def apply(self, db: Session) -> int:
+        """Записать ненулевые дельты (без commit). Возвращает число ячеек."""
+        dialect = db.get_bind().dialect.name
+        written = 0
+        for model, dims in ROLLUPS.items():
+            keys = ("day", *dims)
+            rows = [
+                {**dict(zip(keys, key)), "lot_count": count, "amount_sum": amount}
+                for key, (count, amount) in self._cells[model].items()
+                if count or amount
+            ]
+            if rows:
+                db.execute(upsert_increment(model.__table__, dialect, keys, COUNTERS), rows)
+                written += len(rows)
+            self._cells[model].clear()
+        return written
+
+
+def state(current, changes: Optional[dict] = None) -> dict:
+    """Поля FIELDS лота; changes ({поле: [было, стало]}) подставляют «стало»."""
+    get = current.get if isinstance(current, dict) else lambda f: getattr(current, f)
+    values = {f: get(f) for f in FIELDS}
+    for field, (_, new) in (changes or {}).items():
+        if field in values:
+            values[field] = new
+    return values
+
+
+def rebuild(db: Session, chunk_size: int = 200_000) -> int:
+    """Пересчитать оба агрегата по всей lots (backfill / после ручных правок)."""
+    for model in ROLLUPS:
+        db.execute(delete(model))
+    db.commit()
+
+    max_id = db.execute(select(func.max(Lot.id))).scalar() or 0
+    day = func.date(Lot.created_at)
+    cells = 0
+    for start in range(0, max_id, chunk_size):
+        deltas = RollupDeltas()
+        for model, dims in ROLLUPS.items():
+            columns = [func.coalesce(getattr(Lot, d), "") for d in dims]
+            rows = db.execute(
+                select(day, *columns, func.count(), func.coalesce(func.sum(Lot.purchase_amount), 0))
+                .where(Lot.id > start, Lot.id <= start + chunk_size)
+                .group_by(day, *columns)
+            )
+            for d, *key, count, amount in rows:
+                if isinstance(d, str):  # SQLite возвращает DATE() строкой
+                    d = date.fromisoformat(d)
+                deltas.add_cell(model, (d, *key), count, amount)
+        cells += deltas.apply(db)
+        db.commit()
+        logger.info(f"  Агрегаты: id ≤ {min(start + chunk_size, max_id)}")
+    logger.info(f"Агрегаты пересобраны ({cells} ячеек-дельт)")
+    return cells
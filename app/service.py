@@ -1,103 +1,440 @@
 """
 Сервис: сохранение лотов в БД + журналирование запусков.
 """
-from datetime import datetime
-from sqlalchemy.exc import IntegrityError
+from dataclasses import dataclass
+import json
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional
+
+from sqlalchemy import func, select, update
 from sqlalchemy.orm import Session
 
-from app.database import SessionLocal
-from app.logger import get_logger
-from app.models import Lot, ParseRun
-from app.parser import parse_all_lots
+from app import active_lots, announcements, lot_hashes
+from app.config import BASE_URL, BATCH_SIZE, FULL_SWEEP_HOURS, PAGE_CACHE, PROBE_HEAD_SIZE, PROFILE
+from app.database import SessionLocal, insert_ignore
+from app.logger import get_logger, reset_log_context, set_log_context
+from app.models import ActiveLot, Lot, PageFingerprint, ParseRun
+from app.near_dup import index_lots
+from app.outbox import EVENT_CHANGED, EVENT_CREATED, EVENT_DISAPPEARED, record_events
+from app.price_anomaly import forget_lots, update_after_run
+from app.rollups import RollupDeltas, state
+from app.text import announce_seq
+from app.watchlist import WatchlistMatcher, load_matcher, match_lots
+
+if TYPE_CHECKING:
+    from app.sources.pool import DriverPool
 
 logger = get_logger("goszakup.service")
 
+# Поля dict-а лота, которые пишутся в таблицу lots как есть
+LOT_FIELDS = (
+    "unique_hash", "hash_prefix", "lot_number", "announce_number", "announce_name", "lot_name",
+    "subject_type", "quantity", "status", "purchase_method", "customer_name",
+    "customer_bin", "purchase_amount", "deadline_date", "publication_date",
+    "financial_year", "delivery_place", "lot_url", "raw_data",
+)
+
+# Поля, изменение которых на сайте считается изменением лота (lot.changed)
+TRACKED_FIELDS = ("status", "purchase_amount", "quantity", "purchase_method")
+
+# Полный обход «потерял» больше этой доли живых лотов — скорее сбой обхода,
+# чем массовое снятие: пропавшими не отмечаем
+DISAPPEARED_MAX_SHARE = 0.2
+
+
+def _batched(items: Iterable[dict], size: int) -> Iterator[list[dict]]:
+    it = iter(items)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+@dataclass
+class BatchResult:
+    new: int = 0
+    changed: int = 0
+    matches: int = 0
+
+
+def _amount(value) -> Optional[float]:
+    return round(float(value), 2) if value is not None else None
+
+
+def _changes(current, lot: dict) -> dict:
+    """Поля, изменившиеся на сайте с прошлого запуска: {поле: [было, стало]}."""
+    changes = {}
+    for field in TRACKED_FIELDS:
+        old, new = getattr(current, field), lot.get(field)
+        if field == "purchase_amount":
+            old, new = _amount(old), _amount(new)
+        if new is not None and old != new:
+            changes[field] = [old, new]
+    return changes
+
+
+def save_batch(
+    db: Session,
+    batch: list[dict],
+    watchlist: Optional[WatchlistMatcher] = None,
+    run_id: Optional[int] = None,
+) -> BatchResult:
+    """
+    Сохраняем пачку лотов: один SELECT по хешам на всю пачку, объявления
+    новых лотов (upsert + SELECT id), один executemany INSERT для новых и один UPDATE для изменившихся (с run_id —
+    ещё один UPDATE last_seen по id всех уже известных лотов пачки), затем
+    пост-обработка, совпадения сохранённых поисков (watchlist), горячая
+    таблица active_lots, дельты агрегатов и события outbox — всё в одной
+    транзакции.
 
-def run_parse_job():
+    Новые лоты сначала занимают свои хеши в lot_hashes (app/lot_hashes.py):
+    хеш, уже занятый параллельным писателем, выпадает из пачки. Всё, что
+    следует за INSERT (события, агрегаты, lot_count объявлений, совпадения),
+    считается только по вставленным строкам.
+    """
+    result = BatchResult()
+
+    # Дубли внутри самой пачки (один лот на двух страницах)
+    by_hash = {lot["unique_hash"]: lot for lot in batch}
+
+    # Проба по узкому ix_hash_prefix; совпадение префикса ещё не совпадение хеша
+    existing = {
+        row.unique_hash: row
+        for row in db.query(
+            Lot.id, Lot.unique_hash, Lot.created_at, Lot.customer_bin, Lot.disappeared_at,
+            *(getattr(Lot, f) for f in TRACKED_FIELDS),
+        )
+        .filter(Lot.hash_prefix.in_({lot["hash_prefix"] for lot in by_hash.values()}))
+        if row.unique_hash in by_hash
+    }
+    now = datetime.utcnow()
+    seen = {"first_seen_run_id": run_id, "last_seen_run_id": run_id, "last_seen_at": now} if run_id else {}
+    # Глобально уникальный ключ — lot_hashes: uq_lot_hash в партиционированной
+    # lots включает created_at и параллельную вставку не ловит
+    claimed = lot_hashes.claim(db, [h for h in by_hash if h not in existing])
+    new_lots = [lot for h, lot in by_hash.items() if h in claimed]
+    # Объявления новых лотов: один upsert + один SELECT id на пачку
+    announcement_ids = announcements.resolve(db, new_lots)
+    rows = [
+        {**{f: lot.get(f) for f in LOT_FIELDS}, "created_at": now, "updated_at": now, **seen,
+         "announcement_id": announcement_ids.get(lot.get("announce_number"))}
+        for lot in new_lots
+    ]
+
+    # Лоты, чьи строки в active_lots нужно привести к lots
+    touched: list[int] = []
+    deltas = RollupDeltas()
+
+    if run_id and existing:
+        # Один set-based UPDATE на пачку; updated_at не трогаем — лот не изменился
+        db.execute(
+            update(Lot)
+            .where(Lot.id.in_([row.id for row in existing.values()]))
+            .values(last_seen_run_id=run_id, last_seen_at=now, disappeared_at=None, updated_at=Lot.updated_at)
+        )
+        # Снова в выдаче после «пропажи» — вернуть в active_lots
+        touched.extend(row.id for row in existing.values() if row.disappeared_at is not None)
+
+    # Изменения статуса/суммы у уже известных лотов
+    changed = []
+    for h, current in existing.items():
+        changes = _changes(current, by_hash[h])
+        if changes:
+            changed.append((current.id, h, changes))
+            deltas.move(state(current), state(current, changes))
+    if changed:
+        db.execute(update(Lot), [
+            {"id": lot_id, "updated_at": now, **{f: new for f, (_, new) in changes.items()}}
+            for lot_id, _, changes in changed
+        ])
+        record_events(db, EVENT_CHANGED, (
+            {"id": lot_id, "unique_hash": h, "changes": changes}
+            for lot_id, h, changes in changed
+        ))
+        # Сумма или способ закупки сменились — старая оценка цены больше не верна
+        forget_lots(db, [
+            (lot_id, existing[h].purchase_amount) for lot_id, h, changes in changed
+            if "purchase_amount" in changes or "purchase_method" in changes
+        ])
+        result.changed = len(changed)
+        touched.extend(lot_id for lot_id, _, _ in changed)
+        if watchlist is not None:
+            # Изменилась сумма — лот мог попасть в чей-то диапазон
+            result.matches += match_lots(db, watchlist, [(lot_id, by_hash[h]) for lot_id, h, _ in changed])
+
+    if rows:
+        db.execute(Lot.__table__.insert(), rows)
+
+        # id вставленных строк (executemany их не возвращает) — одним запросом;
+        # хеш занят этой транзакцией, значит и строка с ним — наша
+        inserted = [
+            r for r in db.query(Lot.id, Lot.unique_hash, Lot.lot_name, Lot.announce_number)
+            .filter(Lot.hash_prefix.in_([r["hash_prefix"] for r in rows]))
+            if r.unique_hash in claimed
+        ]
+        index_lots(db, inserted)
+
+        ids = {r.unique_hash: r.id for r in inserted}
+        lot_hashes.bind(db, ids)
+        announcements.add_lots(db, rows)
+        record_events(db, EVENT_CREATED, (
+            {"id": ids[r["unique_hash"]], **{k: v for k, v in r.items() if k not in ("raw_data", "hash_prefix")}}
+            for r in rows
+        ))
+        result.new = len(rows)
+        touched.extend(ids.values())
+        for r in rows:
+            deltas.add(r)
+        if watchlist is not None:
+            result.matches += match_lots(db, watchlist, [(ids[r["unique_hash"]], r) for r in rows])
+
+    active_lots.refresh(db, touched)
+    deltas.apply(db)
+    db.commit()
+    return result
+
+
+def mark_disappeared(
+    db: Session,
+    run_id: int,
+    boundary: Optional[int] = None,
+    max_share: float = DISAPPEARED_MAX_SHARE,
+) -> int:
+    """
+    Разность множеств после полного обхода: живые лоты (active_lots),
+    которых этот запуск не видел, получают disappeared_at, уходят из
+    active_lots и попадают в outbox как lot.disappeared. Проход идёт по
+    узкой active_lots, а не по всей lots. Без commit.
+
+    boundary — window_boundary обхода: реестр обрезан окном сайта, и
+    проверяются только лоты объявлений новее самого старого увиденного
+    (announce_seq > boundary). Лоты старше границы и без номера
+    объявления обход мог не увидеть законно — их не трогаем.
+    """
+    live = db.execute(
+        select(ActiveLot.lot_id, Lot.announce_number, Lot.last_seen_run_id, Lot.last_seen_at)
+        .join(Lot, Lot.id == ActiveLot.lot_id)
+    ).all()
+    if boundary is not None:
+        live = [row for row in live if (announce_seq(row.announce_number) or 0) > boundary]
+    active = len(live)
+    missing = [(row.lot_id, row.last_seen_at) for row in live if row.last_seen_run_id != run_id]
+    if not missing:
+        return 0
+    if len(missing) > active * max_share:
+        logger.warning(
+            f"  Полный обход не нашёл {len(missing)} из {active} живых лотов — "
+            f"похоже на сбой обхода, пропавшими не отмечаем"
+        )
+        return 0
+
+    now = datetime.utcnow()
+    for chunk in _batched(missing, BATCH_SIZE):
+        ids = [lot_id for lot_id, _ in chunk]
+        db.execute(
+            update(Lot).where(Lot.id.in_(ids)).values(disappeared_at=now, updated_at=Lot.updated_at)
+        )
+        active_lots.refresh(db, ids)
+        record_events(db, EVENT_DISAPPEARED, (
+            {"id": lot_id, "last_seen_at": last_seen_at} for lot_id, last_seen_at in chunk
+        ))
+    return len(missing)
+
+
+def _store_drift(run: ParseRun, run_info: dict) -> None:
+    run.drift_duplicates = run_info.get("drift_duplicates", 0)
+    run.drift_recovered = run_info.get("drift_recovered", 0)
+    run.drift_skipped = run_info.get("drift_skipped", 0)
+
+
+def full_sweep_due(db: Session, hours: int = FULL_SWEEP_HOURS) -> bool:
+    """Пора пройти реестр без кеша страниц (последний полный обход старше hours)."""
+    last = db.execute(
+        select(func.max(ParseRun.started_at))
+        .where(ParseRun.source == "lots", ParseRun.full_sweep.is_(True), ParseRun.status == "success")
+    ).scalar()
+    return last is None or datetime.utcnow() - last >= timedelta(hours=hours)
+
+
+def load_fingerprints(db: Session, slice_key: str = BASE_URL) -> dict[int, str]:
+    """Отпечатки страниц среза с прошлых запусков: {страница: digest}."""
+    return dict(db.execute(
+        select(PageFingerprint.page_num, PageFingerprint.digest)
+        .where(PageFingerprint.slice_key == slice_key)
+    ).all())
+
+
+def store_fingerprints(
+    db: Session,
+    page_digests: dict[int, tuple[str, int]],
+    run_id: Optional[int],
+    slice_key: str = BASE_URL,
+) -> None:
+    """Сохранить отпечатки разобранных страниц (без commit)."""
+    if not page_digests:
+        return
+    now = datetime.utcnow()
+    known = set(db.execute(
+        select(PageFingerprint.page_num)
+        .where(PageFingerprint.slice_key == slice_key, PageFingerprint.page_num.in_(page_digests))
+    ).scalars())
+    rows = [
+        {"slice_key": slice_key, "page_num": page, "digest": digest,
+         "row_count": count, "run_id": run_id, "updated_at": now}
+        for page, (digest, count) in page_digests.items()
+    ]
+    updates = [r for r in rows if r["page_num"] in known]
+    inserts = [r for r in rows if r["page_num"] not in known]
+    if updates:
+        db.execute(update(PageFingerprint), updates)
+    if inserts:
+        db.execute(insert_ignore(PageFingerprint.__table__, db.get_bind().dialect.name), inserts)
+
+
+def run_parse_job(pool: Optional["DriverPool"] = None) -> dict:
     """
     Основная задача планировщика.
     Парсим ВСЕ страницы реестра лотов и сохраняем НОВЫЕ в БД.
     Дубли определяются по unique_hash — пропускаем без ошибки.
+
+    Возвращает сводку запуска (run_info парсера + run_id, lots_found,
+    lots_new, lots_changed, db_seconds — время внутри save_batch).
+
+    При PROFILE запуск профилируется (app/profiling.py), каталог
+    артефактов пишется в parse_runs.profile_path. pool — общий пул
+    браузеров источников (планировщик), без него обход поднимает свой Chrome.
     """
+    # Selenium тянется только здесь — остальные команды его не импортируют
+    from app.parser import parse_all_lots
+
     db: Session = SessionLocal()
-    run = ParseRun(started_at=datetime.utcnow(), status="running")
+    run = ParseRun(source="lots", started_at=datetime.utcnow(), status="running")
     db.add(run)
     db.commit()
     db.refresh(run)
 
     lots_found = 0
     lots_new = 0
-    pages_seen = set()
+    lots_changed = 0
+    watchlist_matches = 0
+    run_info: dict = {}
+    head_hashes: list[str] = []
+    db_seconds = 0.0
 
+    context_token = set_log_context(run_id=run.id)
     logger.info(f"╔═══ СТАРТ ПАРСИНГА (run_id={run.id}) ═══")
 
+    profiler = None
+    if PROFILE:
+        from app.profiling import RunProfiler
+
+        profiler = RunProfiler(PROFILE, run.id).start()
+
     try:
-        for lot_data in parse_all_lots():
-            lots_found += 1
-
-            # Проверка дубля
-            exists = (
-                db.query(Lot.id)
-                .filter(Lot.unique_hash == lot_data["unique_hash"])
-                .first()
-            )
-            if exists:
-                continue
-
-            # Сохраняем новый лот
-            lot = Lot(
-                unique_hash=lot_data["unique_hash"],
-                lot_number=lot_data.get("lot_number"),
-                announce_number=lot_data.get("announce_number"),
-                announce_name=lot_data.get("announce_name"),
-                lot_name=lot_data.get("lot_name"),
-                subject_type=lot_data.get("subject_type"),
-                quantity=lot_data.get("quantity"),
-                status=lot_data.get("status"),
-                purchase_method=lot_data.get("purchase_method"),
-                customer_name=lot_data.get("customer_name"),
-                customer_bin=lot_data.get("customer_bin"),
-                purchase_amount=lot_data.get("purchase_amount"),
-                deadline_date=lot_data.get("deadline_date"),
-                publication_date=lot_data.get("publication_date"),
-                financial_year=lot_data.get("financial_year"),
-                delivery_place=lot_data.get("delivery_place"),
-                lot_url=lot_data.get("lot_url"),
-                raw_data=lot_data.get("raw_data"),
-                created_at=datetime.utcnow(),
-                updated_at=datetime.utcnow(),
+        fingerprints = {}
+        if PAGE_CACHE:
+            if full_sweep_due(db):
+                logger.info(f"  Полный обход без кеша страниц (раз в {FULL_SWEEP_HOURS} ч)")
+            else:
+                fingerprints = load_fingerprints(db)
+        watchlist = load_matcher(db)
+        on_page = profiler.page_boundary if profiler else None
+        for batch in _batched(parse_all_lots(run_info, fingerprints, on_page, pool), BATCH_SIZE):
+            if not head_hashes:
+                # Верх 1-й страницы — эталон для дешёвой пробы (app/adaptive.py)
+                head_hashes = [lot["unique_hash"].hex() for lot in batch[:PROBE_HEAD_SIZE]]
+            lots_found += len(batch)
+            t0 = time.perf_counter()
+            result = save_batch(db, batch, watchlist, run.id)
+            batch_seconds = time.perf_counter() - t0
+            db_seconds += batch_seconds
+            lots_new += result.new
+            lots_changed += result.changed
+            watchlist_matches += result.matches
+            logger.info(
+                f"  Сохранено новых лотов: {lots_new}, изменённых: {lots_changed} "
+                f"(всего обработано: {lots_found})",
+                extra={"timings": {"save_batch_s": round(batch_seconds, 3)}},
             )
-            db.add(lot)
-            try:
-                db.commit()
-                lots_new += 1
-                if lots_new % 100 == 0:
-                    logger.info(f"  Сохранено новых лотов: {lots_new} (всего обработано: {lots_found})")
-            except IntegrityError:
-                db.rollback()
+
+        # Пропавшие лоты ищем только если обход видел весь реестр целиком
+        full_sweep = bool(run_info.get("sweep_complete")) and not run_info.get("cache_hits")
+        disappeared = 0
+        if full_sweep:
+            disappeared = mark_disappeared(db, run.id, run_info.get("window_boundary"))
+            db.commit()
+            logger.info(f"  Полный обход: пропало из реестра лотов: {disappeared}")
+
+        # Аналитика не должна ронять успешный обход
+        try:
+            scored = update_after_run(db)
+            logger.info(f"  Ценовой скоринг: оценено {scored} лотов")
+        except Exception as e:
+            db.rollback()
+            logger.exception(f"Ошибка ценового скоринга: {e}")
 
         # Финал
+        if profiler:
+            run.profile_path = profiler.stop()
+            profiler = None
         run.status = "success"
         run.finished_at = datetime.utcnow()
         run.lots_found = lots_found
         run.lots_new = lots_new
+        run.lots_changed = lots_changed
+        run.pages_parsed = run_info.get("pages_parsed", 0)
+        run.total_records = run_info.get("total_records")
+        run.head_hashes = json.dumps(head_hashes)
+        run.full_sweep = full_sweep
+        run.lots_disappeared = disappeared
+        run.page_cache_hits = run_info.get("cache_hits", 0)
+        run.page_cache_misses = run_info.get("cache_misses", 0)
+        _store_drift(run, run_info)
+        # Отпечатки пишем только после успешного обхода: иначе страница,
+        # лоты которой не сохранились, была бы пропущена в следующий раз
+        if PAGE_CACHE:
+            store_fingerprints(db, run_info.get("page_digests", {}), run.id)
         db.commit()
 
         duration = (run.finished_at - run.started_at).seconds
         logger.info(
             f"╚═══ ПАРСИНГ ЗАВЕРШЁН (run_id={run.id}) | "
-            f"найдено={lots_found} | новых={lots_new} | "
-            f"время={duration}с ═══"
+            f"найдено={lots_found} | новых={lots_new} | изменено={lots_changed} | "
+            f"кеш страниц: {run.page_cache_hits} попаданий / {run.page_cache_misses} промахов | "
+            f"watchlist: {watchlist_matches} совпадений | "
+            f"дрейф: {run.drift_duplicates} дублей / {run.drift_recovered} восстановлено / "
+            f"{run.drift_skipped} пропущено | "
+            f"время={duration}с ═══",
+            extra={
+                "timings": {"total_s": duration, "db_s": round(db_seconds, 3)},
+                "capture": {"hits": run_info.get("capture_hits", 0), "misses": run_info.get("capture_misses", 0)},
+            },
+        )
+        run_info.update(
+            run_id=run.id, lots_found=lots_found, lots_new=lots_new,
+            lots_changed=lots_changed, db_seconds=db_seconds, watchlist_matches=watchlist_matches,
+            lots_disappeared=disappeared,
         )
+        return run_info
 
     except Exception as e:
         logger.exception(f"Ошибка во время парсинга: {e}")
+        db.rollback()
+        if profiler:
+            run.profile_path = profiler.stop()
         run.status = "failed"
+        run.full_sweep = False
         run.finished_at = datetime.utcnow()
         run.lots_found = lots_found
         run.lots_new = lots_new
+        run.lots_changed = lots_changed
+        run.pages_parsed = run_info.get("pages_parsed", 0)
+        run.page_cache_hits = run_info.get("cache_hits", 0)
+        run.page_cache_misses = run_info.get("cache_misses", 0)
+        _store_drift(run, run_info)
         run.error_message = str(e)[:2000]
         db.commit()
         raise
     finally:
-        db.close()
\ No newline at end of file
+        reset_log_context(context_token)
+        db.close()
@@ -0,0 +1,26 @@
+"""
+Реестры-источники goszakup.gov.kz на общем движке обхода.
+
+  lots           — реестр лотов (parse_all_lots + save_batch);
+  announcements  — реестр объявлений → announcements;
+  contracts      — реестр договоров → contracts.
+
+Новый реестр — подкласс Source (app/sources/base.py) и строка в SOURCES;
+планировщик (SOURCES в .env) обходит все включённые реестры через один
+DriverPool и один RateBudget.
+"""
+from app.sources.announcements import AnnouncementsSource
+from app.sources.base import Source
+from app.sources.contracts import ContractsSource
+from app.sources.lots import LotsSource
+
+SOURCES: dict[str, Source] = {
+    source.name: source for source in (LotsSource(), AnnouncementsSource(), ContractsSource())
+}
+
+
+def get_source(name: str) -> Source:
+    try:
+        return SOURCES[name]
+    except KeyError:
+        raise ValueError(f"Неизвестный источник {name!r}; доступны: {', '.join(SOURCES)}") from None
@@ -0,0 +1,57 @@
+"""
+Реестр объявлений (/ru/search/announce) → таблица announcements.
+
+Колонки выдачи:
+  [0] № объявления (ссылка /announce/index/ID)
+  [1] Наименование объявления
+  [2] Организатор
+  [3] Способ проведения закупки
+  [4] Дата начала приёма заявок
+  [5] Дата окончания приёма заявок
+  [6] Сумма закупки
+  [7] Статус
+
+Ключ — announce_number, тот же, по которому save_batch связывает лоты с
+объявлениями: строки, заведённые реестром лотов, дополняются статусом,
+способом и суммой, а lot_count ведёт по-прежнему save_batch.
+"""
+from typing import Optional
+
+from app.config import ANNOUNCEMENTS_URL
+from app.models import Announcement
+from app.parser import _clean_text, _extract_bin, _parse_amount
+from app.sources.base import Source, absolute_url
+
+
+class AnnouncementsSource(Source):
+    name = "announcements"
+    base_url = ANNOUNCEMENTS_URL
+    table_headers = ("Организатор", "Статус")
+    model = Announcement
+    key_column = "announce_number"
+    columns = (
+        "announce_number", "announce_name", "announce_url", "customer_name", "customer_bin",
+        "purchase_method", "total_amount", "status",
+    )
+    tracked = columns[1:]
+
+    def parse_row(self, tr) -> Optional[dict]:
+        cells = tr.find_all("td", recursive=False)
+        if len(cells) < 8:
+            return None
+
+        number = next(iter(_clean_text(cells[0]).split()), "")
+        if not number:
+            return None
+        link = cells[1].find("a") or cells[0].find("a")
+        customer_name = _clean_text(cells[2])
+        return {
+            "announce_number": number,
+            "announce_name": _clean_text(cells[1]) or None,
+            "announce_url": absolute_url(link.get("href", "")) if link else None,
+            "customer_name": customer_name or None,
+            "customer_bin": _extract_bin(customer_name),
+            "purchase_method": _clean_text(cells[3]) or None,
+            "total_amount": _parse_amount(_clean_text(cells[6])),
+            "status": _clean_text(cells[7]) or None,
+        }
@@ -0,0 +1,98 @@
+"""
+Интерфейс реестра-источника.
+
+Источник описывает только то, чем реестры отличаются:
+  page_url(N, query) — URL N-й страницы выдачи (query — доп. фильтры
+                   выдачи, например окно дат для backfill);
+  ready_selector — CSS-селектор, появление которого значит «таблица отрисована»;
+  table_headers  — заголовки, по которым на странице находится нужная таблица;
+  parse_row(tr)  — строка таблицы → dict (None — строка не разобрана);
+  key_column     — поле-ключ дедупликации (хеш или номер);
+  model/columns/tracked — куда писать, какие поля вставлять и какие
+                   поля при изменении обновлять у уже известной строки.
+
+Обход, пагинация, пул браузеров, бюджет запросов и журнал parse_runs —
+общие (app/sources/engine.py).
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+from datetime import date
+from typing import TYPE_CHECKING, Optional
+
+from app.config import MAX_PAGES
+from app.parser import _wait_for
+
+if TYPE_CHECKING:
+    from bs4 import Tag
+    from sqlalchemy.orm import Session
+
+    from app.sources.pool import DriverPool
+
+SITE = "https://www.goszakup.gov.kz"
+
+_DATE_RE = re.compile(r"(\d{2})\.(\d{2})\.(\d{4})|(\d{4})-(\d{2})-(\d{2})")
+
+
+def absolute_url(href: str) -> str:
+    return SITE + href if href.startswith("/") else href
+
+
+def parse_date(text: str) -> Optional[date]:
+    """Дата из «31.12.2026» или «2026-12-31 10:00:00»; None, если её нет."""
+    m = _DATE_RE.search(text or "")
+    if not m:
+        return None
+    day, month, year = (m.group(1), m.group(2), m.group(3)) if m.group(1) else (m.group(6), m.group(5), m.group(4))
+    try:
+        return date(int(year), int(month), int(day))
+    except ValueError:
+        return None
+
+
+def make_key(*parts: str) -> bytes:
+    """SHA256-дайджест (32 байта) склейки полей — ключ дедупликации."""
+    return hashlib.sha256("|".join(p or "" for p in parts).encode("utf-8")).digest()
+
+
+class Source:
+    name: str = ""
+    base_url: str = ""
+    ready_selector: str = "table tbody tr td"
+    table_headers: tuple[str, ...] = ("Статус",)
+    model = None
+    key_column: str = "unique_hash"
+    columns: tuple[str, ...] = ()
+    tracked: tuple[str, ...] = ()
+    max_pages: int = MAX_PAGES
+
+    def page_url(self, page: int, query: str = "") -> str:
+        params = "&".join(p for p in (query, f"page={page}" if page > 1 else "") if p)
+        return f"{self.base_url}?{params}" if params else self.base_url
+
+    def wait_ready(self, driver) -> bool:
+        return _wait_for(driver, self.ready_selector)
+
+    def parse_row(self, tr: Tag) -> Optional[dict]:
+        raise NotImplementedError
+
+    def save(
+        self, db: Session, rows: list[dict], run_id: Optional[int] = None, watchlist=None,
+    ) -> tuple[int, int]:
+        """
+        Записать пачку строк; возвращает (новых, изменённых). watchlist —
+        матчер сохранённых поисков, нужен только реестру лотов.
+        """
+        from app.sources.engine import save_rows
+
+        return save_rows(db, self, rows)
+
+    def run(self, pool: Optional[DriverPool] = None) -> dict:
+        """Один обход реестра с записью в БД и в parse_runs."""
+        from app.sources.engine import run_source
+
+        return run_source(self, pool)
+
+    def __repr__(self):
+        return f"<Source {self.name}: {self.base_url}>"
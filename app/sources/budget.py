@@ -0,0 +1,75 @@
+"""
+Общий бюджет запросов к сайту.
+
+Все источники ходят на один и тот же goszakup.gov.kz, поэтому ограничение
+частоты — одно на процесс, а не на реестр: RateBudget разносит загрузки
+страниц не чаще per_minute в минуту, в каком бы потоке планировщика они ни
+шли. Второй реестр не удваивает нагрузку на сайт, а делит тот же бюджет.
+
+Два класса запросов: HIGH — свежие обходы, LOW — backfill истории. Пока
+идёт свежий обход (окно fresh()), запрос LOW не ждёт, а сразу получает
+FreshCrawlDue: backfill останавливается на границе страницы и отдаёт
+браузер (app/backfill.py). Ждать здесь с драйвером в руках нельзя —
+свежий обход в это время ждёт этот же драйвер в пуле.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+HIGH = 0
+LOW = 1
+
+
+class FreshCrawlDue(Exception):
+    """Запрос LOW во время свежего обхода: backfill должен уступить."""
+
+
+class RateBudget:
+    def __init__(
+        self,
+        per_minute: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._next = 0.0
+        self._fresh = 0
+        self._lock = threading.Lock()
+        self.spent = 0
+        self.spent_low = 0
+
+    @contextmanager
+    def fresh(self) -> Iterator[None]:
+        """Окно свежего обхода: на это время backfill не получает запросов."""
+        with self._lock:
+            self._fresh += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._fresh -= 1
+
+    @property
+    def fresh_due(self) -> bool:
+        return self._fresh > 0
+
+    def acquire(self, priority: int = HIGH) -> float:
+        """Занять слот под одну загрузку страницы; возвращает время ожидания, с."""
+        with self._lock:
+            if priority == LOW and self._fresh:
+                raise FreshCrawlDue()
+            self.spent += 1
+            if priority == LOW:
+                self.spent_low += 1
+            if not self.interval:
+                return 0.0
+            now = self._clock()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        wait = start - now
+        if wait > 0:
+            self._sleep(wait)
+        return wait
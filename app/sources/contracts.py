@@ -0,0 +1,65 @@
+"""
+Реестр договоров (CONTRACTS_URL) → таблица contracts.
+
+Колонки выдачи:
+  [0] № договора (ссылка на карточку)
+  [1] Заказчик (наименование + БИН)
+  [2] Поставщик (наименование + БИН/ИИН)
+  [3] Сумма договора
+  [4] Дата заключения
+  [5] Статус
+
+Ключ — SHA256(№ договора | БИН заказчика): номера договоров у разных
+заказчиков могут совпадать.
+"""
+import json
+from typing import Optional
+
+from app.config import CONTRACTS_URL
+from app.models import Contract
+from app.parser import _clean_text, _extract_bin, _parse_amount
+from app.sources.base import Source, absolute_url, make_key, parse_date
+
+
+class ContractsSource(Source):
+    name = "contracts"
+    base_url = CONTRACTS_URL
+    table_headers = ("Поставщик", "Статус")
+    model = Contract
+    columns = (
+        "unique_hash", "contract_number", "customer_name", "customer_bin", "supplier_name",
+        "supplier_bin", "contract_amount", "contract_date", "status", "contract_url", "raw_data",
+    )
+    tracked = ("contract_amount", "status", "supplier_name", "supplier_bin")
+
+    def parse_row(self, tr) -> Optional[dict]:
+        cells = tr.find_all("td", recursive=False)
+        if len(cells) < 6:
+            return None
+
+        number = _clean_text(cells[0])
+        if not number:
+            return None
+        link = cells[0].find("a")
+        raw = {
+            "contract_number": number,
+            "customer_name": _clean_text(cells[1]),
+            "supplier_name": _clean_text(cells[2]),
+            "amount": _clean_text(cells[3]),
+            "date": _clean_text(cells[4]),
+            "status": _clean_text(cells[5]),
+        }
+        customer_bin = _extract_bin(raw["customer_name"])
+        return {
+            "unique_hash": make_key(number, customer_bin or raw["customer_name"]),
+            "contract_number": number,
+            "customer_name": raw["customer_name"] or None,
+            "customer_bin": customer_bin,
+            "supplier_name": raw["supplier_name"] or None,
+            "supplier_bin": _extract_bin(raw["supplier_name"]),
+            "contract_amount": _parse_amount(raw["amount"]),
+            "contract_date": parse_date(raw["date"]),
+            "status": raw["status"] or None,
+            "contract_url": absolute_url(link.get("href", "")) if link else None,
+            "raw_data": json.dumps(raw, ensure_ascii=False),
+        }
@@ -0,0 +1,194 @@
+"""
+Общий движок обхода реестров-источников.
+
+Один и тот же цикл для любого Source: 1-я страница → счётчик «из Z
+записей» → ?page=N до конца выдачи (или MAX_PAGES), строки таблицы —
+через source.parse_row, запись пачками через source.save, журнал в
+parse_runs с source = имя реестра. Драйвер берётся из общего DriverPool
+и расходует общий RateBudget, поэтому новый реестр не поднимает ещё
+один Chrome и не добавляет запросов сверх бюджета.
+
+Реестр лотов со своими оптимизациями (кеш страниц, перехват JSON, дрейф
+пагинации) обходит parse_all_lots, но через тот же пул.
+"""
+from __future__ import annotations
+
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import TYPE_CHECKING, Generator, Optional
+
+from sqlalchemy import select, update
+
+from app.config import BATCH_SIZE, PAGE_PAUSE_SECONDS
+from app.database import SessionLocal, insert_ignore
+from app.logger import get_logger, reset_log_context, set_log_context
+from app.models import ParseRun
+from app.sources.pool import DriverPool
+
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Session
+
+    from app.sources.base import Source
+
+logger = get_logger("goszakup.sources")
+
+
+def page_rows(source: Source, html: str) -> list[dict]:
+    """Разобранные строки таблицы источника из HTML страницы."""
+    from bs4 import BeautifulSoup
+
+    from app.parser import _find_row_tags
+
+    soup = BeautifulSoup(html, "lxml")
+    return [row for row in map(source.parse_row, _find_row_tags(soup, source.table_headers)) if row]
+
+
+def crawl(source: Source, pool: DriverPool, run_info: Optional[dict] = None) -> Generator[dict, None, None]:
+    """Генератор строк реестра source по всем страницам выдачи."""
+    from bs4 import BeautifulSoup
+
+    from app.parser import _get_total_pages, _get_total_records
+
+    if run_info is None:
+        run_info = {}
+    run_info.setdefault("pages_parsed", 0)
+    run_info.setdefault("page_errors", 0)
+
+    driver = pool.acquire()
+    broken = False
+    try:
+        driver.get(source.page_url(1))
+        source.wait_ready(driver)
+        soup = BeautifulSoup(driver.page_source, "lxml")
+        counter = _get_total_records(soup)
+        run_info["total_records"] = counter[0] if counter else None
+        total_pages = _get_total_pages(soup)
+        if source.max_pages > 0:
+            total_pages = min(total_pages, source.max_pages)
+        logger.info(f"[{source.name}] Начинаем обход {total_pages} страниц...")
+
+        for page_num in range(1, total_pages + 1):
+            set_log_context(page=page_num)
+            if page_num > 1:
+                try:
+                    driver.get(source.page_url(page_num))
+                    source.wait_ready(driver)
+                except Exception as e:
+                    logger.error(f"[{source.name}] Ошибка загрузки страницы {page_num}: {e}")
+                    run_info["page_errors"] += 1
+                    continue
+
+            rows = page_rows(source, driver.page_source)
+            run_info["pages_parsed"] += 1
+            logger.info(f"[{source.name}] Страница {page_num}/{total_pages}: строк {len(rows)}")
+            if not rows:
+                break
+            yield from rows
+            time.sleep(PAGE_PAUSE_SECONDS)
+    except Exception:
+        broken = True
+        raise
+    finally:
+        pool.release(driver, broken)
+
+
+def _differs(current, new) -> bool:
+    if isinstance(current, Decimal) and new is not None:
+        return current != Decimal(str(new)).quantize(current)
+    return current != new
+
+
+def save_rows(db: Session, source: Source, rows: list[dict]) -> tuple[int, int]:
+    """
+    Пачка строк источника: один SELECT по ключам, один executemany INSERT
+    новых и один UPDATE изменившихся tracked-полей. Пустое значение в
+    строке не затирает известное. Возвращает (новых, изменённых).
+    """
+    model = source.model
+    key = getattr(model, source.key_column)
+    by_key = {row[source.key_column]: row for row in rows if row.get(source.key_column)}
+    if not by_key:
+        return 0, 0
+
+    existing = {
+        found[0]: found
+        for found in db.execute(
+            select(key, model.id, *(getattr(model, f) for f in source.tracked))
+            .where(key.in_(list(by_key)))
+        )
+    }
+    new = [{c: row.get(c) for c in source.columns} for k, row in by_key.items() if k not in existing]
+
+    stamp = {"updated_at": datetime.utcnow()} if hasattr(model, "updated_at") else {}
+    updates = []
+    for k, found in existing.items():
+        row = by_key[k]
+        changes = {
+            f: row[f] for f, current in zip(source.tracked, found[2:])
+            if row.get(f) is not None and _differs(current, row[f])
+        }
+        if changes:
+            updates.append({"id": found[1], **changes, **stamp})
+
+    if new:
+        db.execute(insert_ignore(model.__table__, db.get_bind().dialect.name), new)
+    if updates:
+        db.execute(update(model), updates)
+    db.commit()
+    return len(new), len(updates)
+
+
+def run_source(source: Source, pool: Optional[DriverPool] = None) -> dict:
+    """
+    Обход реестра source с записью в БД и в parse_runs. Без pool —
+    собственный пул на один драйвер, закрываемый в конце.
+    """
+    from app.service import _batched
+
+    own_pool = pool is None
+    if own_pool:
+        pool = DriverPool(1)
+
+    db = SessionLocal()
+    run = ParseRun(source=source.name, started_at=datetime.utcnow(), status="running")
+    db.add(run)
+    db.commit()
+    db.refresh(run)
+
+    found = new = changed = 0
+    run_info: dict = {}
+    context_token = set_log_context(run_id=run.id)
+    logger.info(f"╔═══ СТАРТ ОБХОДА {source.name} (run_id={run.id}) ═══")
+    try:
+        for batch in _batched(crawl(source, pool, run_info), BATCH_SIZE):
+            found += len(batch)
+            batch_new, batch_changed = source.save(db, batch, run.id)
+            new += batch_new
+            changed += batch_changed
+
+        run.status = "success"
+        run.total_records = run_info.get("total_records")
+        logger.info(
+            f"╚═══ ОБХОД {source.name} ЗАВЕРШЁН (run_id={run.id}) | "
+            f"найдено={found} | новых={new} | изменено={changed} ═══"
+        )
+        run_info.update(run_id=run.id, found=found, new=new, changed=changed)
+        return run_info
+    except Exception as e:
+        logger.exception(f"[{source.name}] Ошибка обхода: {e}")
+        db.rollback()
+        run.status = "failed"
+        run.error_message = str(e)[:2000]
+        raise
+    finally:
+        run.finished_at = datetime.utcnow()
+        run.lots_found = found
+        run.lots_new = new
+        run.lots_changed = changed
+        run.pages_parsed = run_info.get("pages_parsed", 0)
+        db.commit()
+        db.close()
+        reset_log_context(context_token)
+        if own_pool:
+            pool.close()
@@ -0,0 +1,39 @@
+"""
+Реестр лотов (/ru/search/lots).
+
+Разбор строки и ключ — те же, что у parse_all_lots; обход и запись идут
+через run_parse_job со всеми оптимизациями реестра лотов (кеш страниц,
+перехват JSON, дрейф, жизненный цикл), но драйвер — из общего пула.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional
+
+from app.config import BASE_URL
+from app.models import Lot
+from app.parser import LOT_TABLE_HEADERS, _parse_row
+from app.sources.base import Source
+
+if TYPE_CHECKING:
+    from app.sources.pool import DriverPool
+
+
+class LotsSource(Source):
+    name = "lots"
+    base_url = BASE_URL
+    table_headers = LOT_TABLE_HEADERS
+    model = Lot
+
+    def parse_row(self, tr):
+        return _parse_row(tr)
+
+    def save(self, db, rows, run_id=None, watchlist=None):
+        from app.service import save_batch
+
+        result = save_batch(db, rows, watchlist=watchlist, run_id=run_id)
+        return result.new, result.changed
+
+    def run(self, pool: Optional[DriverPool] = None) -> dict:
+        from app.service import run_parse_job
+
+        return run_parse_job(pool)
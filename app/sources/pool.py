@@ -0,0 +1,129 @@
+"""
+Общий пул браузеров для всех источников.
+
+Каждый источник раньше поднимал бы свой Chrome. DriverPool держит не
+больше size процессов на весь планировщик: источник берёт драйвер на
+время обхода (acquire/release или lease()), остальные ждут. Драйвер,
+на котором обход упал, закрывается — следующий получит свежий.
+
+Драйвер выдаётся обёрнутым: каждый get() сначала занимает слот в
+RateBudget, так что бюджет соблюдается и внутри parse_all_lots, и в
+общем движке источников. Ждущие драйвер свежие обходы (HIGH) получают
+его раньше backfill (LOW).
+"""
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+from app.logger import get_logger
+from app.sources.budget import HIGH, RateBudget
+
+logger = get_logger("goszakup.sources.pool")
+
+
+def _default_factory():
+    from app import parser  # атрибут модуля — чтобы тесты могли подменить _build_driver
+
+    return parser._build_driver()
+
+
+class MeteredDriver:
+    """WebDriver, у которого каждая загрузка страницы расходует бюджет."""
+
+    def __init__(self, driver, budget: Optional[RateBudget], priority: int = HIGH):
+        self.driver = driver
+        self.priority = priority
+        self._budget = budget
+
+    def get(self, url: str):
+        if self._budget is not None:
+            self._budget.acquire(self.priority)
+        return self.driver.get(url)
+
+    def __getattr__(self, name):
+        return getattr(self.driver, name)
+
+
+class DriverPool:
+    def __init__(
+        self,
+        size: int = 1,
+        budget: Optional[RateBudget] = None,
+        factory: Callable[[], object] = _default_factory,
+    ):
+        self.size = max(size, 1)
+        self.budget = budget
+        self._factory = factory
+        self._idle: list = []
+        self._created = 0
+        self._high_waiting = 0
+        self._cond = threading.Condition()
+
+    def _available(self) -> bool:
+        return bool(self._idle) or self._created < self.size
+
+    def acquire(self, priority: int = HIGH) -> MeteredDriver:
+        """Свободный драйвер; новый — если пул ещё не полон, иначе ждём."""
+        with self._cond:
+            if priority == HIGH:
+                self._high_waiting += 1
+                try:
+                    while not self._available():
+                        self._cond.wait()
+                finally:
+                    self._high_waiting -= 1
+            else:
+                while not self._available() or self._high_waiting:
+                    self._cond.wait()
+            if self._idle:
+                return MeteredDriver(self._idle.pop(), self.budget, priority)
+            self._created += 1
+        try:
+            driver = self._factory()
+        except Exception:
+            with self._cond:
+                self._created -= 1
+                self._cond.notify_all()
+            raise
+        logger.info(f"WebDriver инициализирован ({self._created}/{self.size} в пуле)")
+        return MeteredDriver(driver, self.budget, priority)
+
+    def release(self, metered: MeteredDriver, broken: bool = False) -> None:
+        """Вернуть драйвер; broken — закрыть его (после сбоя обхода)."""
+        if broken:
+            self._quit(metered.driver)
+        with self._cond:
+            if broken:
+                self._created -= 1
+            else:
+                self._idle.append(metered.driver)
+            self._cond.notify_all()
+
+    @contextmanager
+    def lease(self, priority: int = HIGH) -> Iterator[MeteredDriver]:
+        driver = self.acquire(priority)
+        broken = False
+        try:
+            yield driver
+        except Exception:
+            broken = True
+            raise
+        finally:
+            self.release(driver, broken)
+
+    def close(self) -> None:
+        """Закрыть свободные драйверы (при остановке планировщика)."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+        for driver in idle:
+            self._quit(driver)
+
+    @staticmethod
+    def _quit(driver) -> None:
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"WebDriver не закрылся: {e}")
+        else:
+            logger.info("WebDriver закрыт")
@@ -0,0 +1,89 @@
+"""
+Детерминированные синтетические лоты в формате парсера.
+
+Используются бенчмарками и mock-сервером реестра: одинаковый seed →
+одинаковые страницы, поэтому результаты на MySQL и SQLite сравнимы.
+"""
+import html
+import random
+from typing import Iterable, Iterator
+
+from app.parser import _build_lot
+
+PER_PAGE = 50
+SITE = "https://www.goszakup.gov.kz"
+
+_ITEMS = (
+    "Бензин АИ-92", "Дизельное топливо", "Цемент М400", "Кирпич керамический",
+    "Лекарственные средства", "Изделия медицинского назначения", "Ноутбук",
+    "Картридж для принтера", "Бумага офисная А4", "Стол письменный",
+    "Услуги по охране здания", "Вывоз твердых бытовых отходов",
+    "Текущий ремонт кровли", "Продукты питания (мясо говядина)",
+    "Спецодежда летняя", "Курсы повышения квалификации",
+)
+_CUSTOMERS = (
+    "ГУ «Отдел образования города Алматы»",
+    "КГП на ПХВ «Городская поликлиника №5»",
+    "ГУ «Аппарат акима района»",
+    "РГУ «Департамент государственных доходов»",
+    "КГУ «Средняя школа №12»",
+)
+_METHODS = ("Запрос ценовых предложений", "Открытый конкурс", "Из одного источника", "Аукцион")
+_STATUSES = ("Опубликовано (прием заявок)", "Опубликовано", "Изменена документация", "Завершено")
+
+
+def synthetic_record(i: int, seed: int = 0) -> dict:
+    """«Сырые» строковые поля одной строки реестра (как их видит _parse_row)."""
+    rnd = random.Random(seed * 1_000_003 + i)
+    announce_id = 16_000_000 + i // 3
+    lot_no = i % 3 + 1
+    customer = rnd.choice(_CUSTOMERS)
+    bin_ = f"{rnd.randrange(10**11, 10**12):012d}"
+    amount = rnd.randrange(10_000, 50_000_000) + rnd.randrange(100) / 100
+    return {
+        "lot_number": f"{announce_id + 66_000_000}-ЗЦП{lot_no}",
+        "announce_number": f"{announce_id}-1",
+        "announce_name": f"{announce_id}-1 Приобретение: {rnd.choice(_ITEMS).lower()}",
+        "announce_url": f"https://www.goszakup.gov.kz/ru/announce/index/{announce_id}",
+        "lot_name": f"{rnd.choice(_ITEMS)} для нужд учреждения №{rnd.randrange(1, 300)}",
+        "lot_url": f"https://www.goszakup.gov.kz/ru/subpriceoffer/index/{announce_id}/{i}",
+        "customer_name": f"{customer} {bin_}",
+        "quantity": str(rnd.randrange(1, 500)),
+        "amount_raw": f"{amount:,.2f}".replace(",", " ").replace(".", ","),
+        "purchase_method": rnd.choice(_METHODS),
+        "status": rnd.choice(_STATUSES),
+    }
+
+
+def synthetic_lot(i: int, seed: int = 0) -> dict:
+    return _build_lot(**synthetic_record(i, seed))
+
+
+def synthetic_pages(n_pages: int, per_page: int = PER_PAGE, seed: int = 0, offset: int = 0) -> Iterator[list[dict]]:
+    """Страницы нормализованных лотов; offset сдвигает окно (новые лоты сверху)."""
+    for page in range(n_pages):
+        start = offset + page * per_page
+        yield [synthetic_lot(i, seed) for i in range(start, start + per_page)]
+
+
+def render_row(record: dict) -> str:
+    """<tr> в разметке реестра (6 колонок) из полей synthetic_record."""
+    e = html.escape
+    announce_href = record["announce_url"].removeprefix(SITE)
+    lot_href = record["lot_url"].removeprefix(SITE)
+    return (
+        "<tr>"
+        f'<td><b>{e(record["lot_number"])}</b><br>'
+        f'<a href="{e(announce_href)}">{e(record["announce_name"])}</a><br>'
+        f'Заказчик: {e(record["customer_name"])}</td>'
+        f'<td><a href="{e(lot_href)}">{e(record["lot_name"])}</a></td>'
+        f'<td>{e(record["quantity"])}</td>'
+        f'<td>{e(record["amount_raw"])}</td>'
+        f'<td>{e(record["purchase_method"])}</td>'
+        f'<td>{e(record["status"])}</td>'
+        "</tr>"
+    )
+
+
+def render_rows(records: Iterable[dict]) -> str:
+    return "\n".join(render_row(r) for r in records)
@@ -0,0 +1,45 @@
+"""
+Нормализация и токенизация текстов лотов.
+
+Общие правила для всех аналитических стадий (классификация, поиск
+дублей, группировка цен), чтобы «одинаковый» текст везде давал
+одинаковые токены.
+"""
+import re
+from typing import Optional
+
+# Грубый стемминг: русская морфология в основном меняет окончания,
+# поэтому первых 6 символов достаточно, чтобы «бензина»/«бензин» совпали
+STEM_LEN = 6
+
+_NON_WORD_RE = re.compile(r"[^a-zа-я0-9]+")
+_ANNOUNCE_SEQ_RE = re.compile(r"^\s*(\d+)")
+
+# Токены короче 3 символов отбрасываются отдельно
+STOPWORDS = frozenset({
+    "для", "при", "под", "над", "без", "или", "что", "как", "его", "это",
+    "все", "так", "том", "они", "оно", "она", "тоо", "гку", "кгу", "гкп",
+})
+
+
+def normalize_text(text: str) -> str:
+    """Нижний регистр, ё→е, всё кроме букв и цифр — в одиночные пробелы."""
+    if not text:
+        return ""
+    text = text.lower().replace("ё", "е")
+    return _NON_WORD_RE.sub(" ", text).strip()
+
+
+def announce_seq(announce_number: Optional[str]) -> Optional[int]:
+    """Порядковый номер объявления: «16413510-1» → 16413510 (растёт со временем публикации)."""
+    m = _ANNOUNCE_SEQ_RE.match(announce_number or "")
+    return int(m.group(1)) if m else None
+
+
+def tokenize(text: str) -> list[str]:
+    """Стеммированные токены без стоп-слов и чисел."""
+    return [
+        tok[:STEM_LEN]
+        for tok in normalize_text(text).split()
+        if len(tok) >= 3 and tok not in STOPWORDS and not tok.isdigit()
+    ]
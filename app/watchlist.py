@@ -0,0 +1,297 @@
+"""
+Сохранённые поиски (watchlist): сопоставление новых лотов с тысячами
+правил покупателей за один проход по тексту лота.
+
+Вместо LIKE-запросов по каждому правилу после запуска все ключевые слова
+всех поисков компилируются в один автомат Ахо–Корасик, БИН заказчиков —
+в словарь, диапазоны сумм — в отсортированные элементарные отрезки.
+Стоимость сопоставления лота — O(длина текста + число срабатываний),
+от количества правил она не зависит.
+
+Ключевое слово совпадает с началом слова нормализованного текста
+(app/text.py): «бензин» находит «бензина» и «бензиновый», но не «кабензин».
+
+Матчер собирается один раз на запуск (load_matcher) и передаётся в
+save_batch — совпадения пишутся в watchlist_matches в той же транзакции,
+что и лоты.
+"""
+import math
+import re
+from bisect import bisect_right
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, Iterator, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.database import insert_ignore
+from app.logger import get_logger
+from app.models import Lot, SavedSearch, WatchlistMatch
+from app.text import normalize_text
+
+logger = get_logger("goszakup.watchlist")
+
+# Поля лота, по которым ищутся ключевые слова
+TEXT_FIELDS = ("lot_name", "announce_name")
+
+_BIN_SPLIT_RE = re.compile(r"[\s,;]+")
+
+
+# ---------------------------------------------------------------------------
+# Автомат Ахо–Корасик
+# ---------------------------------------------------------------------------
+
+class Automaton:
+    """
+    Поиск всех вхождений набора строк за один проход по тексту.
+    add() всех шаблонов → build() → iter(text).
+    """
+
+    def __init__(self):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[int]] = [[]]      # шаблоны, заканчивающиеся в состоянии
+        self._dict_link: list[int] = [0]       # ближайший по fail-цепочке узел с выходом
+        self._lengths: list[int] = []
+        self._built = False
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, pattern: str) -> int:
+        """Добавить шаблон; возвращает его номер."""
+        if self._built:
+            raise RuntimeError("Автомат уже собран")
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._dict_link.append(0)
+            state = nxt
+        index = len(self._lengths)
+        self._lengths.append(len(pattern))
+        self._out[state].append(index)
+        return index
+
+    def build(self) -> "Automaton":
+        """Fail-ссылки и словарные ссылки обходом в ширину."""
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._dict_link[nxt] = target if self._out[target] else self._dict_link[target]
+        self._built = True
+        return self
+
+    def iter(self, text: str) -> Iterator[tuple[int, int]]:
+        """(позиция начала, номер шаблона) для каждого вхождения."""
+        goto, fail, out, dict_link, lengths = self._goto, self._fail, self._out, self._dict_link, self._lengths
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            node = state if out[state] else dict_link[state]
+            while node:
+                for index in out[node]:
+                    yield i - lengths[index] + 1, index
+                node = dict_link[node]
+
+
+# ---------------------------------------------------------------------------
+# Матчер
+# ---------------------------------------------------------------------------
+
+@dataclass
+class _Rule:
+    search_id: int
+    has_keywords: bool
+    has_bins: bool
+    has_amount: bool
+
+
+def _split_keywords(value: Optional[str]) -> list[str]:
+    return [kw for kw in (normalize_text(line) for line in (value or "").splitlines()) if kw]
+
+
+def _split_bins(value: Optional[str]) -> list[str]:
+    return [b for b in _BIN_SPLIT_RE.split(value or "") if b]
+
+
+class WatchlistMatcher:
+    """
+    Скомпилированные правила всех активных поисков.
+
+    match() собирает кандидатов из трёх индексов (автомат, словарь БИН,
+    отрезки сумм) и оставляет поиски, у которых выполнены все заданные
+    виды условий.
+    """
+
+    def __init__(self, searches: Iterable):
+        self.rules: dict[int, _Rule] = {}
+        self._automaton = Automaton()
+        self._keyword_searches: list[list[int]] = []   # номер шаблона → поиски
+        self._keywords: list[str] = []
+        self._bins: dict[str, list[int]] = defaultdict(list)
+        ranges: list[tuple[float, float, int]] = []
+
+        pattern_index: dict[str, int] = {}
+        for s in searches:
+            keywords = _split_keywords(s.keywords)
+            bins = _split_bins(s.customer_bins)
+            has_amount = s.amount_min is not None or s.amount_max is not None
+            if not (keywords or bins or has_amount):
+                continue
+            self.rules[s.id] = _Rule(s.id, bool(keywords), bool(bins), has_amount)
+
+            for kw in dict.fromkeys(keywords):
+                index = pattern_index.get(kw)
+                if index is None:
+                    index = pattern_index[kw] = self._automaton.add(kw)
+                    self._keywords.append(kw)
+                    self._keyword_searches.append([])
+                self._keyword_searches[index].append(s.id)
+            for b in dict.fromkeys(bins):
+                self._bins[b].append(s.id)
+            if has_amount:
+                lo = float(s.amount_min) if s.amount_min is not None else float("-inf")
+                hi = float(s.amount_max) if s.amount_max is not None else float("inf")
+                ranges.append((lo, hi, s.id))
+
+        self._automaton.build()
+        self._bounds, self._segments = self._build_segments(ranges)
+
+    @staticmethod
+    def _build_segments(ranges: list[tuple[float, float, int]]) -> tuple[list[float], list[tuple[int, ...]]]:
+        """
+        Элементарные отрезки [bounds[i], bounds[i+1]) и поиски, чей диапазон
+        их покрывает: поиск суммы — bisect + готовый кортеж. Верхняя граница
+        диапазона включительная, поэтому отрезок закрывается на следующем
+        после неё числе.
+        """
+        if not ranges:
+            return [], []
+        events: dict[float, list[tuple[int, int]]] = defaultdict(list)
+        for lo, hi, search_id in ranges:
+            if lo > hi:  # пустой диапазон — поиск никогда не сработает
+                continue
+            events[lo].append((1, search_id))
+            if hi != float("inf"):
+                events[math.nextafter(hi, float("inf"))].append((-1, search_id))
+        bounds = sorted(events)
+        segments = []
+        active: set[int] = set()
+        for bound in bounds:
+            for delta, search_id in events[bound]:
+                if delta > 0:
+                    active.add(search_id)
+                else:
+                    active.discard(search_id)
+            segments.append(tuple(sorted(active)))
+        return bounds, segments
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def _amount_searches(self, amount) -> tuple[int, ...]:
+        if amount is None or not self._bounds:
+            return ()
+        i = bisect_right(self._bounds, float(amount)) - 1
+        return self._segments[i] if i >= 0 else ()
+
+    def match(self, lot) -> dict[int, list[str]]:
+        """{search_id: сработавшие ключевые слова} для одного лота (dict или строка БД)."""
+        get = lot.get if isinstance(lot, dict) else lambda f: getattr(lot, f, None)
+
+        keyword_hits: dict[int, list[str]] = defaultdict(list)
+        if self._keywords:
+            text = " ".join(normalize_text(get(f) or "") for f in TEXT_FIELDS)
+            seen: set[int] = set()
+            for start, index in self._automaton.iter(text):
+                # Только с начала слова; одно слово учитываем один раз
+                if index in seen or (start and text[start - 1] != " "):
+                    continue
+                seen.add(index)
+                for search_id in self._keyword_searches[index]:
+                    keyword_hits[search_id].append(self._keywords[index])
+
+        bin_hits = set(self._bins.get(get("customer_bin") or "", ()))
+        amount_hits = set(self._amount_searches(get("purchase_amount")))
+
+        matches = {}
+        for search_id in keyword_hits.keys() | bin_hits | amount_hits:
+            rule = self.rules[search_id]
+            if rule.has_keywords and search_id not in keyword_hits:
+                continue
+            if rule.has_bins and search_id not in bin_hits:
+                continue
+            if rule.has_amount and search_id not in amount_hits:
+                continue
+            matches[search_id] = keyword_hits.get(search_id, [])
+        return matches
+
+
+def load_matcher(db: Session) -> Optional[WatchlistMatcher]:
+    """Матчер по активным поискам; None, если поисков нет."""
+    searches = db.execute(select(SavedSearch).where(SavedSearch.active.is_(True))).scalars().all()
+    matcher = WatchlistMatcher(searches)
+    if not len(matcher):
+        return None
+    logger.info(
+        f"Watchlist: {len(matcher)} поисков, {len(matcher._keywords)} ключевых слов, "
+        f"{len(matcher._bins)} БИН, {len(matcher._segments)} отрезков сумм"
+    )
+    return matcher
+
+
+def match_lots(db: Session, matcher: WatchlistMatcher, lots: Sequence[tuple[int, object]]) -> int:
+    """
+    Сопоставить лоты (id, лот) и записать совпадения (без commit; повторное
+    совпадение той же пары игнорируется). Возвращает число новых строк-кандидатов.
+    """
+    now = datetime.utcnow()
+    rows = [
+        {"search_id": search_id, "lot_id": lot_id,
+         "matched_keywords": "\n".join(keywords) or None, "matched_at": now}
+        for lot_id, lot in lots
+        for search_id, keywords in matcher.match(lot).items()
+    ]
+    if rows:
+        db.execute(insert_ignore(WatchlistMatch.__table__, db.get_bind().dialect.name), rows)
+    return len(rows)
+
+
+def rematch(db: Session, since: Optional[datetime] = None, chunk_size: int = 5000) -> int:
+    """Прогнать уже сохранённые лоты (created_at >= since) через текущие поиски."""
+    matcher = load_matcher(db)
+    if matcher is None:
+        logger.info("Watchlist: активных поисков нет")
+        return 0
+
+    query = select(Lot.id, Lot.customer_bin, Lot.purchase_amount, *(getattr(Lot, f) for f in TEXT_FIELDS))
+    if since is not None:
+        query = query.where(Lot.created_at >= since)
+
+    last_id = 0
+    total = 0
+    while True:
+        rows = db.execute(query.where(Lot.id > last_id).order_by(Lot.id).limit(chunk_size)).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        total += match_lots(db, matcher, [(r.id, r) for r in rows])
+        db.commit()
+    logger.info(f"Watchlist rematch: совпадений {total}")
+    return total
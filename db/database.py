@@ -1,11 +1,38 @@
+import os
 import sqlite3
 from pathlib import Path
 
-DB_NAME = "tenders.db"
+from app.config import DATABASE_URL
+
+# Если основная БД — SQLite, classified_tenders/raw_tenders живут в том же файле
+if DATABASE_URL.startswith("sqlite:///"):
+    DB_NAME = DATABASE_URL[len("sqlite:///"):].split("?")[0]
+else:
+    DB_NAME = os.getenv("TENDERS_DB", "tenders.db")
+
+# Применяются к каждому соединению: и здесь, и в SQLAlchemy-движке (app/database.py)
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",       # читатели не блокируют писателя
+    "PRAGMA synchronous=NORMAL",     # в WAL это безопасно и в разы быстрее FULL
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",      # 64 МБ страничного кеша
+    "PRAGMA mmap_size=268435456",    # 256 МБ memory-mapped I/O
+    "PRAGMA busy_timeout=30000",
+    "PRAGMA foreign_keys=ON",
+)
+
+
+def apply_sqlite_pragmas(conn) -> None:
+    cur = conn.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cur.execute(pragma)
+    cur.close()
 
 
 def get_connection():
-    return sqlite3.connect(DB_NAME)
+    conn = sqlite3.connect(DB_NAME)
+    apply_sqlite_pragmas(conn)
+    return conn
 
 
 def init_db():
@@ -42,4 +69,4 @@ def init_db():
     cur.execute("CREATE INDEX IF NOT EXISTS idx_classified_tender_id ON classified_tenders(tender_id);")
 
     conn.commit()
-    conn.close()
\ No newline at end of file
+    conn.close()
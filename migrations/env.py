@@ -2,7 +2,6 @@ import os
 import sys
 from logging.config import fileConfig
 
-from sqlalchemy import engine_from_config, pool
 from alembic import context
 
 # Добавляем корень проекта в path
@@ -11,21 +10,17 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 from dotenv import load_dotenv
 load_dotenv()
 
-from app.database import Base
+from app.config import DATABASE_URL
+from app.database import Base, make_engine
 from app.models import Lot, ParseRun  # noqa: F401 — чтобы модели зарегистрировались
 
 config = context.config
 
-# Устанавливаем URL из переменных окружения
-DB_HOST = os.getenv("DB_HOST", "localhost")
-DB_PORT = os.getenv("DB_PORT", "3306")
-DB_USER = os.getenv("DB_USER", "root")
-DB_PASSWORD = os.getenv("DB_PASSWORD", "")
-DB_NAME = os.getenv("DB_NAME", "goszakup")
-config.set_main_option(
-    "sqlalchemy.url",
-    f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}?charset=utf8mb4"
-)
+# URL берём из того же места, что и приложение (DATABASE_URL или DB_*)
+config.set_main_option("sqlalchemy.url", DATABASE_URL.replace("%", "%%"))
+
+# SQLite не умеет большинство ALTER TABLE — Alembic пересоздаёт таблицу (batch mode)
+RENDER_AS_BATCH = DATABASE_URL.startswith("sqlite")
 
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
@@ -40,19 +35,21 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        render_as_batch=RENDER_AS_BATCH,
     )
     with context.begin_transaction():
         context.run_migrations()
 
 
 def run_migrations_online() -> None:
-    connectable = engine_from_config(
-        config.get_section(config.config_ini_section, {}),
-        prefix="sqlalchemy.",
-        poolclass=pool.NullPool,
-    )
+    # make_engine — чтобы на SQLite применялись те же pragmas (WAL и т.д.)
+    connectable = make_engine(DATABASE_URL)
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            render_as_batch=RENDER_AS_BATCH,
+        )
         with context.begin_transaction():
             context.run_migrations()
 
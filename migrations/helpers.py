@@ -0,0 +1,33 @@
+"""
+Утилиты для миграций, одинаково работающих на MySQL и SQLite.
+
+Часть ранних ревизий добавляет колонки/индексы, которые уже создаёт
+0001_initial, поэтому такие операции выполняются только при отсутствии
+объекта — цепочка проходит и на чистой БД, и на уже живой.
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+def dialect_name() -> str:
+    return op.get_bind().dialect.name
+
+
+def has_column(table: str, column: str) -> bool:
+    inspector = sa.inspect(op.get_bind())
+    return any(c["name"] == column for c in inspector.get_columns(table))
+
+
+def has_index(table: str, index: str) -> bool:
+    inspector = sa.inspect(op.get_bind())
+    return any(i["name"] == index for i in inspector.get_indexes(table))
+
+
+def add_column_if_missing(table: str, column: sa.Column) -> None:
+    if not has_column(table, column.name):
+        op.add_column(table, column)
+
+
+def create_index_if_missing(name: str, table: str, columns: list[str], **kw) -> None:
+    if not has_index(table, name):
+        op.create_index(name, table, columns, **kw)
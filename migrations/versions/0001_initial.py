@@ -18,7 +18,7 @@ depends_on: Union[str, Sequence[str], None] = None
 def upgrade() -> None:
     op.create_table(
         "lots",
-        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), autoincrement=True, nullable=False),
         sa.Column("unique_hash", sa.String(64), nullable=False, comment="SHA256 уникальный хеш"),
         sa.Column("lot_number", sa.String(100), nullable=True, comment="Номер лота"),
         sa.Column("announce_number", sa.String(100), nullable=True, comment="Номер объявления"),
@@ -51,7 +51,7 @@ def upgrade() -> None:
 
     op.create_table(
         "parse_runs",
-        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), autoincrement=True, nullable=False),
         sa.Column("started_at", sa.DateTime(), nullable=False),
         sa.Column("finished_at", sa.DateTime(), nullable=True),
         sa.Column("status", sa.String(50), default="running", comment="running/success/failed"),
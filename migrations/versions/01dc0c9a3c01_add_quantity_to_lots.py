@@ -10,6 +10,8 @@ from typing import Sequence, Union
 from alembic import op
 import sqlalchemy as sa
 
+from migrations.helpers import add_column_if_missing
+
 # revision identifiers, used by Alembic.
 revision: str = '01dc0c9a3c01'
 down_revision: Union[str, None] = 'f1757bf7ae4a'
@@ -18,7 +20,7 @@ depends_on: Union[str, Sequence[str], None] = None
 
 
 def upgrade() -> None:
-    op.add_column(
+    add_column_if_missing(
         "lots",
         sa.Column("quantity", sa.String(100), nullable=True)
     )
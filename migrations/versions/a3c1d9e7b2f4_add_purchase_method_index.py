@@ -0,0 +1,26 @@
+"""add ix_purchase_method (parity with models)
+
+Revision ID: a3c1d9e7b2f4
+Revises: 01dc0c9a3c01
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from migrations.helpers import create_index_if_missing
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c1d9e7b2f4'
+down_revision: Union[str, None] = '01dc0c9a3c01'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    create_index_if_missing("ix_purchase_method", "lots", ["purchase_method"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_purchase_method", table_name="lots")
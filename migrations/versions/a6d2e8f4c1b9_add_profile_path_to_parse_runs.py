@@ -0,0 +1,28 @@
+"""add profile_path to parse_runs
+
+Revision ID: a6d2e8f4c1b9
+Revises: f5c1a9d3e7b2
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6d2e8f4c1b9'
+down_revision: Union[str, None] = 'f5c1a9d3e7b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "parse_runs",
+        sa.Column("profile_path", sa.String(500), nullable=True, comment="Каталог артефактов профилирования (PROFILE)"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("parse_runs", "profile_path")
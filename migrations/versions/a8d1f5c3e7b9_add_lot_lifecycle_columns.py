@@ -0,0 +1,42 @@
+"""add lot lifecycle columns (first/last seen, disappeared)
+
+Revision ID: a8d1f5c3e7b9
+Revises: f2c6e8a4b9d1
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8d1f5c3e7b9'
+down_revision: Union[str, None] = 'f2c6e8a4b9d1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # NULL по умолчанию — на MySQL 8 это мгновенный ADD COLUMN, без перестройки lots
+    op.add_column("lots", sa.Column("first_seen_run_id", sa.BigInteger(), nullable=True,
+                                    comment="Запуск, впервые увидевший лот"))
+    op.add_column("lots", sa.Column("last_seen_run_id", sa.BigInteger(), nullable=True,
+                                    comment="Последний запуск, видевший лот"))
+    op.add_column("lots", sa.Column("last_seen_at", sa.DateTime(), nullable=True))
+    op.add_column("lots", sa.Column("disappeared_at", sa.DateTime(), nullable=True,
+                                    comment="Не найден полным обходом (снят/отменён)"))
+
+    op.add_column("parse_runs", sa.Column("full_sweep", sa.Boolean(), nullable=True,
+                                          comment="Обход видел весь реестр, без кеша страниц"))
+    op.add_column("parse_runs", sa.Column("lots_disappeared", sa.Integer(), nullable=True,
+                                          comment="Живых лотов, не найденных полным обходом"))
+
+
+def downgrade() -> None:
+    op.drop_column("parse_runs", "lots_disappeared")
+    op.drop_column("parse_runs", "full_sweep")
+    op.drop_column("lots", "disappeared_at")
+    op.drop_column("lots", "last_seen_at")
+    op.drop_column("lots", "last_seen_run_id")
+    op.drop_column("lots", "first_seen_run_id")
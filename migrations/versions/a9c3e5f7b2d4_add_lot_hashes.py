@@ -0,0 +1,56 @@
+"""add lot_hashes (global unique_hash key)
+
+Revision ID: a9c3e5f7b2d4
+Revises: f8d2b4a6c9e3
+Create Date: 2026-10-20 04:00:00.000000
+
+lot_hashes заполняется из lots чанками по id (INSERT IGNORE … SELECT:
+при дублях хеша из разных партиций остаётся лот с меньшим id). uq_lot_hash
+не трогаем: на MySQL он уже (unique_hash, created_at) после f2c6e8a4b9d1,
+на остальных СУБД lots не партиционирована и ключ остаётся по unique_hash.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9c3e5f7b2d4'
+down_revision: Union[str, None] = 'f8d2b4a6c9e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CHUNK_SIZE = 200_000
+
+lots = sa.table("lots", sa.column("id"), sa.column("unique_hash"))
+lot_hashes = sa.table("lot_hashes", sa.column("unique_hash"), sa.column("lot_id"))
+
+
+def upgrade() -> None:
+    op.create_table(
+        "lot_hashes",
+        sa.Column("unique_hash", sa.BINARY(32).with_variant(sa.LargeBinary(32), "sqlite"), nullable=False),
+        sa.Column("lot_id", sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint("unique_hash"),
+        mysql_charset="utf8mb4",
+        mysql_collate="utf8mb4_unicode_ci",
+    )
+    op.create_index("ix_lot_hashes_lot_id", "lot_hashes", ["lot_id"])
+
+    conn = op.get_bind()
+    copy = (
+        sa.insert(lot_hashes)
+        .from_select(["unique_hash", "lot_id"], sa.select(lots.c.unique_hash, lots.c.id)
+                     .where(lots.c.id > sa.bindparam("lo"), lots.c.id <= sa.bindparam("hi"))
+                     .order_by(lots.c.id))
+        .prefix_with("IGNORE", dialect="mysql")
+        .prefix_with("OR IGNORE", dialect="sqlite")
+    )
+    max_id = conn.execute(sa.text("SELECT MAX(id) FROM lots")).scalar() or 0
+    for start in range(0, max_id, CHUNK_SIZE):
+        conn.execute(copy, {"lo": start, "hi": start + CHUNK_SIZE})
+
+
+def downgrade() -> None:
+    op.drop_index("ix_lot_hashes_lot_id", table_name="lot_hashes")
+    op.drop_table("lot_hashes")
@@ -0,0 +1,112 @@
+"""store unique_hash as BINARY(32) + hash_prefix
+
+Revision ID: b3e9f1c7a5d2
+Revises: a6d2e8f4c1b9
+Create Date: 2026-10-19 16:00:00.000000
+
+Онлайн-миграция:
+  1. ADD COLUMN unique_hash_bin / hash_prefix (NULL) — без перестройки таблицы;
+  2. backfill короткими транзакциями по CHUNK строк (keyset по id),
+     таблица не блокируется, краулер может работать;
+  3. индекс ix_hash_prefix;
+  4. swap: дозаполнение хвоста и замена колонки + uq_lot_hash одним
+     ALTER (MySQL: ALGORITHM=INPLACE, LOCK=NONE). На этот шаг краулер
+     со старым кодом нужно остановить — он пишет hex-строки.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import dialect_name, has_column, has_index
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e9f1c7a5d2'
+down_revision: Union[str, None] = 'a6d2e8f4c1b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CHUNK = 5000
+HASH_COMMENT = "SHA256 хеш для дедупликации"
+
+HEX_TYPE = sa.String(64)
+BIN_TYPE = sa.BINARY(32).with_variant(sa.LargeBinary(32), "sqlite")
+
+
+def _backfill(source: str, target: str, convert, with_prefix: bool, last_id: int = 0) -> int:
+    """
+    Заполнить target из source по keyset-чанкам (id > last_id), каждый
+    чанк — своя транзакция. Возвращает последний обработанный id.
+    """
+    lots = sa.table(
+        "lots", sa.column("id"), sa.column(source), sa.column(target), sa.column("hash_prefix"),
+    )
+    values = {target: sa.bindparam("_value")}
+    if with_prefix:
+        values["hash_prefix"] = sa.bindparam("_prefix")
+    stmt = lots.update().where(lots.c.id == sa.bindparam("_id")).values(**values)
+
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        while True:
+            rows = bind.execute(
+                sa.select(lots.c.id, lots.c[source])
+                .where(lots.c.id > last_id)
+                .order_by(lots.c.id)
+                .limit(CHUNK)
+            ).all()
+            if not rows:
+                return last_id
+            last_id = rows[-1][0]
+            params = []
+            for lot_id, value in rows:
+                converted = convert(value)
+                param = {"_id": lot_id, "_value": converted}
+                if with_prefix:
+                    param["_prefix"] = int.from_bytes(converted[:8], "big", signed=True)
+                params.append(param)
+            bind.execute(stmt, params)
+
+
+def _swap(old: str, new: str, new_type, mysql_type: str) -> None:
+    """Заменить колонку unique_hash на new (NOT NULL) вместе с uq_lot_hash."""
+    if dialect_name() == "mysql":
+        op.execute(
+            f"ALTER TABLE lots DROP INDEX uq_lot_hash, DROP COLUMN {old}, "
+            f"CHANGE COLUMN {new} unique_hash {mysql_type} NOT NULL COMMENT '{HASH_COMMENT}', "
+            "ADD UNIQUE INDEX uq_lot_hash (unique_hash), ALGORITHM=INPLACE, LOCK=NONE"
+        )
+        return
+    with op.batch_alter_table("lots", recreate="always") as batch:
+        batch.drop_constraint("uq_lot_hash", type_="unique")
+        batch.drop_column(old)
+        batch.alter_column(new, new_column_name="unique_hash", existing_type=new_type,
+                           nullable=False, comment=HASH_COMMENT)
+    # Ограничение на переименованную колонку — отдельным проходом batch
+    with op.batch_alter_table("lots") as batch:
+        batch.create_unique_constraint("uq_lot_hash", ["unique_hash"])
+
+
+def upgrade() -> None:
+    if not has_column("lots", "unique_hash_bin"):
+        op.add_column("lots", sa.Column("unique_hash_bin", BIN_TYPE, nullable=True))
+    if not has_column("lots", "hash_prefix"):
+        op.add_column("lots", sa.Column("hash_prefix", sa.BigInteger(), nullable=True,
+                                        comment="Первые 8 байт unique_hash"))
+
+    last_id = _backfill("unique_hash", "unique_hash_bin", bytes.fromhex, with_prefix=True)
+    if not has_index("lots", "ix_hash_prefix"):
+        op.create_index("ix_hash_prefix", "lots", ["hash_prefix"])
+
+    # Хвост, вставленный во время backfill и построения индекса
+    _backfill("unique_hash", "unique_hash_bin", bytes.fromhex, with_prefix=True, last_id=last_id)
+    _swap("unique_hash", "unique_hash_bin", BIN_TYPE, "BINARY(32)")
+
+
+def downgrade() -> None:
+    op.add_column("lots", sa.Column("unique_hash_hex", HEX_TYPE, nullable=True))
+    _backfill("unique_hash", "unique_hash_hex", bytes.hex, with_prefix=False)
+    _swap("unique_hash", "unique_hash_hex", HEX_TYPE, "VARCHAR(64)")
+
+    op.drop_index("ix_hash_prefix", table_name="lots")
+    op.drop_column("lots", "hash_prefix")
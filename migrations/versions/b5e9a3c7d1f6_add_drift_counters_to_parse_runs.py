@@ -0,0 +1,32 @@
+"""add pagination drift counters to parse_runs
+
+Revision ID: b5e9a3c7d1f6
+Revises: a8d1f5c3e7b9
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e9a3c7d1f6'
+down_revision: Union[str, None] = 'a8d1f5c3e7b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("parse_runs", sa.Column("drift_duplicates", sa.Integer(), nullable=True,
+                                          comment="Дублей из-за сдвига страниц, отброшено до БД"))
+    op.add_column("parse_runs", sa.Column("drift_recovered", sa.Integer(), nullable=True,
+                                          comment="Лотов, найденных перечитыванием после сдвига"))
+    op.add_column("parse_runs", sa.Column("drift_skipped", sa.Integer(), nullable=True,
+                                          comment="Оценка пропущенных из-за сдвига лотов"))
+
+
+def downgrade() -> None:
+    op.drop_column("parse_runs", "drift_skipped")
+    op.drop_column("parse_runs", "drift_recovered")
+    op.drop_column("parse_runs", "drift_duplicates")
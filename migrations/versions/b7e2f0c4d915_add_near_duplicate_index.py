@@ -0,0 +1,45 @@
+"""add near-duplicate MinHash/LSH index
+
+Revision ID: b7e2f0c4d915
+Revises: a3c1d9e7b2f4
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2f0c4d915'
+down_revision: Union[str, None] = 'a3c1d9e7b2f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "lots",
+        sa.Column("duplicate_of", sa.BigInteger(), nullable=True, comment="id исходного лота (MinHash/LSH)"),
+    )
+    op.create_index("ix_duplicate_of", "lots", ["duplicate_of"])
+
+    op.create_table(
+        "lot_signatures",
+        sa.Column("lot_id", sa.BigInteger(), autoincrement=False, nullable=False),
+        sa.Column("signature", sa.LargeBinary(), nullable=False),
+        sa.PrimaryKeyConstraint("lot_id"),
+    )
+    op.create_table(
+        "lot_lsh_buckets",
+        sa.Column("band_key", sa.BigInteger(), nullable=False),
+        sa.Column("lot_id", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("band_key", "lot_id", name="pk_lot_lsh_buckets"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("lot_lsh_buckets")
+    op.drop_table("lot_signatures")
+    op.drop_index("ix_duplicate_of", table_name="lots")
+    op.drop_column("lots", "duplicate_of")
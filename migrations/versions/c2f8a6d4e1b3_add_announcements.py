@@ -0,0 +1,88 @@
+"""add announcements dimension and lots.announcement_id
+
+Revision ID: c2f8a6d4e1b3
+Revises: b5e9a3c7d1f6
+Create Date: 2026-10-20 00:00:00.000000
+
+Таблица заполняется по lots чанками по id (GROUP BY announce_number внутри
+чанка, наименование и заказчик — из лота с наименьшим id, + upsert с
+прибавлением lot_count), затем тем же чанком проставляется
+lots.announcement_id. URL объявления в lots не хранился — он дозаполнится
+при следующей встрече объявления в реестре. Повторная сборка —
+`python -m app.main announcements`.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.database import upsert_increment
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2f8a6d4e1b3'
+down_revision: Union[str, None] = 'b5e9a3c7d1f6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CHUNK_SIZE = 200_000
+
+announcements = sa.table(
+    "announcements",
+    sa.column("announce_number"), sa.column("announce_name"), sa.column("announce_url"),
+    sa.column("customer_name"), sa.column("customer_bin"), sa.column("lot_count"), sa.column("created_at"),
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "announcements",
+        sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), autoincrement=True, nullable=False),
+        sa.Column("announce_number", sa.String(100), nullable=False, comment="Номер объявления (напр. 16413510-1)"),
+        sa.Column("announce_name", sa.Text(), nullable=True),
+        sa.Column("announce_url", sa.Text(), nullable=True),
+        sa.Column("customer_name", sa.Text(), nullable=True),
+        sa.Column("customer_bin", sa.String(20), nullable=True),
+        sa.Column("lot_count", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("announce_number", name="uq_announce_number"),
+        mysql_charset="utf8mb4",
+        mysql_collate="utf8mb4_unicode_ci",
+    )
+    op.create_index("ix_announcements_customer_bin", "announcements", ["customer_bin"])
+    op.add_column("lots", sa.Column("announcement_id", sa.BigInteger(), nullable=True,
+                                    comment="id в announcements"))
+    op.create_index("ix_announcement_id", "lots", ["announcement_id"])
+
+    conn = op.get_bind()
+    upsert = upsert_increment(
+        announcements, conn.dialect.name, ("announce_number",), ("lot_count",),
+        ("announce_name", "customer_name", "customer_bin"),
+    )
+    max_id = conn.execute(sa.text("SELECT MAX(id) FROM lots")).scalar() or 0
+    for start in range(0, max_id, CHUNK_SIZE):
+        chunk = {"lo": start, "hi": start + CHUNK_SIZE}
+        rows = conn.execute(sa.text(
+            "SELECT l.announce_number, f.n, l.announce_name, l.customer_name, l.customer_bin, l.created_at "
+            "FROM lots l JOIN (SELECT MIN(id) AS id, COUNT(*) AS n FROM lots "
+            "WHERE id > :lo AND id <= :hi AND announce_number IS NOT NULL GROUP BY announce_number) f "
+            "ON l.id = f.id"
+        ), chunk).all()
+        if rows:
+            conn.execute(upsert, [
+                {"announce_number": number, "lot_count": count, "announce_name": name, "announce_url": None,
+                 "customer_name": customer, "customer_bin": bin_, "created_at": created}
+                for number, count, name, customer, bin_, created in rows
+            ])
+        conn.execute(sa.text(
+            "UPDATE lots SET announcement_id = "
+            "(SELECT a.id FROM announcements a WHERE a.announce_number = lots.announce_number) "
+            "WHERE id > :lo AND id <= :hi AND announce_number IS NOT NULL"
+        ), chunk)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_announcement_id", table_name="lots")
+    op.drop_column("lots", "announcement_id")
+    op.drop_index("ix_announcements_customer_bin", table_name="announcements")
+    op.drop_table("announcements")
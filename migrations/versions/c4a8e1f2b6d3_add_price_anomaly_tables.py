@@ -0,0 +1,52 @@
+"""add price anomaly tables
+
+Revision ID: c4a8e1f2b6d3
+Revises: b7e2f0c4d915
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a8e1f2b6d3'
+down_revision: Union[str, None] = 'b7e2f0c4d915'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "price_group_stats",
+        sa.Column("group_key", sa.BigInteger(), autoincrement=False, nullable=False),
+        sa.Column("name_key", sa.String(200), nullable=False, comment="Стеммированный ключ названия"),
+        sa.Column("purchase_method", sa.String(200), nullable=True),
+        sa.Column("lot_count", sa.Integer(), nullable=False),
+        sa.Column("histogram", sa.LargeBinary(), nullable=False, comment="uint32[HIST_BINS] по log10(суммы)"),
+        sa.Column("median", sa.Float(), nullable=True, comment="Медиана log10(суммы)"),
+        sa.Column("mad", sa.Float(), nullable=True, comment="MAD log10(суммы)"),
+        sa.Column("q25", sa.Float(), nullable=True),
+        sa.Column("q75", sa.Float(), nullable=True),
+        sa.Column("q90", sa.Float(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("group_key"),
+        mysql_charset="utf8mb4",
+        mysql_collate="utf8mb4_unicode_ci",
+    )
+    op.create_table(
+        "lot_price_scores",
+        sa.Column("lot_id", sa.BigInteger(), autoincrement=False, nullable=False),
+        sa.Column("group_key", sa.BigInteger(), nullable=False),
+        sa.Column("score", sa.Float(), nullable=True, comment="NULL — группа слишком мала"),
+        sa.Column("scored_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("lot_id"),
+    )
+    op.create_index("ix_lot_price_scores_group", "lot_price_scores", ["group_key"])
+    op.create_index("ix_lot_price_scores_score", "lot_price_scores", ["score"])
+
+
+def downgrade() -> None:
+    op.drop_table("lot_price_scores")
+    op.drop_table("price_group_stats")
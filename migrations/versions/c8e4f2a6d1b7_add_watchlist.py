@@ -0,0 +1,54 @@
+"""add saved searches and watchlist matches
+
+Revision ID: c8e4f2a6d1b7
+Revises: b3e9f1c7a5d2
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8e4f2a6d1b7'
+down_revision: Union[str, None] = 'b3e9f1c7a5d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "saved_searches",
+        sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), autoincrement=True, nullable=False),
+        sa.Column("name", sa.String(200), nullable=False),
+        sa.Column("owner", sa.String(100), nullable=True, comment="Кому принадлежит поиск"),
+        sa.Column("keywords", sa.Text(), nullable=True, comment="Ключевые слова, по одному в строке"),
+        sa.Column("customer_bins", sa.Text(), nullable=True, comment="БИН заказчиков через пробел/запятую"),
+        sa.Column("amount_min", sa.Numeric(20, 2), nullable=True),
+        sa.Column("amount_max", sa.Numeric(20, 2), nullable=True),
+        sa.Column("active", sa.Boolean(), nullable=False, server_default=sa.true()),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        mysql_charset="utf8mb4",
+        mysql_collate="utf8mb4_unicode_ci",
+    )
+    op.create_table(
+        "watchlist_matches",
+        sa.Column("search_id", sa.BigInteger(), nullable=False),
+        sa.Column("lot_id", sa.BigInteger(), nullable=False),
+        sa.Column("matched_keywords", sa.Text(), nullable=True, comment="Сработавшие ключевые слова"),
+        sa.Column("matched_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("search_id", "lot_id", name="pk_watchlist_matches"),
+        mysql_charset="utf8mb4",
+        mysql_collate="utf8mb4_unicode_ci",
+    )
+    op.create_index("ix_watchlist_matches_lot", "watchlist_matches", ["lot_id"])
+    op.create_index("ix_watchlist_matches_matched_at", "watchlist_matches", ["matched_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_watchlist_matches_matched_at", table_name="watchlist_matches")
+    op.drop_index("ix_watchlist_matches_lot", table_name="watchlist_matches")
+    op.drop_table("watchlist_matches")
+    op.drop_table("saved_searches")
@@ -0,0 +1,61 @@
+"""add active_lots hot table
+
+Revision ID: d4a7c9e1f3b5
+Revises: c8e4f2a6d1b7
+Create Date: 2026-10-19 19:00:00.000000
+
+Таблица сразу заполняется живыми лотами (статус не из FINAL_STATUSES)
+одним INSERT … SELECT; при другом наборе статусов — `python -m app.main
+active-lots`.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.config import FINAL_STATUSES
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a7c9e1f3b5'
+down_revision: Union[str, None] = 'c8e4f2a6d1b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "active_lots",
+        sa.Column("lot_id", sa.BigInteger(), autoincrement=False, nullable=False),
+        sa.Column("lot_number", sa.String(100), nullable=True),
+        sa.Column("lot_name", sa.String(500), nullable=True, comment="Обрезано до 500 символов"),
+        sa.Column("status", sa.String(200), nullable=True),
+        sa.Column("purchase_method", sa.String(200), nullable=True),
+        sa.Column("customer_bin", sa.String(20), nullable=True),
+        sa.Column("purchase_amount", sa.Numeric(20, 2), nullable=True),
+        sa.Column("deadline_date", sa.DateTime(), nullable=True),
+        sa.Column("publication_date", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("lot_id"),
+        mysql_charset="utf8mb4",
+        mysql_collate="utf8mb4_unicode_ci",
+    )
+    op.create_index("ix_active_lots_status", "active_lots", ["status"])
+    op.create_index("ix_active_lots_customer_bin", "active_lots", ["customer_bin"])
+    op.create_index("ix_active_lots_deadline", "active_lots", ["deadline_date"])
+    op.create_index("ix_active_lots_created_at", "active_lots", ["created_at"])
+
+    placeholders = ", ".join(f":s{i}" for i in range(len(FINAL_STATUSES)))
+    op.get_bind().execute(
+        sa.text(
+            "INSERT INTO active_lots (lot_id, lot_number, lot_name, status, purchase_method, "
+            "customer_bin, purchase_amount, deadline_date, publication_date, created_at) "
+            "SELECT id, lot_number, SUBSTR(lot_name, 1, 500), status, purchase_method, "
+            "customer_bin, purchase_amount, deadline_date, publication_date, created_at "
+            f"FROM lots WHERE status IS NULL OR status NOT IN ({placeholders})"
+        ),
+        {f"s{i}": s for i, s in enumerate(FINAL_STATUSES)},
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("active_lots")
@@ -0,0 +1,67 @@
+"""add registry sources: parse_runs.source, announcement listing fields, contracts
+
+Revision ID: d6b1e9f3a7c5
+Revises: c2f8a6d4e1b3
+Create Date: 2026-10-20 01:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'd6b1e9f3a7c5'
+down_revision: Union[str, None] = 'c2f8a6d4e1b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Прошлые запуски — все по реестру лотов
+    op.add_column("parse_runs", sa.Column(
+        "source", sa.String(50), nullable=False, server_default="lots",
+        comment="Реестр-источник (app/sources): lots / announcements / contracts",
+    ))
+    op.create_index("ix_parse_runs_source", "parse_runs", ["source", "status"])
+
+    op.add_column("announcements", sa.Column("status", sa.String(200), nullable=True,
+                                             comment="Статус из реестра объявлений"))
+    op.add_column("announcements", sa.Column("purchase_method", sa.String(200), nullable=True))
+    op.add_column("announcements", sa.Column("total_amount", sa.Numeric(20, 2), nullable=True,
+                                             comment="Сумма закупки (KZT)"))
+
+    op.create_table(
+        "contracts",
+        sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), autoincrement=True, nullable=False),
+        sa.Column("unique_hash", sa.BINARY(32).with_variant(sa.LargeBinary(32), "sqlite"), nullable=False,
+                  comment="SHA256(contract_number + customer_bin)"),
+        sa.Column("contract_number", sa.String(100), nullable=True),
+        sa.Column("customer_name", sa.Text(), nullable=True),
+        sa.Column("customer_bin", sa.String(20), nullable=True),
+        sa.Column("supplier_name", sa.Text(), nullable=True),
+        sa.Column("supplier_bin", sa.String(20), nullable=True),
+        sa.Column("contract_amount", sa.Numeric(20, 2), nullable=True, comment="Сумма договора (KZT)"),
+        sa.Column("contract_date", sa.Date(), nullable=True, comment="Дата заключения"),
+        sa.Column("status", sa.String(200), nullable=True),
+        sa.Column("contract_url", sa.Text(), nullable=True),
+        sa.Column("raw_data", sa.Text(), nullable=True, comment="JSON с сырыми полями строки"),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("unique_hash", name="uq_contract_hash"),
+        mysql_charset="utf8mb4",
+        mysql_collate="utf8mb4_unicode_ci",
+    )
+    op.create_index("ix_contracts_number", "contracts", ["contract_number"])
+    op.create_index("ix_contracts_customer_bin", "contracts", ["customer_bin"])
+    op.create_index("ix_contracts_supplier_bin", "contracts", ["supplier_bin"])
+
+
+def downgrade() -> None:
+    op.drop_table("contracts")
+    op.drop_column("announcements", "total_amount")
+    op.drop_column("announcements", "purchase_method")
+    op.drop_column("announcements", "status")
+    op.drop_index("ix_parse_runs_source", table_name="parse_runs")
+    op.drop_column("parse_runs", "source")
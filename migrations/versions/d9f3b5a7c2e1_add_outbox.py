@@ -0,0 +1,48 @@
+"""add transactional outbox and lots_changed counter
+
+Revision ID: d9f3b5a7c2e1
+Revises: c4a8e1f2b6d3
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9f3b5a7c2e1'
+down_revision: Union[str, None] = 'c4a8e1f2b6d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("parse_runs", sa.Column("lots_changed", sa.Integer(), nullable=True))
+
+    op.create_table(
+        "outbox_events",
+        sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), autoincrement=True, nullable=False),
+        sa.Column("event_type", sa.String(50), nullable=False, comment="lot.created / lot.changed"),
+        sa.Column("lot_id", sa.BigInteger(), nullable=False),
+        sa.Column("payload", sa.Text(), nullable=False, comment="JSON события"),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        mysql_charset="utf8mb4",
+        mysql_collate="utf8mb4_unicode_ci",
+    )
+    op.create_index("ix_outbox_events_created_at", "outbox_events", ["created_at"])
+
+    op.create_table(
+        "outbox_offsets",
+        sa.Column("consumer", sa.String(100), nullable=False),
+        sa.Column("last_event_id", sa.BigInteger(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("consumer"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("outbox_offsets")
+    op.drop_table("outbox_events")
+    op.drop_column("parse_runs", "lots_changed")
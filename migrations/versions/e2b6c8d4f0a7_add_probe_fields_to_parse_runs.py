@@ -0,0 +1,33 @@
+"""add head probe fields to parse_runs
+
+Revision ID: e2b6c8d4f0a7
+Revises: d9f3b5a7c2e1
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b6c8d4f0a7'
+down_revision: Union[str, None] = 'd9f3b5a7c2e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "parse_runs",
+        sa.Column("total_records", sa.Integer(), nullable=True, comment="Счётчик «из Z записей» на 1-й странице"),
+    )
+    op.add_column(
+        "parse_runs",
+        sa.Column("head_hashes", sa.Text(), nullable=True, comment="JSON: хеши верхних лотов 1-й страницы"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("parse_runs", "head_hashes")
+    op.drop_column("parse_runs", "total_records")
@@ -0,0 +1,44 @@
+"""add backfill_tasks
+
+Revision ID: e4a9c1f7b3d8
+Revises: d6b1e9f3a7c5
+Create Date: 2026-10-20 02:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a9c1f7b3d8'
+down_revision: Union[str, None] = 'd6b1e9f3a7c5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "backfill_tasks",
+        sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), autoincrement=True, nullable=False),
+        sa.Column("source", sa.String(50), nullable=False),
+        sa.Column("query", sa.String(500), nullable=False, comment="Доп. параметры выдачи (фильтры)"),
+        sa.Column("page_from", sa.Integer(), nullable=False),
+        sa.Column("page_to", sa.Integer(), nullable=False),
+        sa.Column("next_page", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False, comment="pending / done / failed"),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("rows_found", sa.Integer(), nullable=False),
+        sa.Column("rows_new", sa.Integer(), nullable=False),
+        sa.Column("error_message", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        mysql_charset="utf8mb4",
+        mysql_collate="utf8mb4_unicode_ci",
+    )
+    op.create_index("ix_backfill_tasks_status", "backfill_tasks", ["status", "id"])
+
+
+def downgrade() -> None:
+    op.drop_table("backfill_tasks")
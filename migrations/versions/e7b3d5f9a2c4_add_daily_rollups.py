@@ -0,0 +1,62 @@
+"""add daily rollup tables
+
+Revision ID: e7b3d5f9a2c4
+Revises: d4a7c9e1f3b5
+Create Date: 2026-10-19 20:00:00.000000
+
+Агрегаты сразу заполняются GROUP BY по lots; дальше их ведёт save_batch,
+полный пересчёт — `python -m app.main rollups`.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b3d5f9a2c4'
+down_revision: Union[str, None] = 'd4a7c9e1f3b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "lot_daily_rollups",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("status", sa.String(200), nullable=False),
+        sa.Column("purchase_method", sa.String(200), nullable=False),
+        sa.Column("lot_count", sa.Integer(), nullable=False),
+        sa.Column("amount_sum", sa.Numeric(24, 2), nullable=False),
+        sa.PrimaryKeyConstraint("day", "status", "purchase_method", name="pk_lot_daily_rollups"),
+        mysql_charset="utf8mb4",
+        mysql_collate="utf8mb4_unicode_ci",
+    )
+    op.create_table(
+        "customer_daily_rollups",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("customer_bin", sa.String(20), nullable=False),
+        sa.Column("lot_count", sa.Integer(), nullable=False),
+        sa.Column("amount_sum", sa.Numeric(24, 2), nullable=False),
+        sa.PrimaryKeyConstraint("day", "customer_bin", name="pk_customer_daily_rollups"),
+        mysql_charset="utf8mb4",
+        mysql_collate="utf8mb4_unicode_ci",
+    )
+    op.create_index("ix_customer_daily_rollups_bin", "customer_daily_rollups", ["customer_bin"])
+
+    op.execute(
+        "INSERT INTO lot_daily_rollups (day, status, purchase_method, lot_count, amount_sum) "
+        "SELECT DATE(created_at), COALESCE(status, ''), COALESCE(purchase_method, ''), "
+        "COUNT(*), COALESCE(SUM(purchase_amount), 0) FROM lots "
+        "GROUP BY DATE(created_at), COALESCE(status, ''), COALESCE(purchase_method, '')"
+    )
+    op.execute(
+        "INSERT INTO customer_daily_rollups (day, customer_bin, lot_count, amount_sum) "
+        "SELECT DATE(created_at), COALESCE(customer_bin, ''), COUNT(*), COALESCE(SUM(purchase_amount), 0) "
+        "FROM lots GROUP BY DATE(created_at), COALESCE(customer_bin, '')"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_customer_daily_rollups_bin", table_name="customer_daily_rollups")
+    op.drop_table("customer_daily_rollups")
+    op.drop_table("lot_daily_rollups")
@@ -10,6 +10,8 @@ from typing import Sequence, Union
 from alembic import op
 import sqlalchemy as sa
 
+from migrations.helpers import add_column_if_missing, create_index_if_missing
+
 # revision identifiers, used by Alembic.
 revision: str = 'eabc06214e81'
 down_revision: Union[str, None] = '0002'
@@ -18,50 +20,50 @@ depends_on: Union[str, Sequence[str], None] = None
 
 
 def upgrade() -> None:
-    op.add_column(
+    add_column_if_missing(
         "lots",
         sa.Column("announce_number", sa.String(100), nullable=True, comment="Номер объявления"),
     )
 
-    op.add_column(
+    add_column_if_missing(
         "lots",
         sa.Column("subject_type", sa.String(50), nullable=True, comment="Товар/Услуга/Работа"),
     )
 
-    op.add_column(
+    add_column_if_missing(
         "lots",
         sa.Column("customer_name", sa.Text(), nullable=True, comment="Заказчик"),
     )
 
-    op.add_column(
+    add_column_if_missing(
         "lots",
         sa.Column("customer_bin", sa.String(20), nullable=True, comment="БИН заказчика"),
     )
 
-    op.add_column(
+    add_column_if_missing(
         "lots",
         sa.Column("deadline_date", sa.DateTime(), nullable=True, comment="Окончание приема"),
     )
 
-    op.add_column(
+    add_column_if_missing(
         "lots",
         sa.Column("publication_date", sa.DateTime(), nullable=True, comment="Дата публикации"),
     )
 
-    op.add_column(
+    add_column_if_missing(
         "lots",
         sa.Column("financial_year", sa.Integer(), nullable=True, comment="Финансовый год"),
     )
 
-    op.add_column(
+    add_column_if_missing(
         "lots",
         sa.Column("delivery_place", sa.Text(), nullable=True, comment="Место поставки"),
     )
 
     # Индексы
-    op.create_index("ix_announce_number", "lots", ["announce_number"])
-    op.create_index("ix_publication_date", "lots", ["publication_date"])
-    op.create_index("ix_customer_bin", "lots", ["customer_bin"])
+    create_index_if_missing("ix_announce_number", "lots", ["announce_number"])
+    create_index_if_missing("ix_publication_date", "lots", ["publication_date"])
+    create_index_if_missing("ix_customer_bin", "lots", ["customer_bin"])
 
 
 def downgrade() -> None:
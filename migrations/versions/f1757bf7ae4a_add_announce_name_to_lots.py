@@ -10,6 +10,8 @@ from typing import Sequence, Union
 from alembic import op
 import sqlalchemy as sa
 
+from migrations.helpers import add_column_if_missing
+
 
 # revision identifiers, used by Alembic.
 revision: str = 'f1757bf7ae4a'
@@ -19,7 +21,7 @@ depends_on: Union[str, Sequence[str], None] = None
 
 
 def upgrade():
-    op.add_column(
+    add_column_if_missing(
         "lots",
         sa.Column("announce_name", sa.Text(), nullable=True)
     )
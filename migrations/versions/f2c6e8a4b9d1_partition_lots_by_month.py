@@ -0,0 +1,52 @@
+"""partition lots by created_at month (MySQL)
+
+Revision ID: f2c6e8a4b9d1
+Revises: e7b3d5f9a2c4
+Create Date: 2026-10-19 21:00:00.000000
+
+Только MySQL (на SQLite — no-op). Партиционирование перестраивает
+таблицу целиком (ALGORITHM=COPY, запись блокируется) — выполнять в окно
+обслуживания при остановленном краулере. Дальше партиции нарезает
+`python -m app.main partitions ensure` / ежесуточная задача планировщика.
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.config import PARTITIONS_AHEAD
+from app.partitions import add_months, month_start, partition_clause
+from migrations.helpers import dialect_name
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c6e8a4b9d1'
+down_revision: Union[str, None] = 'e7b3d5f9a2c4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if dialect_name() != "mysql":
+        return
+
+    first = op.get_bind().execute(sa.text("SELECT MIN(created_at) FROM lots")).scalar()
+    today = date.today()
+    first_month = month_start(first.date() if first else today)
+
+    # Уникальные ключи партиционированной таблицы должны включать created_at
+    op.execute(
+        "ALTER TABLE lots DROP PRIMARY KEY, ADD PRIMARY KEY (id, created_at), "
+        "DROP INDEX uq_lot_hash, ADD UNIQUE INDEX uq_lot_hash (unique_hash, created_at)"
+    )
+    op.execute(f"ALTER TABLE lots {partition_clause(first_month, add_months(month_start(today), PARTITIONS_AHEAD))}")
+
+
+def downgrade() -> None:
+    if dialect_name() != "mysql":
+        return
+    op.execute("ALTER TABLE lots REMOVE PARTITIONING")
+    op.execute(
+        "ALTER TABLE lots DROP PRIMARY KEY, ADD PRIMARY KEY (id), "
+        "DROP INDEX uq_lot_hash, ADD UNIQUE INDEX uq_lot_hash (unique_hash)"
+    )
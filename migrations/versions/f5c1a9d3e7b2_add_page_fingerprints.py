@@ -0,0 +1,47 @@
+"""add page fingerprints cache
+
+Revision ID: f5c1a9d3e7b2
+Revises: e2b6c8d4f0a7
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5c1a9d3e7b2'
+down_revision: Union[str, None] = 'e2b6c8d4f0a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "parse_runs",
+        sa.Column("page_cache_hits", sa.Integer(), nullable=True, comment="Страниц пропущено по отпечатку"),
+    )
+    op.add_column(
+        "parse_runs",
+        sa.Column("page_cache_misses", sa.Integer(), nullable=True, comment="Страниц разобрано заново"),
+    )
+
+    op.create_table(
+        "page_fingerprints",
+        sa.Column("slice_key", sa.String(255), nullable=False),
+        sa.Column("page_num", sa.Integer(), nullable=False),
+        sa.Column("digest", sa.String(64), nullable=False, comment="SHA256 нормализованных строк"),
+        sa.Column("row_count", sa.Integer(), nullable=False),
+        sa.Column("run_id", sa.BigInteger(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("slice_key", "page_num", name="pk_page_fingerprints"),
+        mysql_charset="utf8mb4",
+        mysql_collate="utf8mb4_unicode_ci",
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("page_fingerprints")
+    op.drop_column("parse_runs", "page_cache_misses")
+    op.drop_column("parse_runs", "page_cache_hits")
@@ -0,0 +1,27 @@
+"""add gaps to outbox_offsets
+
+Revision ID: f8d2b4a6c9e3
+Revises: e4a9c1f7b3d8
+Create Date: 2026-10-20 03:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'f8d2b4a6c9e3'
+down_revision: Union[str, None] = 'e4a9c1f7b3d8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("outbox_offsets", sa.Column(
+        "gaps", sa.Text(), nullable=True, comment="JSON: недоставленные id до offset-а {id: когда замечен}",
+    ))
+
+
+def downgrade() -> None:
+    op.drop_column("outbox_offsets", "gaps")
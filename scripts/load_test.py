@@ -0,0 +1,104 @@
+"""
+Нагрузочный прогон краулера против локального mock-реестра.
+
+Поднимает scripts/mock_registry.py в фоне, подменяет BASE_URL и гоняет
+parse_all_lots (--mode parse, без БД) или run_parse_job (--mode job,
+с записью в DATABASE_URL) несколько запусков подряд; между запусками
+набор данных меняется (--new-per-run / --changed-per-run).
+
+Нужен Chrome + chromedriver, как и для обычного обхода.
+
+  python scripts/load_test.py --records 2000 --runs 3 --new-per-run 120 \\
+      --changed-per-run 40 --latency-ms 100 --js-delay 0.3
+
+Отчёт по каждому запуску: страниц/с, лотов/с, скорость записи в БД
+(лотов/с внутри save_batch) и попадания кеша страниц.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from mock_registry import LOTS_PATH, add_server_args, server_from_args, start_in_thread  # noqa: E402
+
+
+def _report(run: int, summary: dict, elapsed: float) -> None:
+    pages = summary.get("pages_parsed", 0)
+    lots = summary.get("lots_found", 0)
+    db_seconds = summary.get("db_seconds", 0.0)
+    db_rate = f"{lots / db_seconds:9.0f}" if db_seconds else f"{'—':>9}"
+    print(
+        f"{run:>3} {pages:>6} {lots:>7} {summary.get('lots_new', '—'):>6} "
+        f"{summary.get('lots_changed', '—'):>6} {summary.get('cache_hits', 0):>6} "
+        f"{elapsed:8.1f} {pages / elapsed:8.2f} {lots / elapsed:8.1f} {db_rate}"
+    )
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Нагрузочный прогон краулера против mock-реестра")
+    add_server_args(ap)
+    ap.add_argument("--mode", choices=("parse", "job"), default="job",
+                    help="parse — только parse_all_lots; job — run_parse_job с записью в БД")
+    ap.add_argument("--runs", type=int, default=1)
+    ap.add_argument("--url", default=None, help="DATABASE_URL (по умолчанию временная SQLite)")
+    ap.add_argument("--page-pause", type=float, default=0.0, help="PAGE_PAUSE_SECONDS краулера")
+    ap.add_argument("--render-wait", type=float, default=0.0, help="RENDER_WAIT_SECONDS краулера")
+    ap.add_argument("--page-timeout", type=int, default=10, help="PAGE_LOAD_TIMEOUT краулера")
+    ap.add_argument("--no-page-cache", action="store_true")
+    ap.add_argument("--capture-network", action="store_true",
+                    help="CAPTURE_NETWORK: лоты из перехваченного JSON вместо DOM")
+    args = ap.parse_args()
+
+    server = server_from_args(args)
+    start_in_thread(server)
+    host, port = server.server_address[:2]
+    registry = server.RequestHandlerClass.registry
+
+    # app.config читает окружение при импорте — всё выставляем до него
+    os.environ.update(
+        BASE_URL=f"http://{host}:{port}{LOTS_PATH}",
+        DATABASE_URL=args.url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'load_test.db')}",
+        PAGE_PAUSE_SECONDS=str(args.page_pause),
+        RENDER_WAIT_SECONDS=str(args.render_wait),
+        PAGE_LOAD_TIMEOUT=str(args.page_timeout),
+        PAGE_CACHE="false" if args.no_page_cache else "true",
+        CAPTURE_NETWORK="true" if args.capture_network else "false",
+        HEADLESS="true",
+        MAX_PAGES="0",
+    )
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+    from app.database import Base, engine
+    from app.parser import parse_all_lots
+    from app.service import run_parse_job
+
+    if args.mode == "job":
+        Base.metadata.create_all(engine)
+
+    print(f"Mock-реестр: {os.environ['BASE_URL']} | {registry.pages} стр. | БД: {os.environ['DATABASE_URL']}")
+    print(f"{'run':>3} {'pages':>6} {'lots':>7} {'new':>6} {'chg':>6} {'hits':>6} "
+          f"{'sec':>8} {'pages/s':>8} {'lots/s':>8} {'db lots/s':>9}")
+
+    try:
+        for run in range(1, args.runs + 1):
+            if run > 1:
+                registry.next_run()
+            t0 = time.perf_counter()
+            if args.mode == "parse":
+                summary: dict = {}
+                summary["lots_found"] = sum(1 for _ in parse_all_lots(summary))
+            else:
+                summary = run_parse_job()
+            _report(run, summary, time.perf_counter() - t0)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    stats = {k: v for k, v in server.RequestHandlerClass.stats.items() if k != "lock"}
+    print(f"Сервер: {stats}")
+
+
+if __name__ == "__main__":
+    main()
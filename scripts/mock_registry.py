@@ -0,0 +1,288 @@
+"""
+Mock-сервер реестра лотов для нагрузочных прогонов без goszakup.gov.kz.
+
+Отдаёт /ru/search/lots?page=N в разметке настоящего сайта: таблица из
+6 колонок, счётчик «Показано c X по Y из Z записей» и ul.pagination.
+Строки таблицы, как и на сайте, дорисовывает JS — через js_delay секунд
+запрашивает JSON с /ru/search/lots/data?page=N и строит из него tbody
+(этот ответ перехватывает парсер при CAPTURE_NETWORK=true).
+
+Данные — app/synthetic.py (детерминированы seed-ом). Между запусками
+набор «живёт»: /_mock/next-run добавляет new_per_run лотов сверху и
+меняет статус changed_per_run существующих.
+
+  python scripts/mock_registry.py --records 10000 --latency-ms 150 --error-rate 0.01
+
+Служебные ручки: /_mock/next-run, /_mock/stats (JSON).
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# app.* импортируется лениво: load_test.py выставляет окружение (BASE_URL,
+# DATABASE_URL) уже после разбора аргументов, до первого импорта app.config
+
+LOTS_PATH = "/ru/search/lots"
+DATA_PATH = "/ru/search/lots/data"
+
+# Сайт показывает не больше 10 000 записей (200 страниц × 50)
+MAX_SHOWN = 10_000
+PER_PAGE = 50
+CHANGED_STATUSES = ("Изменена документация", "Завершено", "Отменено")
+
+
+class MockRegistry:
+    """Набор лотов в порядке «новые сверху» и его изменения между запусками."""
+
+    def __init__(self, records: int, per_page: int = PER_PAGE, seed: int = 0,
+                 new_per_run: int = 0, changed_per_run: int = 0):
+        self.total = records
+        self.per_page = per_page
+        self.seed = seed
+        self.new_per_run = new_per_run
+        self.changed_per_run = changed_per_run
+        self.generation = 0
+        self.status_overrides: dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def shown(self) -> int:
+        return min(self.total, MAX_SHOWN)
+
+    @property
+    def pages(self) -> int:
+        return max(math.ceil(self.shown / self.per_page), 1)
+
+    def next_run(self) -> dict:
+        """Следующее «поколение» набора: новые лоты сверху + смена статусов."""
+        with self._lock:
+            self.generation += 1
+            self.total += self.new_per_run
+            rnd = random.Random(self.seed * 7919 + self.generation)
+            for i in rnd.sample(range(self.total), min(self.changed_per_run, self.total)):
+                self.status_overrides[i] = rnd.choice(CHANGED_STATUSES)
+            return self.state()
+
+    def state(self) -> dict:
+        return {"generation": self.generation, "total": self.total, "shown": self.shown, "pages": self.pages}
+
+    def page_payload(self, page: int) -> dict:
+        """JSON-ответ, из которого JS страницы рисует таблицу."""
+        site = "https://www.goszakup.gov.kz"
+        items = [
+            {
+                "lot_number": r["lot_number"],
+                "announce_number": r["announce_number"],
+                "announce_name": r["announce_name"],
+                "announce_url": r["announce_url"].removeprefix(site),
+                "lot_name": r["lot_name"],
+                "lot_url": r["lot_url"].removeprefix(site),
+                "customer_name": r["customer_name"],
+                "quantity": r["quantity"],
+                "amount": r["amount_raw"],
+                "method": r["purchase_method"],
+                "status": r["status"],
+            }
+            for r in self.page_records(page)
+        ]
+        return {"total": self.shown, "page": page, "per_page": self.per_page, "items": items}
+
+    def page_records(self, page: int) -> list[dict]:
+        from app.synthetic import synthetic_record
+
+        with self._lock:
+            start = (page - 1) * self.per_page
+            stop = min(start + self.per_page, self.shown)
+            records = []
+            for pos in range(start, stop):
+                i = self.total - 1 - pos
+                record = synthetic_record(i, self.seed)
+                if i in self.status_overrides:
+                    record["status"] = self.status_overrides[i]
+                records.append(record)
+            return records
+
+
+def _pagination(page: int, pages: int) -> str:
+    nums = sorted({1, 2, page - 1, page, page + 1, pages - 1, pages} & set(range(1, pages + 1)))
+    items = []
+    for num in nums:
+        active = ' class="active"' if num == page else ""
+        items.append(f'<li{active}><a href="{LOTS_PATH}?page={num}">{num}</a></li>')
+    return '<ul class="pagination">' + "".join(items) + "</ul>"
+
+
+def render_page(registry: MockRegistry, page: int, js_delay: Optional[float]) -> str:
+    """
+    Страница поиска лотов. js_delay=None — строки сразу в HTML
+    (удобно для проверок без браузера), иначе tbody заполняет JS.
+    """
+    from app.synthetic import render_rows
+
+    first = (page - 1) * registry.per_page + 1
+    last = min(page * registry.per_page, registry.shown)
+    if js_delay is None:
+        tbody = render_rows(registry.page_records(page))
+        script = ""
+    else:
+        tbody = ""
+        script = (
+            "<script>"
+            "function esc(s) { var d = document.createElement('div'); d.textContent = s; return d.innerHTML; }"
+            "function row(x) { return '<tr><td><b>' + esc(x.lot_number) + '</b><br>'"
+            " + '<a href=\"' + esc(x.announce_url) + '\">' + esc(x.announce_name) + '</a><br>'"
+            " + 'Заказчик: ' + esc(x.customer_name) + '</td>'"
+            " + '<td><a href=\"' + esc(x.lot_url) + '\">' + esc(x.lot_name) + '</a></td>'"
+            " + '<td>' + esc(x.quantity) + '</td><td>' + esc(x.amount) + '</td>'"
+            " + '<td>' + esc(x.method) + '</td><td>' + esc(x.status) + '</td></tr>'; }"
+            "setTimeout(function () {"
+            f"fetch('{DATA_PATH}?page={page}').then(function (r) {{ return r.json(); }})"
+            ".then(function (data) {"
+            "document.querySelector('#search-result tbody').innerHTML = data.items.map(row).join('');"
+            "document.getElementById('loading').remove();"
+            f"}}); }}, {int(js_delay * 1000)});</script>"
+        )
+    return (
+        '<!DOCTYPE html><html lang="ru"><head><meta charset="utf-8"><title>Поиск лотов</title></head><body>'
+        '<div id="loading">Подождите, идет загрузка</div>'
+        '<table class="table table-bordered" id="search-result"><thead><tr>'
+        "<th>№ лота</th><th>Наименование и описание лота</th><th>Кол-во</th>"
+        "<th>Сумма, тг.</th><th>Способ закупки</th><th>Статус</th>"
+        f"</tr></thead><tbody>{tbody}</tbody></table>"
+        f'<div class="dataTables_info">Показано c {first} по {last} из {registry.shown} записей</div>'
+        f"{_pagination(page, registry.pages)}{script}</body></html>"
+    )
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    # Настраиваются make_server
+    registry: MockRegistry
+    latency_ms: float = 0.0
+    js_delay: Optional[float] = 0.5
+    error_rate: float = 0.0
+    stats: dict
+
+    def log_message(self, format, *args):  # noqa: A002 — сигнатура базового класса
+        pass
+
+    def _send(self, code: int, body: str, content_type: str = "text/html; charset=utf-8") -> None:
+        data = body.encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _count(self, key: str) -> None:
+        with self.stats["lock"]:
+            self.stats[key] += 1
+
+    def do_GET(self):  # noqa: N802
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        try:
+            page = max(int(query.get("page", ["1"])[0]), 1)
+        except ValueError:
+            page = 1
+
+        if url.path == "/_mock/next-run":
+            self._send(200, json.dumps(self.registry.next_run()), "application/json")
+            return
+        if url.path == "/_mock/stats":
+            body = {k: v for k, v in self.stats.items() if k != "lock"}
+            self._send(200, json.dumps({**body, **self.registry.state()}), "application/json")
+            return
+        if url.path not in (LOTS_PATH, DATA_PATH):
+            self._send(404, "Not found")
+            return
+
+        if self.latency_ms:
+            time.sleep(self.latency_ms * random.uniform(0.5, 1.5) / 1000)
+        if self.error_rate and random.random() < self.error_rate:
+            self._count("errors")
+            self._send(502, "<html><body><h1>502 Bad Gateway</h1></body></html>")
+            return
+
+        if url.path == LOTS_PATH:
+            self._count("pages")
+            self._send(200, render_page(self.registry, page, self.js_delay))
+        else:
+            self._count("data_fetches")
+            self._send(200, json.dumps(self.registry.page_payload(page), ensure_ascii=False), "application/json")
+
+
+def make_server(registry: MockRegistry, host: str = "127.0.0.1", port: int = 0,
+                latency_ms: float = 0.0, js_delay: Optional[float] = 0.5,
+                error_rate: float = 0.0) -> ThreadingHTTPServer:
+    """HTTP-сервер (ещё не запущен); port=0 — свободный порт (server.server_port)."""
+    handler = type("ConfiguredMockHandler", (MockHandler,), {
+        "registry": registry,
+        "latency_ms": latency_ms,
+        "js_delay": js_delay,
+        "error_rate": error_rate,
+        "stats": {"lock": threading.Lock(), "pages": 0, "data_fetches": 0, "errors": 0},
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_in_thread(server: ThreadingHTTPServer) -> threading.Thread:
+    thread = threading.Thread(target=server.serve_forever, name="mock-registry", daemon=True)
+    thread.start()
+    return thread
+
+
+def add_server_args(ap: argparse.ArgumentParser) -> None:
+    """Параметры набора и сервера — общие с scripts/load_test.py."""
+    ap.add_argument("--records", type=int, default=10_000, help="Записей в реестре на старте")
+    ap.add_argument("--per-page", type=int, default=PER_PAGE)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--latency-ms", type=float, default=0.0, help="Средняя задержка ответа (±50%%)")
+    ap.add_argument("--js-delay", type=float, default=0.5, help="Задержка JS-отрисовки строк, с")
+    ap.add_argument("--server-render", action="store_true", help="Строки сразу в HTML, без JS")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="Доля ответов 502")
+    ap.add_argument("--new-per-run", type=int, default=0, help="Новых лотов за запуск (churn)")
+    ap.add_argument("--changed-per-run", type=int, default=0, help="Смен статуса за запуск (churn)")
+
+
+def server_from_args(args: argparse.Namespace, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    registry = MockRegistry(args.records, args.per_page, args.seed, args.new_per_run, args.changed_per_run)
+    return make_server(
+        registry, host=host, port=port, latency_ms=args.latency_ms,
+        js_delay=None if args.server_render else args.js_delay,
+        error_rate=args.error_rate,
+    )
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Mock-сервер реестра лотов goszakup")
+    add_server_args(ap)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    args = ap.parse_args()
+
+    server = server_from_args(args, args.host, args.port)
+    host, port = server.server_address[:2]
+    print(f"Mock-реестр: http://{host}:{port}{LOTS_PATH} ({server.RequestHandlerClass.registry.pages} стр.)")
+    print(f"  BASE_URL=http://{host}:{port}{LOTS_PATH}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
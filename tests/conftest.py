@@ -0,0 +1,21 @@
+"""
+Общие фикстуры тестов.
+"""
+import pytest
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Сессия на свежей SQLite-базе со схемой из моделей (create_all)."""
+    pytest.importorskip("sqlalchemy")
+    from sqlalchemy.orm import sessionmaker
+
+    import app.models  # noqa: F401 — регистрирует таблицы в Base.metadata
+    from app.database import Base, make_engine
+
+    engine = make_engine(f"sqlite:///{tmp_path / 'lots.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
@@ -0,0 +1,53 @@
+"""
+Горячая таблица active_lots: ведётся save_batch, финальные статусы уходят.
+Запуск: python -m pytest tests/test_active_lots.py
+"""
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+
+from app.active_lots import rebuild  # noqa: E402
+from app.config import FINAL_STATUSES  # noqa: E402
+from app.models import ActiveLot, Lot  # noqa: E402
+from app.service import save_batch  # noqa: E402
+from app.synthetic import synthetic_lot  # noqa: E402
+
+LIVE = "Опубликовано (прием заявок)"
+
+
+def _active_ids(db) -> set[int]:
+    return {lot_id for (lot_id,) in db.query(ActiveLot.lot_id)}
+
+
+def _live_ids(db) -> set[int]:
+    return {lot_id for (lot_id,) in db.query(Lot.id).filter(
+        (Lot.status.is_(None)) | (Lot.status.notin_(FINAL_STATUSES))
+    )}
+
+
+def test_write_path_keeps_only_live_lots(db):
+    lots = [synthetic_lot(i) for i in range(60)]
+    save_batch(db, lots)
+    assert _active_ids(db) == _live_ids(db)
+    assert 0 < len(_active_ids(db)) < len(lots)
+
+    # Живой лот завершился, завершённый — снова принимает заявки
+    live = next(lot for lot in lots if lot["status"] not in FINAL_STATUSES)
+    final = next(lot for lot in lots if lot["status"] in FINAL_STATUSES)
+    result = save_batch(db, [dict(live, status=FINAL_STATUSES[0]), dict(final, status=LIVE, purchase_amount=7.5)])
+    assert result.changed == 2
+    assert _active_ids(db) == _live_ids(db)
+
+    revived = db.query(ActiveLot).join(Lot, Lot.id == ActiveLot.lot_id).filter(
+        Lot.unique_hash == final["unique_hash"]
+    ).one()
+    assert (revived.status, float(revived.purchase_amount)) == (LIVE, 7.5)
+
+
+def test_rebuild_matches_write_path(db):
+    save_batch(db, [synthetic_lot(i) for i in range(120)])
+    before = _active_ids(db)
+
+    assert rebuild(db, chunk_size=25) == len(before)
+    assert _active_ids(db) == before
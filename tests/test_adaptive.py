@@ -0,0 +1,51 @@
+"""
+Адаптивное расписание: сравнение пробы и расчёт интервала.
+Запуск: python -m pytest tests/test_adaptive.py
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("dotenv")
+
+from app.adaptive import arrival_rate, head_changed, next_interval_minutes  # noqa: E402
+from app.config import MAX_INTERVAL_MINUTES, MIN_INTERVAL_MINUTES  # noqa: E402
+
+
+def test_head_changed():
+    probe = {"total_records": 10000, "head_hashes": ["a", "b"]}
+    assert not head_changed(10000, ["a", "b"], probe)
+    assert head_changed(9999, ["a", "b"], probe)
+    assert head_changed(10000, ["x", "a"], probe)
+    # Проба не удалась — безопаснее обойти
+    assert head_changed(10000, ["a", "b"], {"total_records": None, "head_hashes": []})
+
+
+def test_interval_follows_arrival_rate():
+    now = datetime(2024, 3, 1, 12, 0)
+    busy = [(now - timedelta(hours=h), 1200) for h in (0, 1, 2, 3)]
+    quiet = [(now - timedelta(hours=h), 5) for h in (0, 3, 6, 9)]
+    assert arrival_rate(busy, now) == pytest.approx(1200)
+    assert next_interval_minutes(arrival_rate(busy, now)) == MIN_INTERVAL_MINUTES
+    assert next_interval_minutes(arrival_rate(quiet, now)) == MAX_INTERVAL_MINUTES
+    assert next_interval_minutes(0) == MAX_INTERVAL_MINUTES
+
+
+def test_recent_runs_weigh_more():
+    now = datetime(2024, 3, 1, 12, 0)
+    runs = [(now - timedelta(hours=24), 0), (now - timedelta(hours=23), 1000),
+            (now - timedelta(hours=1), 0), (now, 10)]
+    assert arrival_rate(runs, now) < 50
+
+
+def test_quiet_probes_lower_the_rate():
+    now = datetime(2024, 3, 1, 2, 0)
+    evening = [(now - timedelta(hours=h), 600) for h in (4, 3, 2)]
+    # Без обходов темп стоит на месте, сколько бы времени ни прошло
+    assert arrival_rate(evening, now) == arrival_rate(evening, now + timedelta(hours=6))
+
+    # Пробы без изменений — ноль новых лотов с последнего обхода
+    quiet_1h = arrival_rate(evening, now, quiet_until=now)
+    quiet_6h = arrival_rate(evening, now + timedelta(hours=5), quiet_until=now + timedelta(hours=5))
+    assert quiet_6h < quiet_1h < arrival_rate(evening, now)
+    assert next_interval_minutes(quiet_6h) > next_interval_minutes(arrival_rate(evening, now))
@@ -0,0 +1,57 @@
+"""
+Объявления: разрешение пачкой в save_batch, lot_count, пересборка по lots.
+Запуск: python -m pytest tests/test_announcements.py
+"""
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+
+from app.announcements import rebuild  # noqa: E402
+from app.models import Announcement, Lot  # noqa: E402
+from app.service import save_batch  # noqa: E402
+from app.synthetic import synthetic_lot  # noqa: E402
+
+
+def _snapshot(db):
+    return {
+        a.announce_number: (a.lot_count, a.announce_name, a.customer_bin)
+        for a in db.query(Announcement)
+    }
+
+
+def test_save_batch_resolves_announcements(db):
+    # Синтетика: по 3 лота на объявление; вторая пачка дописывает объявление 16000003-1
+    save_batch(db, [synthetic_lot(i) for i in range(10)])
+    save_batch(db, [synthetic_lot(i) for i in range(8, 12)])
+
+    counts = {a.announce_number: a.lot_count for a in db.query(Announcement)}
+    assert counts == {f"{16_000_000 + k}-1": 3 for k in range(4)}
+
+    first = db.query(Announcement).filter_by(announce_number="16000000-1").one()
+    lot = synthetic_lot(0)
+    assert first.announce_name == lot["announce_name"]
+    assert first.announce_url == lot["announce_url"]
+
+    # Каждый лот ссылается на своё объявление
+    pairs = db.query(Lot.announce_number, Announcement.announce_number).join(
+        Announcement, Announcement.id == Lot.announcement_id
+    ).all()
+    assert len(pairs) == 12
+    assert all(a == b for a, b in pairs)
+
+
+def test_rebuild_matches_incremental(db):
+    save_batch(db, [synthetic_lot(i) for i in range(20)])
+    incremental = _snapshot(db)
+
+    db.query(Lot).update({Lot.announcement_id: None})
+    db.commit()
+    assert rebuild(db, chunk_size=7) == len(incremental)
+
+    assert _snapshot(db) == incremental
+    pairs = db.query(Lot.announce_number, Announcement.announce_number).join(
+        Announcement, Announcement.id == Lot.announcement_id
+    ).all()
+    assert len(pairs) == 20
+    assert all(a == b for a, b in pairs)
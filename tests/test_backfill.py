@@ -0,0 +1,203 @@
+"""
+Backfill истории: нарезка окон, проход окна, уступка свежему обходу,
+приоритет свежих обходов в пуле браузеров.
+Запуск: python -m pytest tests/test_backfill.py
+"""
+import os
+import sys
+import threading
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("bs4")
+pytest.importorskip("lxml")
+
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+import app.backfill as backfill  # noqa: E402
+from app.models import BackfillTask, Contract, Lot, ParseRun, SavedSearch, WatchlistMatch  # noqa: E402
+from app.sources import get_source  # noqa: E402
+from app.sources.budget import HIGH, LOW, FreshCrawlDue, RateBudget  # noqa: E402
+from app.sources.engine import page_rows  # noqa: E402
+from app.sources.pool import DriverPool  # noqa: E402
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from mock_registry import MockRegistry, render_page  # noqa: E402
+
+
+HEADERS = ("№ договора", "Заказчик", "Поставщик", "Сумма", "Дата", "Статус")
+
+
+def _page(numbers):
+    head = "".join(f"<th>{h}</th>" for h in HEADERS)
+    body = "".join(
+        f"<tr><td>Д-{i}</td><td>ГУ Заказчик 123456789012</td><td>ТОО Поставщик 987654321012</td>"
+        f"<td>1 000,00</td><td>15.03.2020</td><td>Исполнен</td></tr>"
+        for i in numbers
+    )
+    return f"<html><body><table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table></body></html>"
+
+
+class HtmlDriver:
+    """Вместо Chrome: 5 страниц архива по 2 договора, дальше — пусто."""
+
+    on_get = None
+
+    def __init__(self):
+        self.urls = []
+        self.page_source = ""
+
+    def get(self, url):
+        self.urls.append(url)
+        page = int(url.rsplit("page=", 1)[1]) if "page=" in url else 1
+        self.page_source = _page(range(page * 10, page * 10 + 2) if page <= 5 else ())
+        if HtmlDriver.on_get:
+            HtmlDriver.on_get(page)
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture
+def env(db, monkeypatch):
+    source = get_source("contracts")
+    monkeypatch.setattr(source, "base_url", "https://reg/contracts")
+    monkeypatch.setattr(source, "wait_ready", lambda driver: True)
+    monkeypatch.setattr(backfill, "PAGE_PAUSE_SECONDS", 0)
+    monkeypatch.setattr(backfill, "SessionLocal", sessionmaker(bind=db.get_bind()))
+    HtmlDriver.on_get = None
+    budget = RateBudget(0)
+    yield DriverPool(1, budget, factory=HtmlDriver), budget
+    HtmlDriver.on_get = None
+
+
+def test_plan_splits_pages_into_windows(db):
+    tasks = backfill.plan(db, "contracts", 1, 25, window=10, query="date_from=2020-01-01")
+    assert [(t.page_from, t.page_to, t.next_page) for t in tasks] == [(1, 10, 1), (11, 20, 11), (21, 25, 21)]
+    assert all(t.status == "pending" and t.query == "date_from=2020-01-01" for t in tasks)
+    assert backfill.next_task(db).id == tasks[0].id
+    with pytest.raises(ValueError):
+        backfill.plan(db, "tenders", 1, 5)
+
+
+def test_run_pending_walks_windows_until_registry_ends(db, env):
+    pool, budget = env
+    backfill.plan(db, "contracts", 1, 4, window=2, query="year=2020")
+    backfill.plan(db, "contracts", 5, 8, window=4)
+
+    assert backfill.run_pending(pool) == 3
+    tasks = db.query(BackfillTask).order_by(BackfillTask.id).all()
+    assert [t.status for t in tasks] == ["done"] * 3
+    assert [(t.rows_found, t.rows_new) for t in tasks] == [(4, 4), (4, 4), (2, 2)]
+    assert tasks[2].next_page == 9  # пустая 6-я страница закрыла окно досрочно
+    assert db.query(Contract).count() == 10
+    assert budget.spent == budget.spent_low == 6
+    assert pool._idle[0].urls[:2] == ["https://reg/contracts?year=2020", "https://reg/contracts?year=2020&page=2"]
+
+
+def test_backfill_yields_to_fresh_crawl_and_resumes(db, env):
+    pool, budget = env
+    [task] = backfill.plan(db, "contracts", 1, 5, window=5)
+    fresh = budget.fresh()
+
+    def start_fresh_crawl(page):
+        if page == 2:
+            fresh.__enter__()  # свежий обход стал в очередь после 2-й страницы
+
+    HtmlDriver.on_get = start_fresh_crawl
+    assert backfill.run_pending(pool) == 0
+    db.refresh(task)
+    assert (task.status, task.next_page, task.rows_found) == ("pending", 3, 4)
+    assert not pool._idle[0].urls[2:]  # ни одной загрузки LOW во время свежего обхода
+
+    # Свежий обход получает браузер сразу, и его запросы идут без очереди
+    with pool.lease() as driver:
+        driver.get("https://reg/contracts")
+    with pytest.raises(FreshCrawlDue):
+        budget.acquire(LOW)
+    fresh.__exit__(None, None, None)
+
+    HtmlDriver.on_get = None
+    assert backfill.run_pending(pool) == 1
+    db.refresh(task)
+    assert (task.status, task.next_page, task.rows_found, task.rows_new) == ("done", 6, 10, 10)
+    assert db.query(Contract).count() == 10
+
+
+def test_failed_window_is_retried_then_marked_failed(db, env, monkeypatch):
+    pool, _ = env
+    [task] = backfill.plan(db, "contracts", 1, 2)
+    monkeypatch.setattr(backfill, "BACKFILL_MAX_ATTEMPTS", 2)
+
+    def broken(page):
+        raise RuntimeError("таймаут")
+
+    HtmlDriver.on_get = broken
+    backfill.run_pending(pool)
+    db.refresh(task)
+    assert (task.status, task.attempts, task.error_message) == ("pending", 1, "таймаут")
+    backfill.run_pending(pool)
+    db.refresh(task)
+    assert (task.status, task.attempts) == ("failed", 2)
+    assert backfill.next_task(db) is None
+
+
+def test_lots_backfill_matches_watchlist_and_records_run(db, monkeypatch):
+    from app.service import mark_disappeared, save_batch
+    from app.text import announce_seq
+
+    registry = MockRegistry(6, per_page=3)
+    source = get_source("lots")
+    monkeypatch.setattr(source, "wait_ready", lambda driver: True)
+    monkeypatch.setattr(backfill, "PAGE_PAUSE_SECONDS", 0)
+    monkeypatch.setattr(backfill, "SessionLocal", sessionmaker(bind=db.get_bind()))
+
+    class LotsDriver(HtmlDriver):
+        def get(self, url):
+            page = int(url.rsplit("page=", 1)[1]) if "page=" in url else 1
+            self.page_source = render_page(registry, page, None) if page <= registry.pages else "<html></html>"
+
+    head = page_rows(source, render_page(registry, 1, None))
+    db.add(SavedSearch(name="по слову", keywords=head[0]["lot_name"].split()[0]))
+    db.commit()
+
+    backfill.plan(db, "lots", 1, 2)
+    assert backfill.run_pending(DriverPool(1, RateBudget(0), factory=LotsDriver)) == 1
+
+    run = db.query(ParseRun).one()
+    assert (run.source, run.status, run.pages_parsed) == ("backfill:lots", "success", 2)
+    assert (run.lots_found, run.lots_new) == (6, 6)
+    assert db.query(WatchlistMatch).count() >= 1
+    lots = db.query(Lot).all()
+    assert {(lot.first_seen_run_id, lot.last_seen_run_id) for lot in lots} == {(run.id, run.id)}
+
+    # Следующий полный обход видит только 1-ю страницу (окно сайта): старые лоты не пропавшие
+    sweep = run.id + 1
+    save_batch(db, head, run_id=sweep)
+    boundary = min(announce_seq(row["announce_number"]) for row in head)
+    assert mark_disappeared(db, run_id=sweep, boundary=boundary) == 0
+
+
+def test_pool_serves_fresh_crawl_before_backfill():
+    pool = DriverPool(1, RateBudget(0), factory=HtmlDriver)
+    held = pool.acquire(LOW)
+    order = []
+
+    def take(priority, label):
+        driver = pool.acquire(priority)
+        order.append(label)
+        pool.release(driver)
+
+    low = threading.Thread(target=take, args=(LOW, "backfill"))
+    low.start()
+    low.join(0.1)
+    high = threading.Thread(target=take, args=(HIGH, "fresh"))
+    high.start()
+    high.join(0.1)
+    assert not order
+    pool.release(held)
+    low.join(2)
+    high.join(2)
+    assert order == ["fresh", "backfill"]
@@ -0,0 +1,83 @@
+"""
+Тесты векторного классификатора лотов и инкрементальной разметки.
+Запуск: python -m pytest tests/test_classifier.py
+"""
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("dotenv")
+
+from app.classifier import (  # noqa: E402
+    CATEGORY_NAMES, FALLBACK_CATEGORY, _classify_chunk, build_centroids, classify_texts,
+)
+
+
+@pytest.fixture(scope="module")
+def weights():
+    return build_centroids()
+
+
+def test_known_categories(weights):
+    texts = [
+        "Приобретение бензина АИ-92",
+        "Лекарственные средства и изделия медицинского назначения",
+        "Ноутбук и программное обеспечение",
+    ]
+    best, confidence = classify_texts(texts, weights)
+    assert [CATEGORY_NAMES[i] for i in best] == ["ГСМ и топливо", "Медицина", "ИТ и связь"]
+    assert (confidence > 0).all() and (confidence <= 1).all()
+
+
+def test_unknown_text_falls_back():
+    results = _classify_chunk([("h1", "ыыы ааа 12345"), ("h2", "")])
+    assert [r[1] for r in results] == [FALLBACK_CATEGORY, FALLBACK_CATEGORY]
+    assert all(r[2] == 0.0 for r in results)
+
+
+def test_batch_matches_single(weights):
+    texts = ["Мебель офисная: стол, стул", "Вывоз мусора", "Охрана здания"]
+    batch, _ = classify_texts(texts, weights)
+    single = [classify_texts([t], weights)[0][0] for t in texts]
+    assert batch.tolist() == single
+
+
+def test_rerun_classifies_only_new_lots(db, tmp_path, monkeypatch):
+    pytest.importorskip("sqlalchemy")
+    import sqlite3
+
+    from sqlalchemy.orm import sessionmaker
+
+    import app.classifier as classifier
+    import app.database
+    from db import database as tenders_db
+    from app.service import save_batch
+    from app.synthetic import synthetic_lot
+
+    # classified_tenders — в том же SQLite-файле, что и lots
+    monkeypatch.setattr(tenders_db, "DB_NAME", str(tmp_path / "lots.db"))
+    monkeypatch.setattr(app.database, "SessionLocal", sessionmaker(bind=db.get_bind()))
+    processed = []
+    classify_chunk = classifier._classify_chunk
+    monkeypatch.setattr(classifier, "_classify_chunk",
+                        lambda chunk: processed.extend(i for i, _ in chunk) or classify_chunk(chunk))
+
+    first = [synthetic_lot(i) for i in range(30)]
+    save_batch(db, first)
+    assert classifier.run_classification(chunk_size=7, workers=1) == 30
+    conn = sqlite3.connect(tmp_path / "lots.db")
+    before = dict(conn.execute("SELECT tender_id, classified_at FROM classified_tenders"))
+
+    second = [synthetic_lot(i) for i in range(30, 42)]
+    save_batch(db, second)
+    processed.clear()
+    assert classifier.run_classification(chunk_size=7, workers=1) == 12
+    assert sorted(processed) == sorted(lot["unique_hash"].hex() for lot in second)
+
+    after = dict(conn.execute("SELECT tender_id, classified_at FROM classified_tenders"))
+    assert len(after) == 42
+    assert {k: after[k] for k in before} == before  # размеченные раньше не перезаписаны
+
+    processed.clear()
+    assert classifier.run_classification(chunk_size=7, workers=1) == 0
+    assert not processed
+    conn.close()
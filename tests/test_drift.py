@@ -0,0 +1,166 @@
+"""
+Дрейф пагинации: дубли при сдвиге вниз, перечитывание при сдвиге вверх.
+Запуск: python -m pytest tests/test_drift.py
+"""
+import os
+import sys
+import urllib.request
+
+import pytest
+
+pytest.importorskip("bs4")
+pytest.importorskip("lxml")
+pytest.importorskip("dotenv")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+import app.parser as parser  # noqa: E402
+from app.drift import DriftTracker  # noqa: E402
+from mock_registry import LOTS_PATH, MockRegistry, make_server, start_in_thread  # noqa: E402
+
+
+def _rows(*keys):
+    return [{"unique_hash": bytes([k])} for k in keys]
+
+
+def test_tracker_drops_duplicates_after_downward_shift():
+    tracker = DriftTracker(total=100)
+    assert len(tracker.accept(_rows(1, 2, 3, 4))) == 4
+    assert not tracker.drifted
+
+    # Сверху добавилось 2 лота: страница начинается с хвоста предыдущей
+    fresh = tracker.accept(_rows(3, 4, 5, 6))
+    assert fresh == _rows(5, 6)
+    assert tracker.drifted
+    assert tracker.summary() == {"drift_duplicates": 2, "drift_recovered": 0,
+                                 "drift_skipped": 0, "drift_pages": 1}
+
+
+def test_tracker_counts_recovered_and_skipped_after_upward_shift():
+    tracker = DriftTracker(total=100)
+    tracker.accept(_rows(1, 2, 3))
+    assert tracker.check_total(100) == 0
+    assert tracker.check_total(97) == 3
+
+    # Перечитанная страница вернула 2 из 3 уехавших строк
+    assert tracker.accept_refetch(_rows(2, 3, 4, 5)) == _rows(4, 5)
+    assert (tracker.recovered, tracker.skipped) == (2, 1)
+
+    # Сдвиг, который не удалось перечитать, — пропуск
+    tracker.check_total(95)
+    tracker.finish()
+    assert tracker.skipped == 3
+    assert tracker.check_total(None) == 0
+
+
+def test_tracker_detects_upward_shift_by_overlap_without_counter():
+    tracker = DriftTracker()
+    tracker.accept(_rows(1, 2, 3, 4))
+    tracker.accept(_rows(7, 8, 9, 10))     # 5 и 6 уехали на прошлую страницу
+    assert tracker.check_total(None) == 0 and not tracker.drifted
+
+    # Перечитанная страница начинается с 3-й строки первого чтения: сдвиг вверх на 2
+    assert tracker.accept_refetch(_rows(3, 4, 5, 6)) == _rows(5, 6)
+    assert tracker.drifted
+    assert tracker.summary() == {"drift_duplicates": 0, "drift_recovered": 2,
+                                 "drift_skipped": 0, "drift_pages": 1}
+
+    # Без сдвига перечитывание ничего не находит
+    tracker.accept(_rows(11, 12, 13, 14))
+    assert tracker.accept_refetch(_rows(7, 8, 9, 10)) == []
+    assert tracker.shifted_pages == 1
+
+
+class HttpDriver:
+    """Вместо Chrome: страница целиком приходит с mock-сервера."""
+
+    page_source = ""
+
+    def get(self, url):
+        self.page_source = urllib.request.urlopen(url, timeout=5).read().decode("utf-8")
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture
+def crawl(monkeypatch):
+    servers = []
+
+    def run(registry, on_page):
+        server = make_server(registry, js_delay=None)
+        start_in_thread(server)
+        servers.append(server)
+        monkeypatch.setattr(parser, "BASE_URL", f"http://127.0.0.1:{server.server_port}{LOTS_PATH}")
+        monkeypatch.setattr(parser, "_build_driver", HttpDriver)
+        monkeypatch.setattr(parser, "_wait_for_table", lambda driver: True)
+        monkeypatch.setattr(parser, "PAGE_PAUSE_SECONDS", 0)
+        run_info = {}
+        rows = list(parser.parse_all_lots(run_info, on_page=on_page))
+        return rows, run_info
+
+    yield run
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_new_lots_mid_crawl_do_not_duplicate(crawl):
+    registry = MockRegistry(120, per_page=50)
+
+    def on_page(page):
+        if page == 2:
+            registry.total += 7  # 7 новых лотов появились после 1-й страницы
+
+    rows, run_info = crawl(registry, on_page)
+    hashes = [row["unique_hash"] for row in rows]
+    assert len(hashes) == len(set(hashes)) == 120
+    assert run_info["drift_duplicates"] == 7
+    assert run_info["drift_skipped"] == 0
+
+
+def test_removed_lots_mid_crawl_are_recovered(crawl):
+    registry = MockRegistry(120, per_page=50)
+
+    def on_page(page):
+        if page == 2:
+            registry.total -= 5  # 5 самых новых лотов исчезли: строки уехали вверх
+
+    rows, run_info = crawl(registry, on_page)
+    hashes = {row["unique_hash"] for row in rows}
+    head_now = {lot["unique_hash"] for lot in parser._lots_from_payload(registry.page_payload(1))}
+    assert head_now <= hashes
+    assert len(rows) == len(hashes) == 120
+    assert run_info["drift_recovered"] == 5
+    assert run_info["drift_skipped"] == 0
+    assert run_info["sweep_complete"]
+
+
+def test_upward_shift_is_recovered_when_counter_is_capped(crawl, monkeypatch):
+    registry = MockRegistry(160, per_page=50)
+    monkeypatch.setattr(parser, "_source_total", lambda html: 10_000)  # «из 10 000» на любой странице
+    monkeypatch.setattr(parser, "DRIFT_VERIFY_PAGES", 2)
+
+    def on_page(page):
+        if page == 2:
+            registry.total -= 5
+
+    rows, run_info = crawl(registry, on_page)
+    hashes = {row["unique_hash"] for row in rows}
+    head_now = {lot["unique_hash"] for lot in parser._lots_from_payload(registry.page_payload(1))}
+    assert head_now <= hashes
+    assert len(rows) == len(hashes) == 160
+    assert run_info["drift_recovered"] == 5
+    assert run_info["drift_pages"] == 1
+
+
+def test_capped_registry_sweep_reports_window_boundary(crawl, monkeypatch):
+    from app.text import announce_seq
+
+    monkeypatch.setattr(parser, "REGISTRY_WINDOW", 100)  # «из 120» — выдача обрезана окном
+    rows, run_info = crawl(MockRegistry(120, per_page=50), None)
+    assert run_info["sweep_complete"]
+    assert run_info["window_boundary"] == min(announce_seq(row["announce_number"]) for row in rows)
+
+    rows, run_info = crawl(MockRegistry(40, per_page=50), None)
+    assert run_info["sweep_complete"] and run_info["window_boundary"] is None
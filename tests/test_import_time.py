@@ -0,0 +1,42 @@
+"""
+Холодный старт CLI: тяжёлые модули не импортируются (python -X importtime).
+Время импорта не проверяем — на нагруженном CI оно плавает.
+Запуск: python -m pytest tests/test_import_time.py
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+# Модули, которые не должны попадать в холодный старт CLI
+HEAVY_MODULES = ("selenium", "webdriver_manager", "bs4", "lxml", "apscheduler", "sqlalchemy")
+
+
+def _importtime(module: str) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    timings = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self, cumulative, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = int(cumulative)
+    return timings
+
+
+def test_cli_does_not_import_heavy_modules():
+    pytest.importorskip("dotenv")
+    timings = _importtime("app.main")
+    loaded = {name.split(".")[0] for name in timings}
+    assert not loaded & set(HEAVY_MODULES), loaded & set(HEAVY_MODULES)
+
+
+def test_service_does_not_import_selenium():
+    pytest.importorskip("sqlalchemy")
+    timings = _importtime("app.service")
+    assert not any(name.startswith("selenium") for name in timings)
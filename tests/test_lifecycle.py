@@ -0,0 +1,85 @@
+"""
+Жизненный цикл лотов: last_seen пачкой, поиск пропавших после полного обхода.
+Запуск: python -m pytest tests/test_lifecycle.py
+"""
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+
+from app.models import ActiveLot, Lot, OutboxEvent  # noqa: E402
+from app.outbox import EVENT_DISAPPEARED  # noqa: E402
+from app.service import mark_disappeared, save_batch  # noqa: E402
+from app.synthetic import synthetic_lot  # noqa: E402
+
+LIVE = "Опубликовано (прием заявок)"
+
+
+def _lots(n):
+    return [dict(synthetic_lot(i), status=LIVE) for i in range(n)]
+
+
+def _by_hash(db, lot):
+    return db.query(Lot).filter_by(unique_hash=lot["unique_hash"]).one()
+
+
+def test_last_seen_updated_per_batch(db):
+    lots = _lots(30)
+    save_batch(db, lots, run_id=1)
+    first = _by_hash(db, lots[0])
+    assert (first.first_seen_run_id, first.last_seen_run_id) == (1, 1)
+    updated_at = first.updated_at
+
+    save_batch(db, lots[:10], run_id=2)
+    db.expire_all()
+    first = _by_hash(db, lots[0])
+    assert (first.first_seen_run_id, first.last_seen_run_id) == (1, 2)
+    assert first.updated_at == updated_at  # «видели» — не изменение лота
+    assert _by_hash(db, lots[20]).last_seen_run_id == 1
+
+
+def test_full_sweep_marks_unseen_live_lots(db):
+    lots = _lots(50)
+    save_batch(db, lots, run_id=1)
+
+    # Второй полный обход не нашёл 5 лотов
+    save_batch(db, lots[5:], run_id=2)
+    assert mark_disappeared(db, run_id=2) == 5
+    db.commit()
+
+    gone = _by_hash(db, lots[0])
+    assert gone.disappeared_at is not None
+    assert db.query(ActiveLot).count() == 45
+    assert db.query(OutboxEvent).filter_by(event_type=EVENT_DISAPPEARED).count() == 5
+
+    # Лот вернулся в выдачу — снова живой
+    save_batch(db, lots[:1], run_id=3)
+    db.expire_all()
+    assert _by_hash(db, lots[0]).disappeared_at is None
+    assert db.query(ActiveLot).filter_by(lot_id=gone.id).count() == 1
+
+
+def test_suspicious_sweep_is_ignored(db):
+    lots = _lots(50)
+    save_batch(db, lots, run_id=1)
+    save_batch(db, lots[:10], run_id=2)  # обход «потерял» 80% — сбой, а не снятие
+    assert mark_disappeared(db, run_id=2) == 0
+    assert db.query(Lot).filter(Lot.disappeared_at.isnot(None)).count() == 0
+
+
+def test_capped_sweep_checks_only_lots_inside_window(db):
+    from app.text import announce_seq
+
+    lots = _lots(60)  # объявления 16000000…16000019, по 3 лота
+    save_batch(db, lots, run_id=1)
+
+    # Окно выдачи сайта дошло только до 10 новейших объявлений; из них пропали 2 лота
+    window = [lot for lot in lots if announce_seq(lot["announce_number"]) >= 16_000_010]
+    seen = window[:-2]
+    save_batch(db, seen, run_id=2)
+    boundary = min(announce_seq(lot["announce_number"]) for lot in seen)
+
+    assert mark_disappeared(db, run_id=2, boundary=boundary) == 2
+    db.commit()
+    gone = {lot.unique_hash for lot in db.query(Lot).filter(Lot.disappeared_at.isnot(None))}
+    assert gone == {lot["unique_hash"] for lot in window[-2:]}
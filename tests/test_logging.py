@@ -0,0 +1,99 @@
+"""
+Логирование: JSON-записи с контекстом, ротация с gzip, очередь без блокировок.
+Запуск: python -m pytest tests/test_logging.py
+"""
+import gzip
+import json
+import logging
+import logging.handlers
+import queue
+import time
+
+import pytest
+
+pytest.importorskip("dotenv")
+
+from app.logger import (  # noqa: E402
+    ContextQueueHandler, JsonFormatter, log_context, make_file_handler, reset_log_context,
+    set_log_context,
+)
+
+
+class SlowHandler(logging.Handler):
+    """Синк, который тратит 20 мс на запись (медленный диск / сеть)."""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        time.sleep(0.02)
+        self.records.append(self.format(record))
+
+
+def _logger(name, handler):
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def test_json_record_carries_context_and_extra():
+    record = logging.LogRecord("goszakup.parser", logging.INFO, __file__, 1, "Найдено лотов: %d", (50,), None)
+    with log_context(run_id=7, page=3):
+        ContextQueueHandler(queue.SimpleQueue()).prepare(record)
+    record.timings = {"load_s": 1.5}
+
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["msg"] == "Найдено лотов: 50"
+    assert (entry["run_id"], entry["page"]) == (7, 3)
+    assert entry["timings"] == {"load_s": 1.5}
+    assert entry["level"] == "INFO" and entry["logger"] == "goszakup.parser"
+
+
+def test_context_none_removes_field():
+    with log_context(run_id=1, page=2):
+        token = set_log_context(page=None)
+        record = ContextQueueHandler(queue.SimpleQueue()).prepare(
+            logging.LogRecord("x", logging.INFO, __file__, 1, "m", None, None)
+        )
+        assert record.ctx == {"run_id": 1}
+        reset_log_context(token)
+
+
+def test_size_rotation_compresses_backups(tmp_path):
+    path = tmp_path / "parser.log"
+    handler = make_file_handler(str(path), max_bytes=500, backup_count=2)
+    handler.setFormatter(JsonFormatter())
+    logger = _logger("test.rotation", handler)
+    for i in range(40):
+        logger.info(f"строка {i:03d} " + "x" * 40)
+    handler.close()
+
+    backups = sorted(p.name for p in tmp_path.iterdir())
+    assert backups == ["parser.log", "parser.log.1.gz", "parser.log.2.gz"]
+    lines = gzip.decompress((tmp_path / "parser.log.1.gz").read_bytes()).decode("utf-8").splitlines()
+    assert all(json.loads(line)["msg"].startswith("строка") for line in lines)
+
+
+def test_queue_handler_does_not_block_on_slow_sink():
+    q = queue.SimpleQueue()
+    sink = SlowHandler()
+    sink.setFormatter(JsonFormatter())
+    listener = logging.handlers.QueueListener(q, sink)
+    listener.start()
+    logger = _logger("test.queue", ContextQueueHandler(q))
+
+    n = 50
+    t0 = time.perf_counter()
+    with log_context(run_id=1):
+        for page in range(n):
+            logger.info(f"Страница {page}", extra={"timings": {"parse_s": 0.01}})
+    elapsed = time.perf_counter() - t0
+    listener.stop()
+
+    # Синхронно это заняло бы n × 20 мс = 1 с; через очередь — микросекунды на вызов
+    assert elapsed < 0.1
+    assert len(sink.records) == n
+    assert json.loads(sink.records[-1])["run_id"] == 1
@@ -0,0 +1,127 @@
+"""
+Mock-реестр: разметка и JSON-ответ разбираются парсером, churn между запусками.
+Запуск: python -m pytest tests/test_mock_registry.py
+"""
+import json
+import os
+import sys
+import urllib.error
+import urllib.request
+
+import pytest
+
+pytest.importorskip("bs4")
+pytest.importorskip("lxml")
+pytest.importorskip("dotenv")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from app.parser import (  # noqa: E402
+    _capture_lots, _extract_page, _get_total_pages, _get_total_records, _lots_from_payload,
+)
+from app.synthetic import synthetic_lot  # noqa: E402
+from mock_registry import DATA_PATH, LOTS_PATH, MockRegistry, make_server, start_in_thread  # noqa: E402
+
+
+class FakeDriver:
+    def __init__(self, html: str):
+        self.page_source = html
+
+
+@pytest.fixture
+def registry_url():
+    def start(registry, **kwargs):
+        server = make_server(registry, js_delay=None, **kwargs)
+        start_in_thread(server)
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}"
+
+    servers = []
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _get(url: str) -> str:
+    return urllib.request.urlopen(url, timeout=5).read().decode("utf-8")
+
+
+def test_pages_parse_back_to_synthetic_lots(registry_url):
+    base = registry_url(MockRegistry(120, per_page=50))
+
+    first = BeautifulSoup(_get(f"{base}{LOTS_PATH}"), "lxml")
+    assert _get_total_records(first) == (120, 50)
+    assert _get_total_pages(first) == 3
+
+    _, rows = _extract_page(FakeDriver(_get(f"{base}{LOTS_PATH}?page=3")))
+    # Новые сверху: 3-я страница — самые старые 20 лотов
+    assert rows == [synthetic_lot(i) for i in range(19, -1, -1)]
+
+
+def test_churn_between_runs(registry_url):
+    registry = MockRegistry(100, per_page=50, new_per_run=10, changed_per_run=100)
+    base = registry_url(registry)
+    _, before = _extract_page(FakeDriver(_get(f"{base}{LOTS_PATH}")))
+
+    assert _get(f"{base}/_mock/next-run").startswith('{"generation": 1')
+    _, after = _extract_page(FakeDriver(_get(f"{base}{LOTS_PATH}")))
+
+    # 10 новых лотов сверху, старые сдвинулись вниз со сменой статуса
+    assert after[10]["unique_hash"] == before[0]["unique_hash"]
+    assert registry.status_overrides
+    assert after[10]["status"] == registry.status_overrides.get(99, before[0]["status"])
+
+
+def test_error_rate(registry_url):
+    base = registry_url(MockRegistry(10), error_rate=1.0)
+    with pytest.raises(urllib.error.HTTPError) as exc:
+        _get(f"{base}{LOTS_PATH}")
+    assert exc.value.code == 502
+
+
+def test_data_payload_maps_to_lot_schema(registry_url):
+    base = registry_url(MockRegistry(120, per_page=50))
+    payload = json.loads(_get(f"{base}{DATA_PATH}?page=1"))
+
+    # JSON-ответ, который рисует таблицу, даёт те же лоты, что и разбор DOM
+    _, dom_rows = _extract_page(FakeDriver(_get(f"{base}{LOTS_PATH}?page=1")))
+    assert _lots_from_payload(payload) == dom_rows
+
+
+def test_payload_without_lots_falls_back():
+    assert _lots_from_payload({"total": 0}) is None
+    assert _lots_from_payload({"items": [{"id": 1}]}) is None
+    assert _lots_from_payload([]) == []
+
+
+class CdpDriver:
+    """performance-лог и Network.getResponseBody, как их отдаёт chromedriver."""
+
+    def __init__(self, url: str, body: str):
+        self.url, self.body = url, body
+
+    def get_log(self, kind):
+        events = [
+            ("Network.responseReceived", {"requestId": "7", "response": {"url": self.url}}),
+            ("Network.loadingFinished", {"requestId": "7"}),
+        ]
+        return [{"message": json.dumps({"message": {"method": m, "params": p}})} for m, p in events]
+
+    def execute_cdp_cmd(self, cmd, params):
+        assert (cmd, params) == ("Network.getResponseBody", {"requestId": "7"})
+        return {"body": self.body, "base64Encoded": False}
+
+
+def test_capture_lots_from_performance_log(registry_url):
+    base = registry_url(MockRegistry(60, per_page=50))
+    url = f"{base}{DATA_PATH}?page=2"
+    payload = json.loads(_get(url))
+
+    lots = _capture_lots(CdpDriver(url, json.dumps(payload)), timeout=1)
+    assert [lot["lot_number"] for lot in lots] == [i["lot_number"] for i in payload["items"]]
+
+    # Ответ не по CAPTURE_URL_PATTERN — промах, парсер вернётся к DOM
+    assert _capture_lots(CdpDriver(f"{base}/static/app.js", "{}"), timeout=0.2) is None
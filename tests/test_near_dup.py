@@ -0,0 +1,90 @@
+"""
+MinHash/LSH-поиск почти-дублей лотов.
+Запуск: python -m pytest tests/test_near_dup.py
+"""
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("sqlalchemy")
+
+
+from app.models import Lot  # noqa: E402
+from app.near_dup import backfill, band_keys, minhash, similarity  # noqa: E402
+from app.parser import hash_prefix  # noqa: E402
+from app.service import save_batch  # noqa: E402
+from app.synthetic import synthetic_lot  # noqa: E402
+
+ORIGINAL = "Приобретение лекарственных средств для нужд городской больницы №5 на 2024 год"
+EDITED = "Приобретение лекарственных средств для нужд городской больницы № 5 на 2025 год"
+OTHER = "Услуги по вывозу твердых бытовых отходов с территории школы"
+
+
+def _lot(i, name, announce):
+    lot = synthetic_lot(i)
+    # Малые i → одинаковый hash_prefix (0): заодно проверяется разбор коллизий префикса
+    key = i.to_bytes(32, "big")
+    lot.update(unique_hash=key, hash_prefix=hash_prefix(key), lot_name=name, announce_number=announce)
+    return lot
+
+
+def test_similarity_estimate():
+    a, b, c = minhash(ORIGINAL), minhash(EDITED), minhash(OTHER)
+    assert similarity(a, b) > 0.7
+    assert similarity(a, c) < 0.2
+    assert set(band_keys(a)) & set(band_keys(b))
+    assert minhash("") is None
+
+
+def test_republished_lot_marked(db):
+    save_batch(db, [_lot(1, ORIGINAL, "100-1"), _lot(2, OTHER, "100-1")])
+    save_batch(db, [_lot(3, EDITED, "200-1")])
+    by_id = {lot.lot_name: lot for lot in db.query(Lot)}
+    assert by_id[EDITED].duplicate_of == by_id[ORIGINAL].id
+    assert by_id[OTHER].duplicate_of is None
+
+
+def test_same_announcement_is_not_duplicate(db):
+    save_batch(db, [_lot(1, ORIGINAL, "100-1"), _lot(2, EDITED, "100-1")])
+    assert db.query(Lot).filter(Lot.duplicate_of.isnot(None)).count() == 0
+
+
+def test_backfill(db):
+    # Лоты без индекса (как до миграции) — backfill строит его и находит дубль
+    template = synthetic_lot(0)
+    for i, (name, announce) in enumerate([(ORIGINAL, "1-1"), (OTHER, "1-1"), (EDITED, "2-1")]):
+        db.add(Lot(unique_hash=i.to_bytes(32, "big"), lot_name=name, announce_number=announce,
+                   raw_data=template["raw_data"]))
+    db.commit()
+    assert backfill(db, chunk_size=2, workers=2) == 1
+
+
+def test_hot_bucket_is_capped(db, monkeypatch):
+    import app.near_dup as near_dup
+    from app.models import LotLshBucket, LotSignature
+
+    # Переопубликации одного названия: в корзинах остаётся только корень
+    save_batch(db, [_lot(i, ORIGINAL, f"{i}-1") for i in range(1, 21)])
+    root = db.query(Lot).order_by(Lot.id).first()
+    assert db.query(Lot).filter(Lot.duplicate_of == root.id).count() == 19
+    assert db.query(LotLshBucket).count() == near_dup.BANDS
+
+    # Корзина, разросшаяся до ограничения (старые данные): 300 корней с той же сигнатурой
+    sig = minhash(ORIGINAL)
+    template = synthetic_lot(0)
+    for i in range(100, 400):
+        lot = Lot(unique_hash=i.to_bytes(32, "big"), lot_name=ORIGINAL, announce_number=f"{i}-1",
+                  raw_data=template["raw_data"])
+        db.add(lot)
+        db.flush()
+        db.add(LotSignature(lot_id=lot.id, signature=sig.tobytes()))
+        db.add_all(LotLshBucket(band_key=k, lot_id=lot.id) for k in band_keys(sig))
+    db.commit()
+
+    compared = []
+    monkeypatch.setattr(near_dup, "similarity", lambda a, b: compared.append(1) or similarity(a, b))
+    save_batch(db, [_lot(1000, EDITED, "1000-1")])
+    assert len(compared) <= near_dup.BUCKET_CANDIDATES
+    newest = db.query(Lot.id).filter(Lot.announce_number == "399-1").scalar()
+    # Из равных кандидатов берётся самый ранний — но только среди BUCKET_CANDIDATES новейших
+    duplicate_of = db.query(Lot.duplicate_of).filter(Lot.announce_number == "1000-1").scalar()
+    assert duplicate_of == newest - near_dup.BUCKET_CANDIDATES + 1
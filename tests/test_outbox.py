@@ -0,0 +1,108 @@
+"""
+Transactional outbox: события пишутся вместе с лотами, доставка at-least-once.
+Запуск: python -m pytest tests/test_outbox.py
+"""
+import json
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+
+import app.outbox as outbox  # noqa: E402
+from app.models import ConsumerOffset, Lot, OutboxEvent  # noqa: E402
+from app.outbox import (  # noqa: E402
+    EVENT_CHANGED, EVENT_CREATED, LocalQueueSink, dispatch_once, dispatch_pending,
+)
+from app.service import save_batch  # noqa: E402
+from app.synthetic import synthetic_pages  # noqa: E402
+
+
+class FailingSink:
+    def send(self, events):
+        raise ConnectionError("consumer down")
+
+
+def test_events_written_with_lots(db):
+    page = next(synthetic_pages(1))
+    save_batch(db, page)
+    assert db.query(OutboxEvent).filter_by(event_type=EVENT_CREATED).count() == len(page)
+
+    # Повтор без изменений — событий нет; смена статуса — lot.changed
+    save_batch(db, page)
+    changed = dict(page[0], status="Завершено" if page[0]["status"] != "Завершено" else "Отменено")
+    result = save_batch(db, [changed])
+    assert (result.new, result.changed) == (0, 1)
+    assert db.query(Lot.status).filter_by(unique_hash=changed["unique_hash"]).scalar() == changed["status"]
+    assert db.query(OutboxEvent).filter_by(event_type=EVENT_CHANGED).count() == 1
+
+
+def test_dispatch_at_least_once(db):
+    save_batch(db, next(synthetic_pages(1)))
+
+    with pytest.raises(ConnectionError):
+        dispatch_pending(db, "crm", FailingSink(), batch_size=20)
+    db.rollback()
+    assert (db.get(ConsumerOffset, "crm").last_event_id or 0) == 0
+
+    sink = LocalQueueSink()
+    assert dispatch_pending(db, "crm", sink, batch_size=20) == 50
+    assert sink.queue.qsize() == 50
+    first = sink.queue.get()
+    assert first["type"] == EVENT_CREATED and first["data"]["id"] == first["lot_id"]
+
+    # Второй потребитель читает тот же поток независимо
+    assert dispatch_pending(db, "analytics", LocalQueueSink()) == 50
+    assert dispatch_pending(db, "crm", sink) == 0
+
+
+def _event(db, event_id, lot_id):
+    db.add(OutboxEvent(id=event_id, event_type=EVENT_CREATED, lot_id=lot_id, payload=json.dumps({"id": lot_id})))
+    db.commit()
+
+
+def test_event_committed_out_of_id_order_is_delivered(db):
+    # Транзакция A взяла id 2, но зафиксировалась после B (id 3)
+    _event(db, 1, 10)
+    _event(db, 3, 30)
+    sink = LocalQueueSink()
+    assert dispatch_pending(db, "crm", sink) == 2
+    offset = db.get(ConsumerOffset, "crm")
+    assert offset.last_event_id == 3 and json.loads(offset.gaps).keys() == {"2"}
+
+    _event(db, 2, 20)
+    _event(db, 4, 40)
+    assert dispatch_pending(db, "crm", sink) == 2
+    assert [sink.queue.get()["id"] for _ in range(4)] == [1, 3, 2, 4]
+    assert db.get(ConsumerOffset, "crm").gaps is None
+    assert dispatch_pending(db, "crm", sink) == 0
+
+
+def test_unfilled_gap_is_forgotten(db):
+    _event(db, 1, 10)
+    _event(db, 4, 40)  # id 2–3 — откаченные транзакции
+    assert dispatch_once(db, "crm", LocalQueueSink()) == 2
+    assert len(json.loads(db.get(ConsumerOffset, "crm").gaps)) == 2
+    assert dispatch_once(db, "crm", LocalQueueSink(), gap_seconds=0) == 0
+    assert db.get(ConsumerOffset, "crm").gaps is None
+
+
+def test_pruned_history_is_not_tracked_as_gaps(db, monkeypatch):
+    # prune() удалил всё до 100 000: новый потребитель начинает с самого старого события
+    _event(db, 100_001, 1)
+    _event(db, 100_002, 2)
+    assert dispatch_pending(db, "new", LocalQueueSink()) == 2
+    assert db.get(ConsumerOffset, "new").gaps is None
+
+    # Старый потребитель с offset-ом 0 тоже не считает удалённую историю дырками
+    db.add(ConsumerOffset(consumer="old", last_event_id=0))
+    db.commit()
+    assert dispatch_pending(db, "old", LocalQueueSink()) == 2
+    assert db.get(ConsumerOffset, "old").gaps is None
+
+    # Настоящих дырок больше предела — помним только самые новые
+    monkeypatch.setattr(outbox, "OUTBOX_MAX_GAPS", 3)
+    _event(db, 100_010, 10)
+    assert dispatch_once(db, "new", LocalQueueSink()) == 1
+    gaps = json.loads(db.get(ConsumerOffset, "new").gaps)
+    assert sorted(map(int, gaps)) == [100_007, 100_008, 100_009]
@@ -0,0 +1,71 @@
+"""
+Кеш отпечатков страниц: неизменная страница не разбирается повторно.
+Запуск: python -m pytest tests/test_page_cache.py
+"""
+import pytest
+
+pytest.importorskip("bs4")
+pytest.importorskip("lxml")
+pytest.importorskip("dotenv")
+
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.database import Base, make_engine  # noqa: E402
+from app.parser import _extract_page  # noqa: E402
+from app.service import load_fingerprints, store_fingerprints  # noqa: E402
+
+ROW = """
+<tr>
+  <td><b>{n}-ЗЦП1</b><a href="/ru/announce/index/{n}">{n}-1 Приобретение</a> Заказчик: ГУ</td>
+  <td><a href="/ru/subpriceoffer/index/{n}/1">Бумага офисная</a></td>
+  <td>10</td><td>{amount}</td><td>Запрос ценовых предложений</td><td>Опубликован</td>
+</tr>
+"""
+
+
+def _page(*rows) -> str:
+    body = "".join(ROW.format(n=n, amount=amount) for n, amount in rows)
+    return (
+        "<table><thead><tr><th>Лот</th><th>Способ закупки</th><th>Статус</th></tr></thead>"
+        f"<tbody>{body}</tbody></table>"
+    )
+
+
+class FakeDriver:
+    def __init__(self, html: str):
+        self.page_source = html
+
+
+def test_unchanged_page_is_skipped():
+    digest, rows = _extract_page(FakeDriver(_page((1, "1 000,00"), (2, "2 000,00"))))
+    assert len(rows) == 2
+
+    # Тот же контент с другими пробелами — тот же отпечаток, строки не разбираются
+    html = _page((1, "1 000,00"), (2, "2 000,00")).replace("<td>", "<td>\n   ")
+    assert _extract_page(FakeDriver(html), digest) == (digest, None)
+
+    # Изменилась сумма одного лота — страница разбирается заново
+    new_digest, rows = _extract_page(FakeDriver(_page((1, "1 000,00"), (2, "2 500,00"))), digest)
+    assert new_digest != digest
+    assert len(rows) == 2
+
+
+def test_empty_page_is_never_a_hit():
+    digest, rows = _extract_page(FakeDriver("<html></html>"))
+    assert _extract_page(FakeDriver("<html></html>"), digest) == (digest, [])
+
+
+def test_fingerprints_roundtrip(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'lots.db'}")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+
+    store_fingerprints(db, {2: ("a" * 64, 50), 3: ("b" * 64, 50)}, run_id=1, slice_key="lots")
+    db.commit()
+    store_fingerprints(db, {3: ("c" * 64, 49), 4: ("d" * 64, 50)}, run_id=2, slice_key="lots")
+    db.commit()
+
+    assert load_fingerprints(db, "lots") == {2: "a" * 64, 3: "c" * 64, 4: "d" * 64}
+    assert load_fingerprints(db, "other") == {}
+    db.close()
+    engine.dispose()
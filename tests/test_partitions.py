@@ -0,0 +1,53 @@
+"""
+Помесячные партиции lots: генерация DDL и выбор партиций на архивирование.
+Запуск: python -m pytest tests/test_partitions.py
+"""
+from datetime import date
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from app.partitions import (  # noqa: E402
+    Partition, add_months, ensure_statement, expired, partition_clause, purge_statements,
+)
+
+
+def _existing(*uppers):
+    parts = [Partition(f"p{add_months(u, -1):%Y%m}", u) for u in uppers]
+    return parts + [Partition("pmax", None)]
+
+
+def test_partition_clause_covers_months_and_maxvalue():
+    clause = partition_clause(date(2025, 11, 17), date(2026, 1, 1))
+    assert "RANGE COLUMNS(created_at)" in clause
+    assert "PARTITION p202511 VALUES LESS THAN ('2025-12-01')" in clause
+    assert "PARTITION p202601 VALUES LESS THAN ('2026-02-01')" in clause
+    assert clause.count("PARTITION p") == 4  # 3 месяца + pmax
+
+
+def test_ensure_adds_missing_future_months_only():
+    parts = _existing(date(2026, 10, 1), date(2026, 11, 1))
+    stmt = ensure_statement(parts, today=date(2026, 10, 19), ahead=2)
+    assert stmt.startswith("ALTER TABLE lots REORGANIZE PARTITION pmax INTO")
+    assert "p202611" in stmt and "p202612" in stmt and "p202610" not in stmt
+    assert "MAXVALUE" in stmt
+
+    # Всё уже нарезано — ничего не делаем
+    parts = _existing(date(2026, 11, 1), date(2026, 12, 1), date(2027, 1, 1))
+    assert ensure_statement(parts, today=date(2026, 10, 19), ahead=2) is None
+
+
+def test_expired_respects_retention_window():
+    parts = _existing(date(2026, 2, 1), date(2026, 3, 1), date(2026, 4, 1), date(2026, 11, 1))
+    names = [p.name for p in expired(parts, today=date(2026, 10, 19), retention_months=7)]
+    assert names == ["p202601", "p202602"]  # окно с 2026-03-01
+    assert expired(parts, today=date(2026, 10, 19), retention_months=0) == []
+
+
+def test_purge_covers_dependent_tables_and_rollup_days():
+    statements = purge_statements(Partition("p202601", date(2026, 2, 1)))
+    for table in ("active_lots", "lot_signatures", "lot_price_scores", "watchlist_matches", "lot_hashes"):
+        assert f"DELETE FROM {table} WHERE lot_id IN (SELECT id FROM lots PARTITION (p202601))" in statements
+    assert "DELETE FROM lot_daily_rollups WHERE day < '2026-02-01'" in statements
+    assert "DELETE FROM customer_daily_rollups WHERE day < '2026-02-01'" in statements
@@ -0,0 +1,88 @@
+"""
+Робастная статистика цен по гистограммам и инкрементальный скоринг.
+Запуск: python -m pytest tests/test_price_anomaly.py
+"""
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("sqlalchemy")
+
+from datetime import datetime, timedelta  # noqa: E402
+
+
+from app.models import Lot, LotPriceScore, PriceGroupStats  # noqa: E402
+from app.price_anomaly import (  # noqa: E402
+    BIN_WIDTH, HIST_BINS, histogram_stats, rebuild, to_bins, update_after_run,
+)
+
+
+def test_histogram_stats_match_numpy():
+    rng = np.random.default_rng(1)
+    values = rng.normal(6.0, 0.3, size=5000)
+    hist = np.zeros((1, HIST_BINS), dtype=np.int64)
+    np.add.at(hist, (np.zeros(len(values), dtype=np.int64), to_bins(values)), 1)
+    stats = histogram_stats(hist)
+    assert stats["count"][0] == 5000
+    assert abs(stats["median"][0] - np.median(values)) <= BIN_WIDTH
+    mad = np.median(np.abs(values - np.median(values)))
+    assert abs(stats["mad"][0] - mad) <= 2 * BIN_WIDTH
+    assert abs(stats["q90"][0] - np.quantile(values, 0.9)) <= BIN_WIDTH
+
+
+def _add_lots(db, amounts, created_at):
+    for amount in amounts:
+        db.add(Lot(unique_hash=db.query(Lot).count().to_bytes(32, "big"), lot_name="Бензин АИ-92 марки",
+                   purchase_method="Аукцион", purchase_amount=amount, created_at=created_at))
+        db.flush()
+    db.commit()
+
+
+def test_incremental_scoring(db):
+    start = datetime.utcnow() - timedelta(hours=1)
+    _add_lots(db, [100_000 + i * 1000 for i in range(20)], start)
+    rebuild(db)
+
+    run_started = datetime.utcnow()
+    _add_lots(db, [104_500, 50_000_000], run_started)
+    assert update_after_run(db) == 2
+
+    scores = {s.lot_id: s.score for s in db.query(LotPriceScore)}
+    overpriced = db.query(Lot.id).filter(Lot.purchase_amount == 50_000_000).scalar()
+    assert scores[overpriced] > 10
+    normal = db.query(Lot.id).filter(Lot.purchase_amount == 104_500).scalar()
+    assert abs(scores[normal]) < 2
+
+
+def test_unscored_lots_outside_run_are_scored(db):
+    # Лоты backfill и запуска, где скоринг упал, старше начала текущего запуска
+    _add_lots(db, [100_000 + i * 1000 for i in range(20)], datetime.utcnow() - timedelta(days=3))
+    assert update_after_run(db, chunk_size=7) == 20
+    assert db.query(LotPriceScore).count() == 20
+    assert update_after_run(db) == 0
+
+
+def test_amount_change_moves_lot_between_bins(db):
+    from app.service import save_batch
+    from app.synthetic import synthetic_lot
+
+    lots = [{**synthetic_lot(i), "lot_name": "Бензин АИ-92 марки", "purchase_method": "Аукцион",
+             "purchase_amount": 100_000.0 + i * 1000} for i in range(10)]
+    save_batch(db, lots)
+    assert update_after_run(db) == 10
+    group = db.query(PriceGroupStats).one()
+    before = np.frombuffer(group.histogram, dtype=np.uint32).copy()
+
+    # Сумма одного лота выросла в 500 раз: старый бин освобождается, скор пересчитывается
+    target = lots[3]
+    save_batch(db, [{**target, "purchase_amount": 50_000_000.0}])
+    target_id = db.query(Lot.id).filter_by(unique_hash=target["unique_hash"]).scalar()
+    assert db.get(LotPriceScore, target_id) is None
+    db.refresh(group)
+    assert group.lot_count == 9
+
+    assert update_after_run(db) == 1
+    db.refresh(group)
+    after = np.frombuffer(group.histogram, dtype=np.uint32)
+    assert group.lot_count == 10 and after.sum() == before.sum()
+    assert after[to_bins(np.log10([103_000.0]))[0]] == before[to_bins(np.log10([103_000.0]))[0]] - 1
+    assert db.get(LotPriceScore, target_id).score > 10
@@ -0,0 +1,76 @@
+"""
+Профилирование запуска: артефакты cProfile / sampling и отчёт tracemalloc.
+Запуск: python -m pytest tests/test_profiling.py
+"""
+import os
+import pstats
+import time
+
+import pytest
+
+pytest.importorskip("dotenv")
+
+from app.profiling import RunProfiler  # noqa: E402
+
+
+def _workload(profiler: RunProfiler) -> list:
+    kept = []
+    for page in range(1, 4):
+        profiler.page_boundary(page)
+        kept.append([str(i) * 10 for i in range(5_000)])
+    return kept
+
+
+def _busy(seconds: float) -> int:
+    deadline = time.perf_counter() + seconds
+    n = 0
+    while time.perf_counter() < deadline:
+        n += 1
+    return n
+
+
+def test_cprofile_artifacts(tmp_path):
+    profiler = RunProfiler("cprofile", run_id=7, out_dir=str(tmp_path)).start()
+    _workload(profiler)
+    out = profiler.stop()
+
+    assert out == os.path.join(str(tmp_path), "run_7")
+    stats = pstats.Stats(os.path.join(out, "run_7.pstats"))
+    assert any(func[2] == "_workload" for func in stats.stats)
+
+    report = open(os.path.join(out, "run_7.alloc.txt"), encoding="utf-8").read()
+    pages = [line.split()[0] for line in report.splitlines() if line and line[0] == " "]
+    assert pages[:3] == ["1", "2", "3"]
+    assert "test_profiling.py" in report
+
+
+def test_snapshots_every_n_pages_are_diffed(tmp_path):
+    profiler = RunProfiler("cprofile", run_id=9, out_dir=str(tmp_path), snapshot_pages=2).start()
+    kept = _workload(profiler)
+    out = profiler.stop()
+    assert len(kept) == 3
+
+    report = open(os.path.join(out, "run_9.alloc.txt"), encoding="utf-8").read()
+    sections = report.split("\n# ")
+    intervals = [s for s in sections if s.startswith("top") and "за страницы" in s]
+    assert [s.splitlines()[0].rsplit(" ", 1)[1] for s in intervals] == ["1–2", "3–3"]
+    # Строки страниц 1–2 выделены до снимка на границе 3-й — в первом интервале
+    assert "test_profiling.py" in intervals[0]
+
+
+def test_sampling_folded_stacks(tmp_path):
+    profiler = RunProfiler("sampling", run_id=8, out_dir=str(tmp_path)).start()
+    _workload(profiler)
+    _busy(0.2)
+    out = profiler.stop()
+
+    lines = open(os.path.join(out, "run_8.folded"), encoding="utf-8").read().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert "test_profiling.py:_busy" in open(os.path.join(out, "run_8.folded"), encoding="utf-8").read()
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        RunProfiler("perf", run_id=1)
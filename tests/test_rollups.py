@@ -0,0 +1,71 @@
+"""
+Суточные агрегаты: дельты из save_batch совпадают с полным пересчётом.
+Запуск: python -m pytest tests/test_rollups.py
+"""
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import func  # noqa: E402
+
+from app.models import CustomerDailyRollup, Lot, LotDailyRollup  # noqa: E402
+from app.rollups import rebuild  # noqa: E402
+from app.service import save_batch  # noqa: E402
+from app.synthetic import synthetic_lot  # noqa: E402
+
+
+def _snapshot(db) -> tuple[dict, dict]:
+    lots = {
+        (r.day, r.status, r.purchase_method): (r.lot_count, Decimal(r.amount_sum))
+        for r in db.query(LotDailyRollup) if r.lot_count or r.amount_sum
+    }
+    customers = {
+        (r.day, r.customer_bin): (r.lot_count, Decimal(r.amount_sum))
+        for r in db.query(CustomerDailyRollup) if r.lot_count or r.amount_sum
+    }
+    return lots, customers
+
+
+def test_deltas_match_full_rebuild(db):
+    lots = [synthetic_lot(i) for i in range(80)]
+    save_batch(db, lots[:50])
+    save_batch(db, lots[30:])  # пересечение — не новые и без изменений
+
+    # Смена статуса и суммы: лот переезжает между ячейками
+    moved = [
+        dict(lots[3], status="Отменено", purchase_amount=1234.5),
+        dict(lots[40], purchase_method="Из одного источника"),
+    ]
+    assert save_batch(db, moved).changed == 2
+
+    incremental = _snapshot(db)
+    assert sum(count for count, _ in incremental[0].values()) == db.query(func.count(Lot.id)).scalar()
+    rebuild(db, chunk_size=17)
+    assert _snapshot(db) == incremental
+
+
+def test_lot_inserted_by_concurrent_writer_is_not_counted(db, monkeypatch):
+    import app.service as service
+    from app.models import Announcement, LotHash, OutboxEvent
+
+    lots = [dict(synthetic_lot(i), announce_number="777-1") for i in range(3)]
+    claim = service.lot_hashes.claim
+
+    def race_then_claim(session, hashes):
+        # Параллельный писатель успел вставить lots[0] после нашей пробы
+        lot = Lot(**{k: v for k, v in lots[0].items() if hasattr(Lot, k)}, created_at=datetime(2020, 1, 1))
+        session.add(lot)
+        session.flush()
+        session.add(LotHash(unique_hash=lot.unique_hash, lot_id=lot.id))
+        session.flush()
+        return claim(session, hashes)
+
+    monkeypatch.setattr(service.lot_hashes, "claim", race_then_claim)
+    assert save_batch(db, lots).new == 2
+    assert db.query(func.count(Lot.id)).scalar() == 3
+    assert db.query(Announcement.lot_count).scalar() == 2
+    assert db.query(OutboxEvent).count() == 2
+    assert sum(count for count, _ in _snapshot(db)[0].values()) == 2
@@ -0,0 +1,204 @@
+"""
+Реестры-источники: бюджет запросов, общий пул браузеров, разбор строк
+объявлений и договоров, общий движок обхода.
+Запуск: python -m pytest tests/test_sources.py
+"""
+import threading
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("bs4")
+pytest.importorskip("lxml")
+
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+import app.sources.engine as engine_module  # noqa: E402
+from app.models import Announcement, Contract, ParseRun  # noqa: E402
+from app.sources import SOURCES, get_source  # noqa: E402
+from app.sources.budget import RateBudget  # noqa: E402
+from app.sources.engine import save_rows  # noqa: E402
+from app.sources.pool import DriverPool  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_budget_spaces_requests():
+    clock = FakeClock()
+    budget = RateBudget(30, clock=clock, sleep=clock.sleep)  # раз в 2 с
+    assert [budget.acquire() for _ in range(3)] == [0.0, 2.0, 2.0]
+    clock.now += 10  # простой не копит «запас» запросов сверх одного
+    assert budget.acquire() == 0.0
+    assert budget.acquire() == 2.0
+    assert RateBudget(0).acquire() == 0.0
+
+
+class Driver:
+    created = 0
+
+    def __init__(self):
+        Driver.created += 1
+        self.quit_called = False
+        self.urls = []
+
+    def get(self, url):
+        self.urls.append(url)
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_pool_shares_drivers_and_replaces_broken():
+    Driver.created = 0
+    budget = RateBudget(0)
+    pool = DriverPool(1, budget, factory=Driver)
+
+    with pool.lease() as first:
+        first.get("a")
+    with pool.lease() as second:
+        assert second.driver is first.driver  # тот же браузер, не новый процесс
+    assert Driver.created == 1 and budget.spent == 1
+
+    # Второй поток ждёт, пока первый вернёт единственный драйвер
+    held = pool.acquire()
+    got = []
+    worker = threading.Thread(target=lambda: got.append(pool.acquire()))
+    worker.start()
+    worker.join(0.2)
+    assert worker.is_alive() and not got
+    pool.release(held)
+    worker.join(2)
+    assert got[0].driver is held.driver
+    pool.release(got[0])
+
+    with pytest.raises(RuntimeError):
+        with pool.lease():
+            raise RuntimeError("обход упал")
+    assert first.driver.quit_called
+    with pool.lease() as fresh:
+        assert fresh.driver is not first.driver
+    assert Driver.created == 2
+    pool.close()
+    assert fresh.driver.quit_called
+
+
+def _page(headers, rows, first, last, total):
+    head = "".join(f"<th>{h}</th>" for h in headers)
+    body = "".join("<tr>" + "".join(f"<td>{c}</td>" for c in row) + "</tr>" for row in rows)
+    return (
+        f"<html><body><div>Показано c {first} по {last} из {total} записей</div>"
+        f"<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table></body></html>"
+    )
+
+
+ANNOUNCE_HEADERS = ("№", "Наименование", "Организатор", "Способ", "Начало", "Окончание", "Сумма", "Статус")
+CONTRACT_HEADERS = ("№ договора", "Заказчик", "Поставщик", "Сумма", "Дата", "Статус")
+
+
+def _contract(i, status="Действует"):
+    return (
+        f'<a href="/ru/egzcontract/cpublic/show/{i}">Д-{i}</a>',
+        "ГУ Отдел образования 123456789012",
+        f"ТОО Поставщик {i} 98765432101{i % 10}",
+        "1 500 000,50",
+        "15.03.2026",
+        status,
+    )
+
+
+def test_announcement_row_and_upsert(db):
+    from bs4 import BeautifulSoup
+
+    from app.parser import _find_row_tags
+
+    source = get_source("announcements")
+    html = _page(ANNOUNCE_HEADERS, [(
+        '<a href="/ru/announce/index/16413510">16413510-1</a>',
+        '<a href="/ru/announce/index/16413510">Приобретение бумаги</a>',
+        "ГУ Аппарат акима 123456789012",
+        "Запрос ценовых предложений",
+        "2026-10-01 09:00:00", "2026-10-08 09:00:00",
+        "2 450 000,00",
+        "Опубликовано (прием заявок)",
+    )], 1, 1, 1)
+    rows = [source.parse_row(tr) for tr in _find_row_tags(BeautifulSoup(html, "lxml"), source.table_headers)]
+    assert rows == [{
+        "announce_number": "16413510-1",
+        "announce_name": "Приобретение бумаги",
+        "announce_url": "https://www.goszakup.gov.kz/ru/announce/index/16413510",
+        "customer_name": "ГУ Аппарат акима 123456789012",
+        "customer_bin": "123456789012",
+        "purchase_method": "Запрос ценовых предложений",
+        "total_amount": 2450000.0,
+        "status": "Опубликовано (прием заявок)",
+    }]
+
+    # Объявление уже заведено реестром лотов: дополняется, lot_count не трогается
+    db.add(Announcement(announce_number="16413510-1", lot_count=3))
+    db.commit()
+    assert save_rows(db, source, rows) == (0, 1)
+    saved = db.query(Announcement).one()
+    assert (saved.lot_count, saved.status, saved.total_amount) == (3, "Опубликовано (прием заявок)", Decimal("2450000.00"))
+    assert save_rows(db, source, rows) == (0, 0)
+
+
+def test_engine_crawls_contracts_through_shared_pool(db, monkeypatch):
+    pages = {
+        "https://reg/contracts": _page(CONTRACT_HEADERS, [_contract(1), _contract(2)], 1, 2, 3),
+        "https://reg/contracts?page=2": _page(CONTRACT_HEADERS, [_contract(3)], 3, 3, 3),
+    }
+
+    class HtmlDriver(Driver):
+        page_source = ""
+
+        def get(self, url):
+            super().get(url)
+            self.page_source = pages[url]
+
+    Driver.created = 0
+    source = get_source("contracts")
+    monkeypatch.setattr(source, "base_url", "https://reg/contracts")
+    monkeypatch.setattr(source, "wait_ready", lambda driver: True)
+    monkeypatch.setattr(engine_module, "PAGE_PAUSE_SECONDS", 0)
+    monkeypatch.setattr(engine_module, "SessionLocal", sessionmaker(bind=db.get_bind()))
+
+    budget = RateBudget(0)
+    pool = DriverPool(1, budget, factory=HtmlDriver)
+    result = source.run(pool)
+    assert (result["found"], result["new"], result["changed"]) == (3, 3, 0)
+    assert budget.spent == 2
+
+    contract = db.query(Contract).filter_by(contract_number="Д-2").one()
+    assert contract.customer_bin == "123456789012"
+    assert contract.supplier_bin == "987654321012"
+    assert contract.contract_amount == Decimal("1500000.50")
+    assert str(contract.contract_date) == "2026-03-15"
+    assert contract.contract_url == "https://www.goszakup.gov.kz/ru/egzcontract/cpublic/show/2"
+
+    # Повторный обход: смена статуса — обновление, не новая строка
+    pages["https://reg/contracts?page=2"] = _page(CONTRACT_HEADERS, [_contract(3, "Расторгнут")], 3, 3, 3)
+    result = source.run(pool)
+    assert (result["new"], result["changed"]) == (0, 1)
+    assert db.query(Contract).count() == 3
+    assert Driver.created == 1  # оба обхода — на одном браузере
+
+    runs = db.query(ParseRun.source, ParseRun.status, ParseRun.lots_found).all()
+    assert runs == [("contracts", "success", 3), ("contracts", "success", 3)]
+
+
+def test_sources_registry():
+    assert set(SOURCES) == {"lots", "announcements", "contracts"}
+    with pytest.raises(ValueError):
+        get_source("tenders")
@@ -0,0 +1,51 @@
+"""
+SQLite-бэкенд: pragmas на соединении, bulk-путь записи и бинарные ключи лотов.
+Запуск: python -m pytest tests/test_sqlite_backend.py
+"""
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import text  # noqa: E402
+
+from app.models import Lot  # noqa: E402
+from app.service import save_batch  # noqa: E402
+from app.synthetic import synthetic_pages  # noqa: E402
+
+
+def test_wal_pragmas_applied(db):
+    assert db.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+    assert db.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+
+
+def test_save_batch_dedup(db):
+    page1, page2 = synthetic_pages(2)
+    assert save_batch(db, page1).new == len(page1)
+    # Повтор той же страницы + дубль внутри пачки
+    assert save_batch(db, page1 + page2 + page2[:5]).new == len(page2)
+    assert db.query(Lot).count() == len(page1) + len(page2)
+    assert db.query(Lot.announce_name).filter(Lot.announce_name.isnot(None)).count() > 0
+
+
+def test_binary_hash_keys(db):
+    page = next(synthetic_pages(1))
+    save_batch(db, page)
+    stored = db.query(Lot.unique_hash, Lot.hash_prefix).first()
+    assert isinstance(stored.unique_hash, bytes) and len(stored.unique_hash) == 32
+    assert stored.hash_prefix == int.from_bytes(stored.unique_hash[:8], "big", signed=True)
+
+    # Лот, созданный через ORM в обход _build_lot, тоже получает префикс
+    db.add(Lot(unique_hash=b"\xff" * 32))
+    db.commit()
+    assert db.query(Lot.hash_prefix).filter(Lot.unique_hash == b"\xff" * 32).scalar() == -1
+
+
+def test_hash_prefix_collision(db):
+    # Разные хеши с одинаковым префиксом — разные лоты
+    a, b = next(synthetic_pages(1, per_page=2))
+    b["unique_hash"] = a["unique_hash"][:8] + b"\x00" * 24
+    b["hash_prefix"] = a["hash_prefix"]
+    assert save_batch(db, [a]).new == 1
+    assert save_batch(db, [a, b]).new == 1
+    assert save_batch(db, [a, b]).new == 0
+    assert db.query(Lot).count() == 2
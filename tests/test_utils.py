@@ -15,7 +15,7 @@ from typing import Optional
 
 def _make_hash(lot_number, announce_number, lot_name):
     raw = f"{lot_number}|{announce_number}|{lot_name}".lower().strip()
-    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+    return hashlib.sha256(raw.encode("utf-8")).digest()
 
 def _parse_amount(text):
     if not text:
@@ -46,7 +46,7 @@ def _parse_year(text):
 
 def test_hash_deterministic():
     assert _make_hash("A", "B", "C") == _make_hash("A", "B", "C")
-    assert len(_make_hash("x", "y", "z")) == 64
+    assert len(_make_hash("x", "y", "z")) == 32
     print("✓ test_hash_deterministic")
 
 def test_hash_unique():
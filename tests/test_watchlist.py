@@ -0,0 +1,78 @@
+"""
+Сохранённые поиски: автомат Ахо–Корасик, индексы БИН/сумм, запись совпадений.
+Запуск: python -m pytest tests/test_watchlist.py
+"""
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+
+from app.models import Lot, SavedSearch, WatchlistMatch  # noqa: E402
+from app.service import save_batch  # noqa: E402
+from app.synthetic import synthetic_lot  # noqa: E402
+from app.watchlist import Automaton, WatchlistMatcher, load_matcher, rematch  # noqa: E402
+
+
+def _search(id, keywords=None, bins=None, amount_min=None, amount_max=None):
+    return SimpleNamespace(id=id, keywords=keywords, customer_bins=bins,
+                           amount_min=amount_min, amount_max=amount_max)
+
+
+def test_automaton_finds_overlapping_patterns():
+    ac = Automaton()
+    words = ["he", "she", "his", "hers"]
+    for w in words:
+        ac.add(w)
+    ac.build()
+
+    found = sorted((start, words[i]) for start, i in ac.iter("ushers"))
+    assert found == [(1, "she"), (2, "he"), (2, "hers")]
+    assert list(ac.iter("xyz")) == []
+
+
+def test_matcher_combines_rule_kinds():
+    matcher = WatchlistMatcher([
+        _search(1, keywords="бензин\nдизельное топливо"),
+        _search(2, keywords="бензин", bins="123456789012"),
+        _search(3, amount_min=1000, amount_max=5000),
+        _search(4, bins="123456789012, 999999999999", amount_min=10_000),
+        _search(5),  # без условий — не участвует
+    ])
+    assert len(matcher) == 4
+
+    lot = {"lot_name": "Поставка Бензина АИ-92", "announce_name": None,
+           "customer_bin": "123456789012", "purchase_amount": 5000.0}
+    assert matcher.match(lot) == {1: ["бензин"], 2: ["бензин"], 3: []}
+
+    # Слово только с начала: «кабензин» не совпадает; верхняя граница суммы включительна
+    assert matcher.match({"lot_name": "кабензин", "purchase_amount": 5000.01}) == {}
+    assert matcher.match({"lot_name": "Дизельное  топливо", "customer_bin": "999999999999",
+                          "purchase_amount": 20_000}) == {1: ["дизельное топливо"], 4: []}
+
+
+def test_save_batch_records_matches(db):
+    lots = [synthetic_lot(i) for i in range(40)]
+    target = lots[7]
+    keyword = target["lot_name"].split()[0]
+    db.add_all([
+        SavedSearch(name="по слову", keywords=keyword),
+        SavedSearch(name="по заказчику", customer_bins=target["customer_bin"] or "000000000000"),
+        SavedSearch(name="выключен", keywords=keyword, active=False),
+    ])
+    db.commit()
+
+    matcher = load_matcher(db)
+    assert len(matcher) == 2
+    result = save_batch(db, lots, matcher)
+    expected = sum(len(matcher.match(lot)) for lot in lots)
+    assert result.matches == expected > 0
+    assert db.query(WatchlistMatch).count() == expected
+
+    target_id = db.query(Lot.id).filter_by(unique_hash=target["unique_hash"]).scalar()
+    assert db.query(WatchlistMatch).filter_by(lot_id=target_id, search_id=1).one().matched_keywords
+
+    # Повторный прогон по тем же лотам не плодит строк
+    assert rematch(db) == expected
+    assert db.query(WatchlistMatch).count() == expected